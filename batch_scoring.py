@@ -0,0 +1,120 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from item import Item
+
+logger = logging.getLogger(__name__)
+
+# np.round and Python's round() can disagree on exact half-way values, so the
+# vector pass keeps anything within this margin of a threshold and the exact
+# per-item check makes the final call
+THRESHOLD_MARGIN = 0.05
+
+
+class _Page:
+    """One catalog page priced column-wise"""
+
+    __slots__ = ('raws', 'prices', 'matches', 'summaries', 'percentiles', 'market_prices')
+
+    def __init__(self, raws, prices, matches, summaries, percentiles, market_prices):
+        self.raws = raws
+        self.prices = prices
+        self.matches = matches
+        self.summaries = summaries
+        self.percentiles = percentiles
+        self.market_prices = market_prices
+
+    def match(self, row: int) -> Dict:
+        return {name: values[row] for name, values in self.matches.items()}
+
+    def estimate(self, row: int) -> Optional[Dict]:
+        summary = self.summaries[row]
+        if summary is None:
+            return None
+        return dict(summary, percentile=round(float(self.percentiles[row]), 1))
+
+
+class BatchScorer:
+    """
+    Scores whole catalog pages with NumPy and only builds Items for the
+    listings that can pass the engine's DealFilter.
+
+    Keywords are matched in one regex scan over the page, market estimates are
+    looked up once per bucket, and fallback prices, discounts and profits are
+    computed as arrays.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def score(self, raw_items: Iterable[Dict]) -> List[Item]:
+        """Return the deals in raw_items, identical to the per-item path"""
+        page = self._price_page(raw_items)
+        if page is None:
+            return []
+
+        candidates = self.candidate_mask(page.prices, page.market_prices, page.percentiles)
+        return [item for item in self._build(page, np.flatnonzero(candidates))
+                if self.engine.deal_filter.accepts(item)]
+
+    def score_pages(self, pages: Iterable[List[Dict]]) -> List[Item]:
+        return self.score(raw for page in pages for raw in page)
+
+    def price(self, raw_items: Iterable[Dict]) -> List[Item]:
+        """Every listing in raw_items as an Item, deal or not"""
+        page = self._price_page(raw_items)
+        if page is None:
+            return []
+        return self._build(page, range(len(page.raws)))
+
+    def candidate_mask(self, prices: np.ndarray, market_prices: np.ndarray, percentiles: np.ndarray) -> np.ndarray:
+        """percentiles: the asking price's percentile in its market bucket, NaN without a model estimate"""
+        pricing = self.engine.pricing
+        return self.engine.deal_filter.candidate_mask(
+            prices, market_prices,
+            pricing.discounts(prices, market_prices),
+            pricing.profits(prices, market_prices),
+            percentiles,
+            margin=THRESHOLD_MARGIN
+        )
+
+    def _price_page(self, raw_items: Iterable[Dict]) -> Optional[_Page]:
+        engine = self.engine
+        pricing = engine.pricing
+
+        raws, prices = [], []
+        for raw in raw_items:
+            try:
+                prices.append(float(raw.get('price', 0)))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Error processing item: {e}")
+                continue
+            raws.append(raw)
+
+        if not raws:
+            return None
+
+        prices = np.array(prices)
+        brands = [raw.get('brand_title', '') for raw in raws]
+        matches = pricing.matcher.match_many([raw.get('title', '') for raw in raws], brands)
+
+        buckets = list(zip(brands, [category or 'other' for category in matches['category']],
+                           [raw.get('status', '') for raw in raws], [raw.get('size_title', '') for raw in raws]))
+        summaries, percentiles = engine.market_model.estimate_many(prices, buckets)
+
+        medians = np.array([summary['median'] if summary else np.nan for summary in summaries])
+        market_prices = np.where(np.isnan(medians), pricing.fallback_prices(prices, matches), medians)
+
+        return _Page(raws, prices, matches, summaries, percentiles, market_prices)
+
+    def _build(self, page: _Page, rows: Iterable[int]) -> List[Item]:
+        items = []
+        for row in rows:
+            try:
+                items.append(self.engine._build_item(page.raws[row], float(page.prices[row]),
+                                                     page.match(row), page.estimate(row)))
+            except Exception as e:
+                logger.error(f"Error processing item: {e}")
+        return items
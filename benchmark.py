@@ -0,0 +1,219 @@
+import json
+import asyncio
+import random
+import time
+import tracemalloc
+
+import catalog_decoder
+from advanced_scraper import AdvancedVintedScraper
+from vinted_scraper import VintedScraper
+from market_model import MarketPriceModel
+
+TITLE_WORDS = [
+    'sac', 'gucci', 'louis vuitton', 'nike', 'air max', 'neuf', 'comme neuf', 'vintage',
+    'hoodie', 't-shirt', 'jeans', 'montre', 'baskets', 'zara', 'prada', 'excellent',
+    'jamais porté', 'coat', 'chemise', 'off-white', 'noir', 'blanc', 'taille m'
+]
+# Typical asking price per brand; listings spread around it by condition and noise
+BRAND_PRICES = {
+    'Gucci': 180, 'Nike': 35, 'Zara': 15, 'Prada': 160, 'Louis Vuitton': 250, 'Adidas': 30,
+    'Balenciaga': 200, 'H&M': 8, '': 12, 'Sans marque': 10,
+}
+BRANDS = list(BRAND_PRICES)
+STATUSES = {'Neuf avec étiquette': 1.3, 'Très bon état': 1.0, 'Bon état': 0.8, 'Satisfaisant': 0.6}
+# Share of listings put up well below their usual price, i.e. the deals to find
+BARGAIN_RATE = 0.02
+
+
+def make_catalog_items(count: int, seed: int = 42):
+    """Listings priced like a real catalog: a few percent are bargains, the rest near their market price"""
+    rng = random.Random(seed)
+    items = []
+
+    for i in range(count):
+        brand = rng.choice(BRANDS)
+        status = rng.choice(list(STATUSES))
+        price = BRAND_PRICES[brand] * STATUSES[status] * rng.lognormvariate(0, 0.2)
+        if rng.random() < BARGAIN_RATE:
+            price *= rng.uniform(0.3, 0.6)
+
+        items.append({
+            'id': 4000000000 + i,
+            'title': ' '.join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(2, 6))),
+            'price': f"{max(price, 1):.2f}",
+            'brand_title': brand,
+            'size_title': rng.choice(['S', 'M', 'L', '42', 'Unique']),
+            'status': status,
+            'photo': {'full_size_url': f"https://images.vinted.net/{i}.jpg"},
+            'user': {'login': f"seller{i % 500}", 'average_positive_feedback': rng.randint(80, 100)},
+        })
+
+    return items
+
+
+def make_catalog_page(count: int = 50, seed: int = 42) -> bytes:
+    """A catalog response body with the extra fields the real API sends alongside the ones we read"""
+    rng = random.Random(seed)
+    items = []
+
+    for item in make_catalog_items(count, seed):
+        item_id = item['id']
+        thumbnails = [
+            {'type': kind, 'url': f"https://images.vinted.net/t/{item_id}/{kind}.jpg",
+             'width': width, 'height': width * 4 // 3, 'original_size': None}
+            for kind, width in (('thumb70x100', 70), ('thumb150x210', 150), ('thumb310x430', 310),
+                                ('thumb428x624', 428), ('thumb364x428', 364))
+        ]
+        item['photo'].update({
+            'id': item_id * 10, 'image_no': 1, 'width': 800, 'height': 1066,
+            'dominant_color': '#8C8676', 'dominant_color_opaque': '#E8E6E3',
+            'url': f"https://images.vinted.net/f800/{item_id}.jpg", 'is_main': True,
+            'thumbnails': thumbnails, 'high_resolution': {'id': str(item_id), 'timestamp': 1700000000,
+                                                          'orientation': None},
+            'is_suspicious': False, 'is_hidden': False, 'extra': {},
+        })
+        item['user'].update({
+            'id': rng.randint(1, 10 ** 8), 'business': False,
+            'profile_url': f"https://www.vinted.fr/member/{item['user']['login']}",
+            'photo': {'url': f"https://images.vinted.net/u/{item_id}.jpg", 'width': 100, 'height': 100},
+        })
+        item.update({
+            'is_visible': True, 'discount': None, 'currency': 'EUR', 'url': f"https://www.vinted.fr/items/{item_id}",
+            'promoted': False, 'favourite_count': rng.randint(0, 40), 'is_favourite': False,
+            'view_count': rng.randint(0, 500), 'content_source': 'search',
+            'service_fee': {'amount': '0.70', 'currency_code': 'EUR'},
+            'total_item_price': {'amount': item['price'], 'currency_code': 'EUR'},
+            'search_tracking_params': {'score': rng.random(), 'matched_queries': []},
+        })
+        items.append(item)
+
+    return json.dumps({'items': items, 'pagination': {'current_page': 1, 'per_page': count}}).encode()
+
+
+def strip_timestamps(items):
+    return [{k: v for k, v in item.to_dict().items() if k != 'posted_at'} for item in items]
+
+
+async def bench_batch_scoring(count: int = 10000, history: int = 20000):
+    print(f"\nBatch scoring ({count} items, model trained on {history} listings)")
+
+    for scraper_class in (VintedScraper, AdvancedVintedScraper):
+        scraper = scraper_class(market_model=MarketPriceModel(seed=1))
+        scraper._observe(make_catalog_items(history, seed=3))
+        raw_items = make_catalog_items(count)
+
+        started = time.perf_counter()
+        per_item = []
+        for raw in raw_items:
+            item = scraper._process_item(raw)
+            if item and scraper.deal_filter.accepts(item):
+                per_item.append(item)
+        per_item_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = scraper.batch_scorer.score(raw_items)
+        batch_time = time.perf_counter() - started
+
+        identical = strip_timestamps(per_item) == strip_timestamps(batch)
+        print(f"   {scraper_class.__name__}")
+        print(f"      per-item loop: {per_item_time * 1000:8.1f} ms  ({count / per_item_time:,.0f} items/s)")
+        print(f"      batch scorer:  {batch_time * 1000:8.1f} ms  ({count / batch_time:,.0f} items/s), "
+              f"{per_item_time / batch_time:.1f}x")
+        print(f"      deals: {len(batch)} ({len(batch) / count:.1%}), identical results: {identical}")
+
+        await scraper.close()
+
+
+def bench_market_model(count: int = 100000, lookups: int = 20000):
+    print(f"\nMarket price model ({count} observed listings)")
+    scraper = AdvancedVintedScraper(market_model=MarketPriceModel(seed=1))
+    model = scraper.market_model
+    raw_items = make_catalog_items(count, seed=7)
+
+    started = time.perf_counter()
+    scraper._observe(raw_items)
+    observe_time = time.perf_counter() - started
+
+    queries = raw_items[:lookups]
+    # First lookups build each bucket's cumulative weights, later ones reuse them
+    for raw in queries:
+        scraper._market_estimate(raw, float(raw['price']), scraper.pricing.matcher.match(raw['title'], raw['brand_title']))
+    matches = [scraper.pricing.matcher.match(raw['title'], raw['brand_title']) for raw in queries]
+    started = time.perf_counter()
+    estimates = [scraper._market_estimate(raw, float(raw['price']), match) for raw, match in zip(queries, matches)]
+    lookup_time = time.perf_counter() - started
+
+    stats = model.stats()
+    sizes = sorted(sketch.memory_bytes() for sketch in model.sketches.values())
+    hit_rate = sum(1 for estimate in estimates if estimate) / len(estimates)
+    print(f"   observe:  {observe_time / count * 1e6:8.2f} us/listing ({stats['buckets']} buckets)")
+    print(f"   lookup:   {lookup_time / lookups * 1e6:8.2f} us/item, {hit_rate:.0%} answered by the model")
+    print(f"   memory:   {stats['memory_bytes'] / 1024:8.1f} KB total, "
+          f"median {sizes[len(sizes) // 2]} B, max {sizes[-1]} B per bucket")
+
+
+def bench_catalog_decoding(pages: int = 200, per_page: int = 50):
+    print(f"\nCatalog page decoding ({pages} pages of {per_page} items)")
+    bodies = [make_catalog_page(per_page, seed=page) for page in range(pages)]
+    print(f"   page size: {sum(map(len, bodies)) / pages / 1024:.1f} KB of JSON")
+
+    def stdlib(body):
+        return json.loads(body)
+
+    def fast_lean(body):
+        return catalog_decoder.decode_catalog_page(body)
+
+    backend = 'msgspec structs' if catalog_decoder.msgspec else 'orjson + lean' if catalog_decoder.orjson else 'json + lean'
+    paths = [('json, full dicts', stdlib), (backend, fast_lean)]
+
+    for name, decode in paths:
+        # Both paths end with the fields process_item reads, so the comparison includes extraction
+        elapsed = float('inf')
+        for _ in range(3):
+            started = time.perf_counter()
+            for body in bodies:
+                for item in decode(body)['items']:
+                    (item['id'], item['title'], item['price'], item.get('brand_title'), item.get('size_title'),
+                     item.get('status'), (item.get('photo') or {}).get('full_size_url'),
+                     (item.get('user') or {}).get('login'))
+            elapsed = min(elapsed, time.perf_counter() - started)
+
+        tracemalloc.start()
+        page = decode(bodies[0])
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del page
+
+        print(f"   {name:<17} {elapsed / pages * 1e6:8.1f} us/page, "
+              f"peak {peak / 1024:6.1f} KB, retained {retained / 1024:6.1f} KB per page")
+
+
+def bench_item_memory(count: int = 50000):
+    print(f"\nScored item memory ({count} items)")
+    scraper = AdvancedVintedScraper(market_model=MarketPriceModel())
+    raw_items = make_catalog_items(count)
+    matches = [scraper.pricing.matcher.match(raw['title'], raw['brand_title']) for raw in raw_items]
+
+    for name, build in (('dict', lambda item: item.to_dict()), ('Item', lambda item: item)):
+        tracemalloc.start()
+        items = [build(scraper._build_item(raw, float(raw['price']), match)) for raw, match in zip(raw_items, matches)]
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"   {name:<5} {retained / count:8.0f} B/item")
+        del items
+
+
+async def main():
+    print("=" * 60)
+    print("BENCHMARK - Vinted bot hot paths")
+    print("=" * 60)
+
+    await bench_batch_scoring(10000)
+    await bench_batch_scoring(50000)
+    bench_market_model(100000)
+    bench_catalog_decoding()
+    bench_item_memory()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
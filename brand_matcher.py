@@ -0,0 +1,141 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_KEYWORDS = [
+    ('shoes', ['shoe', 'sneaker', 'chaussure', 'baskets', 'boots']),
+    ('bags', ['bag', 'sac', 'backpack', 'purse']),
+    ('outerwear', ['jacket', 'coat', 'hoodie', 'blouson', 'manteau']),
+    ('tops', ['shirt', 't-shirt', 'tee', 'chemise']),
+    ('bottoms', ['pants', 'jeans', 'trousers', 'pantalon']),
+    ('accessories', ['watch', 'montre']),
+]
+
+
+def tiered_table(tiers: List[Tuple[List[str], Any]]) -> List[Tuple[str, Any]]:
+    """Flatten [(patterns, value), ...] into an ordered (pattern, value) table"""
+    return [(pattern, value) for patterns, value in tiers for pattern in patterns]
+
+
+def trie_pattern(words) -> str:
+    """
+    A regex alternation of words factored into a trie: at each position the
+    engine follows the one branch for the next character instead of trying
+    every word, and a word is only accepted when no longer word continues it,
+    so the longest word at a position wins like with length-sorted alternatives
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Matches many substring tables against an item in a single regex scan.
+
+    Each table is an ordered list of (pattern, value); like a chain of
+    `any(p in text for p in ...)` checks, the earliest matching entry wins.
+    Tables are scoped to the 'title', the 'brand' or 'any' field.
+    """
+
+    def __init__(self, tables: Dict[str, List[Tuple[str, Any]]], scopes: Optional[Dict[str, str]] = None):
+        self.tables = list(tables)
+        self.scopes = {name: (scopes or {}).get(name, 'any') for name in tables}
+
+        entries = {}
+        for name, table in tables.items():
+            for priority, (pattern, value) in enumerate(table):
+                entries.setdefault(pattern.lower(), []).append((name, priority, value))
+
+        # At any position the regex reports only the longest pattern, so each
+        # pattern carries the entries of every shorter pattern that is its prefix
+        self._hits = {
+            pattern: [entry for other, other_entries in entries.items()
+                      if pattern.startswith(other) for entry in other_entries]
+            for pattern in entries
+        }
+
+        # The same hits with the scopes applied, for match_many
+        self._field_hits = {
+            field: {
+                pattern: [(name, priority, value) for name, priority, value in hits
+                          if self.scopes[name] in ('any', field)]
+                for pattern, hits in self._hits.items()
+            }
+            for field in ('brand', 'title')
+        }
+
+        self._regex = re.compile('(?=(' + trie_pattern(entries) + '))')
+
+    def match(self, title: str = '', brand: str = '') -> Dict[str, Any]:
+        """Return {table: value of the best match or None} for one item"""
+        brand = (brand or '').lower()
+        text = f"{brand}\n{(title or '').lower()}"
+        boundary = len(brand)
+
+        best = {}
+        for m in self._regex.finditer(text):
+            field = 'brand' if m.start() < boundary else 'title'
+            for name, priority, value in self._hits[m.group(1)]:
+                scope = self.scopes[name]
+                if scope != 'any' and scope != field:
+                    continue
+                current = best.get(name)
+                if current is None or priority < current[0]:
+                    best[name] = (priority, value)
+
+        return {name: best[name][1] if name in best else None for name in self.tables}
+
+    def match_many(self, titles: List[str], brands: List[str]) -> Dict[str, List[Any]]:
+        """
+        match() for a whole page in one regex scan over the joined texts;
+        returns one list of values per table, in item order
+        """
+        parts, starts, boundaries = [], [], []
+        offset = 0
+        for title, brand in zip(titles, brands):
+            brand = (brand or '').lower()
+            part = f"{brand}\n{(title or '').lower()}"
+            starts.append(offset)
+            boundaries.append(offset + len(brand))
+            parts.append(part)
+            # Patterns never contain the separator, so no match spans two items
+            offset += len(part) + 1
+
+        count = len(parts)
+        values = {name: [None] * count for name in self.tables}
+        priorities = {name: [None] * count for name in self.tables}
+
+        brand_hits, title_hits = self._field_hits['brand'], self._field_hits['title']
+        row = 0
+        next_start = starts[1] if count > 1 else len(parts and parts[0]) + 1
+        boundary = boundaries[0] if count else 0
+        for m in self._regex.finditer('\0'.join(parts)):
+            start = m.start()
+            if start >= next_start:
+                while row + 1 < count and starts[row + 1] <= start:
+                    row += 1
+                next_start = starts[row + 1] if row + 1 < count else start + len(parts[row]) + 1
+                boundary = boundaries[row]
+            hits = brand_hits if start < boundary else title_hits
+            for name, priority, value in hits[m.group(1)]:
+                current = priorities[name][row]
+                if current is None or priority < current:
+                    priorities[name][row] = priority
+                    values[name][row] = value
+
+        return values
@@ -0,0 +1,104 @@
+import json
+import logging
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+
+def loads(body: bytes):
+    """Fastest available JSON decoder: orjson, else the stdlib"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def lean_item(raw: Dict) -> Dict:
+    """
+    The fields the scrapers read from a catalog item, with the defaults they
+    assume; photo and user keep their nesting, so code written against raw
+    items works unchanged
+    """
+    get = raw.get
+    photo = get('photo')
+    user = get('user') or {}
+    return {
+        'id': get('id'),
+        'title': get('title', ''),
+        'price': get('price', '0'),
+        'brand_title': get('brand_title', ''),
+        'size_title': get('size_title', ''),
+        'status': get('status', ''),
+        'promoted': get('promoted', False),
+        'photo': {'full_size_url': photo.get('full_size_url', '')} if photo else None,
+        'user': {'login': user.get('login', 'N/A'),
+                 'average_positive_feedback': user.get('average_positive_feedback', 0)},
+    }
+
+if msgspec is not None:
+    class _Photo(msgspec.Struct):
+        full_size_url: str = ''
+
+    class _User(msgspec.Struct):
+        login: str = 'N/A'
+        average_positive_feedback: float = 0
+
+    class _Item(msgspec.Struct):
+        id: int
+        title: str = ''
+        price: str = '0'
+        brand_title: str = ''
+        size_title: str = ''
+        status: str = ''
+        promoted: bool = False
+        photo: Optional[_Photo] = None
+        user: _User = msgspec.field(default_factory=_User)
+
+    class _Page(msgspec.Struct):
+        items: List[_Item] = []
+
+    # Fields not declared on the structs are skipped by the parser, never materialized
+    _page_decoder = msgspec.json.Decoder(_Page)
+
+
+def decode_catalog_page(body: bytes) -> Dict:
+    """
+    {'items': [lean items]} from a /api/v2/catalog/items response body.
+
+    With msgspec installed the page is parsed straight into typed structs;
+    otherwise it is decoded with orjson (or json) and trimmed with lean_item.
+    Both give items of the same shape.
+    """
+    if msgspec is not None:
+        try:
+            page = _page_decoder.decode(body)
+            return {'items': msgspec.to_builtins(page.items)}
+        except msgspec.ValidationError as e:
+            # An unexpected field type shouldn't cost the page: take the untyped path
+            logger.warning(f"Catalog page didn't match the expected schema ({e}), decoding untyped")
+
+    data = loads(body)
+    return {'items': [lean_item(raw) for raw in data.get('items') or ()]}
+
+
+def decode_item(body: bytes) -> Dict:
+    """
+    {'item': lean item} from an /api/v2/items/<id> response body, {} without
+    an item. The item endpoint may give the price as {'amount': ...}.
+    """
+    raw = loads(body).get('item')
+    if not raw:
+        return {}
+    price = raw.get('price')
+    if isinstance(price, dict):
+        raw = dict(raw, price=price.get('amount', '0'))
+    return {'item': lean_item(raw)}
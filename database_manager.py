@@ -1,11 +1,79 @@
 import os
+import time
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional
 from datetime import datetime, timedelta
 
+from local_store import LocalItemStore
+from price_history import PriceAggregates
+from item import Item
+
 logger = logging.getLogger(__name__)
 
+
+class WriteBuffer:
+    """
+    Collects rows for one table and writes them in a single request once
+    max_size rows are queued or flush_interval seconds have passed
+    """
+
+    def __init__(self, name: str, write_rows: Callable[[List[Dict]], Awaitable[List]], max_size: int = 200,
+                 flush_interval: float = 2.0):
+        self.name = name
+        self.write_rows = write_rows
+        self.max_size = max(1, max_size)
+        self.flush_interval = flush_interval
+        self._rows: List[Dict] = []
+        self._futures: List[asyncio.Future] = []
+        self._timer = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    async def add(self, rows: List[Dict]) -> List:
+        """Queue rows and wait for the flush that writes them; results come back in order"""
+        if not rows:
+            return []
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for row in rows:
+            future = loop.create_future()
+            self._rows.append(row)
+            self._futures.append(future)
+            futures.append(future)
+
+        if len(self._rows) >= self.max_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, lambda: asyncio.ensure_future(self.flush()))
+
+        return list(await asyncio.gather(*futures))
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._rows:
+            rows, futures = self._rows[:self.max_size], self._futures[:self.max_size]
+            del self._rows[:self.max_size]
+            del self._futures[:self.max_size]
+
+            try:
+                results = await self.write_rows(rows)
+            except Exception as e:
+                logger.error(f"Error flushing {len(rows)} row(s) to {self.name}: {e}")
+                results = [None] * len(rows)
+
+            for future, result in zip(futures, results):
+                if not future.done():
+                    future.set_result(result)
+
+
 class DatabaseManager:
     def __init__(self):
         supabase_url = os.getenv('VITE_SUPABASE_URL')
@@ -16,29 +84,291 @@ class DatabaseManager:
 
         self.client: Client = create_client(supabase_url, supabase_key)
 
-    async def add_tracked_item(self, item: Dict) -> Optional[str]:
+        # The supabase client is synchronous: every request runs on this pool so
+        # the event loop driving Telegram and the scrapers never waits on the network
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('DB_MAX_WORKERS', 4)),
+            thread_name_prefix='supabase'
+        )
+        self.timeout = float(os.getenv('DB_TIMEOUT', 10))
+        self.call_stats = {'calls': 0, 'errors': 0, 'timeouts': 0, 'total_time': 0.0, 'max_time': 0.0}
+
+        batch_size = int(os.getenv('DB_BATCH_SIZE', 200))
+        flush_interval = float(os.getenv('DB_FLUSH_INTERVAL', 2))
+        self.tracked_items_buffer = WriteBuffer('tracked_items', self._upsert_tracked_rows,
+                                                batch_size, flush_interval)
+        self.found_items_buffer = WriteBuffer('found_items_log', self._insert_found_rows,
+                                              batch_size, flush_interval)
+        self.broadcasts_buffer = WriteBuffer('channel_broadcasts', self._insert_broadcast_rows,
+                                             batch_size, flush_interval)
+
+        # Local mirror serving the read queries; LOCAL_DB_PATH='' reads from Supabase instead
+        local_path = os.getenv('LOCAL_DB_PATH', 'local_items.sqlite3')
+        self.local: Optional[LocalItemStore] = LocalItemStore(local_path) if local_path else None
+        self.local_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='local-db')
+        self.sync_batch_size = batch_size
+        # Rows younger than this may still be on their way through the write buffers
+        self.sync_grace = flush_interval + self.timeout
+        self._sync_task: Optional[asyncio.Task] = None
+
+        # Rolling per-brand/category price quantiles, warmed up from the local price history
+        self.price_stats = PriceAggregates(window=int(os.getenv('PRICE_STATS_WINDOW', 500)))
+        if self.local is not None:
+            try:
+                self.price_stats.observe(self.local.price_observations(int(os.getenv('PRICE_STATS_WARMUP', 50000))))
+            except Exception as e:
+                logger.error(f"Error loading price history: {e}")
+
+    async def _execute(self, query, timeout: Optional[float] = None):
+        """Run a query builder's execute() on the executor with a per-call timeout"""
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.call_stats['calls'] += 1
+
         try:
-            data = {
-                'vinted_id': str(item['id']),
-                'title': item['title'],
-                'price': float(item['price']),
-                'brand': item.get('brand', ''),
-                'size': item.get('size', ''),
-                'condition': item.get('condition', ''),
-                'url': item['url'],
-                'image_url': item.get('image_url', ''),
-                'estimated_resell_price': float(item.get('market_price', 0)),
-                'profit_margin': float(item.get('profit_potential', 0)),
-                'category': item.get('category', 'other'),
-                'seller_rating': float(item.get('seller_rating', 0)),
-                'posted_at': item.get('posted_at'),
-                'is_available': True
-            }
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.executor, query.execute),
+                timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.call_stats['timeouts'] += 1
+            raise
+        except Exception:
+            self.call_stats['errors'] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.call_stats['total_time'] += elapsed
+            self.call_stats['max_time'] = max(self.call_stats['max_time'], elapsed)
+
+    def get_call_stats(self) -> Dict:
+        calls = self.call_stats['calls']
+        return {
+            'calls': calls,
+            'errors': self.call_stats['errors'],
+            'timeouts': self.call_stats['timeouts'],
+            'avg_ms': round(self.call_stats['total_time'] / calls * 1000, 1) if calls else 0.0,
+            'max_ms': round(self.call_stats['max_time'] * 1000, 1),
+        }
+
+    async def _local(self, method: str, *args):
+        """Run a LocalItemStore method on its own thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.local_executor, getattr(self.local, method), *args)
+
+    async def _mirror_tracked(self, rows: List[Dict]) -> Optional[float]:
+        """Write rows to the local store, returns the time they were written"""
+        if self.local is None:
+            return None
+        try:
+            observations = await self._local('upsert_tracked', rows)
+            self.price_stats.observe(observations)
+            return time.time()
+        except Exception as e:
+            logger.error(f"Error mirroring tracked items locally: {e}")
+            return None
+
+    async def _mirror_found(self, rows: List[Dict]) -> List[int]:
+        if self.local is None:
+            return []
+        try:
+            return await self._local('insert_found', rows)
+        except Exception as e:
+            logger.error(f"Error mirroring found items locally: {e}")
+            return []
+
+    async def _mark_tracked_synced(self, rows: List[Dict], remote_ids: List[Optional[str]],
+                                   written_at: Optional[float]):
+        if written_at is None:
+            return
+        synced = {row['vinted_id']: remote_id for row, remote_id in zip(rows, remote_ids) if remote_id}
+        if synced:
+            await self._local('mark_tracked_synced', synced, written_at)
+
+    async def _mark_found_synced(self, local_ids: List[int], remote_ids: List[Optional[str]]):
+        synced = [local_id for local_id, remote_id in zip(local_ids, remote_ids) if remote_id]
+        if synced:
+            await self._local('mark_found_synced', synced)
+
+    async def _upsert_tracked_rows(self, rows: List[Dict]) -> List[Optional[str]]:
+        # Postgres rejects an upsert that touches the same row twice, keep the latest copy
+        unique_rows = {row['vinted_id']: row for row in rows}
+
+        response = await self._execute(
+            self.client.table('tracked_items').upsert(list(unique_rows.values()), on_conflict='vinted_id')
+        )
+
+        ids = {row['vinted_id']: row['id'] for row in (response.data or [])}
+        logger.info(f"Upserted {len(ids)} tracked item(s)")
+        return [ids.get(row['vinted_id']) for row in rows]
+
+    async def _insert_found_rows(self, rows: List[Dict]) -> List[Optional[str]]:
+        response = await self._execute(self.client.table('found_items_log').insert(rows))
+        data = response.data or []
+        logger.info(f"Logged {len(data)} found item(s)")
+        return [row['id'] for row in data] if len(data) == len(rows) else [None] * len(rows)
+
+    async def _insert_price_rows(self, rows: List[Dict]) -> List[Optional[str]]:
+        response = await self._execute(self.client.table('price_history').insert(rows))
+        data = response.data or []
+        logger.info(f"Recorded {len(data)} price change(s)")
+        return [row['id'] for row in data] if len(data) == len(rows) else [None] * len(rows)
+
+    async def _insert_broadcast_rows(self, rows: List[Dict]) -> List[Optional[str]]:
+        response = await self._execute(self.client.table('channel_broadcasts').insert(rows))
+        data = response.data or []
+        logger.info(f"Logged {len(data)} broadcast(s)")
+        return [row['id'] for row in data] if len(data) == len(rows) else [None] * len(rows)
+
+    async def add_tracked_items_bulk(self, items: List[Item]) -> List[Optional[str]]:
+        """Upsert items on vinted_id through the write buffer, returns tracked ids in order"""
+        try:
+            rows = [item.tracked_row() for item in items]
+            written_at = await self._mirror_tracked(rows)
+            remote_ids = await self.tracked_items_buffer.add(rows)
+            await self._mark_tracked_synced(rows, remote_ids, written_at)
+            return remote_ids
+
+        except Exception as e:
+            logger.error(f"Error adding tracked items: {e}")
+            return [None] * len(items)
+
+    async def record_price_changes(self, items: List[Item]) -> List[Dict]:
+        """
+        Record new prices of re-sighted listings that are already tracked.
+        Changes reach Supabase's price_history through sync_pending.
+        """
+        if self.local is None or not items:
+            return []
+        try:
+            observations = await self._local('record_prices', [item.tracked_row() for item in items])
+            self.price_stats.observe(observations)
+            return observations
+
+        except Exception as e:
+            logger.error(f"Error recording price changes: {e}")
+            return []
 
-            response = self.client.table('tracked_items').insert(data).execute()
+    async def log_found_items_bulk(self, items: List[Item], keyword: str) -> List[Optional[str]]:
+        try:
+            rows = [item.found_row(keyword) for item in items]
+            local_ids = await self._mirror_found(rows)
+            remote_ids = await self.found_items_buffer.add(rows)
+            await self._mark_found_synced(local_ids, remote_ids)
+            return remote_ids
+
+        except Exception as e:
+            logger.error(f"Error logging found items: {e}")
+            return [None] * len(items)
+
+    async def add_broadcasts_bulk(self, broadcasts: List[Dict]) -> List[Optional[str]]:
+        """broadcasts: dicts with item_id (tracked_items id), channel_id and message_id"""
+        try:
+            now = datetime.now().isoformat()
+            rows = [
+                {
+                    'item_id': broadcast['item_id'],
+                    'channel_id': broadcast['channel_id'],
+                    'message_id': broadcast.get('message_id'),
+                    'broadcasted_at': now
+                }
+                for broadcast in broadcasts
+            ]
+            return await self.broadcasts_buffer.add(rows)
+
+        except Exception as e:
+            logger.error(f"Error logging broadcasts: {e}")
+            return [None] * len(broadcasts)
+
+    async def flush(self):
+        for buffer in (self.tracked_items_buffer, self.found_items_buffer, self.broadcasts_buffer):
+            await buffer.flush()
+
+    async def sync_pending(self) -> int:
+        """
+        Push local rows whose Supabase write failed or timed out, and new
+        price changes, in batches. Returns the number of rows synced.
+        """
+        if self.local is None:
+            return 0
+
+        older_than = time.time() - self.sync_grace
+        synced = 0
+
+        try:
+            rows = await self._local('unsynced_tracked', older_than, self.sync_batch_size)
+            if rows:
+                remote_ids = await self._upsert_tracked_rows(rows)
+                await self._mark_tracked_synced(rows, remote_ids, older_than)
+                synced += sum(1 for remote_id in remote_ids if remote_id)
+
+            pending = await self._local('unsynced_found', older_than, self.sync_batch_size)
+            if pending:
+                local_ids = [local_id for local_id, _ in pending]
+                remote_ids = await self._insert_found_rows([row for _, row in pending])
+                await self._mark_found_synced(local_ids, remote_ids)
+                synced += sum(1 for remote_id in remote_ids if remote_id)
+
+            # Price changes go out here only: they need the listing's tracked_items id first
+            changes = await self._local('unsynced_price_changes', older_than, self.sync_batch_size)
+            if changes:
+                remote_ids = await self._insert_price_rows([row for _, row in changes])
+                await self._local('mark_price_changes_synced', [
+                    local_id for (local_id, _), remote_id in zip(changes, remote_ids) if remote_id
+                ])
+                synced += sum(1 for remote_id in remote_ids if remote_id)
+
+        except Exception as e:
+            logger.error(f"Error syncing local rows to Supabase: {e}")
+
+        if synced:
+            logger.info(f"Synced {synced} pending local row(s) to Supabase")
+        return synced
+
+    def start_sync(self, interval: float = 60):
+        if self.local is None or self._sync_task is not None:
+            return
+
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                await self.sync_pending()
+
+        self._sync_task = asyncio.get_running_loop().create_task(run())
+
+    async def get_local_stats(self) -> Optional[Dict]:
+        if self.local is None:
+            return None
+        try:
+            return await self._local('pending_counts')
+        except Exception as e:
+            logger.error(f"Error reading local store stats: {e}")
+            return None
+
+    async def close(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+
+        await self.flush()
+        self.executor.shutdown(wait=False)
+        if self.local is not None:
+            self.local_executor.submit(self.local.close)
+        self.local_executor.shutdown(wait=True)
+
+    async def add_tracked_item(self, item: Item) -> Optional[str]:
+        try:
+            data = item.tracked_row()
+            written_at = await self._mirror_tracked([data])
+
+            response = await self._execute(
+                self.client.table('tracked_items').upsert(data, on_conflict='vinted_id')
+            )
 
             if response.data:
                 item_id = response.data[0]['id']
+                await self._mark_tracked_synced([data], [item_id], written_at)
                 logger.info(f"Item added: {item_id}")
                 return item_id
 
@@ -48,32 +378,29 @@ class DatabaseManager:
             logger.error(f"Error adding tracked item: {e}")
             return None
 
-    async def log_found_item(self, item: Dict, keyword: str):
+    async def log_found_item(self, item: Item, keyword: str):
         try:
-            data = {
-                'vinted_id': str(item['id']),
-                'title': item['title'],
-                'price': float(item['price']),
-                'brand': item.get('brand', ''),
-                'market_price': float(item.get('market_price', 0)),
-                'profit_margin': float(item.get('profit_potential', 0)),
-                'search_keyword': keyword,
-                'found_at': datetime.now().isoformat()
-            }
+            data = item.found_row(keyword)
+            local_ids = await self._mirror_found([data])
 
-            self.client.table('found_items_log').insert(data).execute()
-            logger.info(f"Item logged: {item['title']}")
+            response = await self._execute(self.client.table('found_items_log').insert(data))
+            if response.data:
+                await self._mark_found_synced(local_ids, [response.data[0]['id']])
+            logger.info(f"Item logged: {item.title}")
 
         except Exception as e:
             logger.error(f"Error logging found item: {e}")
 
     async def get_recent_items(self, hours: int = 1, limit: int = 50) -> List[Dict]:
         try:
+            if self.local is not None:
+                return await self._local('recent_items', hours, limit)
+
             since = (datetime.now() - timedelta(hours=hours)).isoformat()
 
-            response = self.client.table('tracked_items').select(
+            response = await self._execute(self.client.table('tracked_items').select(
                 '*'
-            ).gte('discovered_at', since).order('discovered_at', desc=True).limit(limit).execute()
+            ).gte('discovered_at', since).order('discovered_at', desc=True).limit(limit))
 
             return response.data if response.data else []
 
@@ -83,9 +410,12 @@ class DatabaseManager:
 
     async def get_items_by_profit(self, min_profit: float = 15, limit: int = 50) -> List[Dict]:
         try:
-            response = self.client.table('tracked_items').select(
+            if self.local is not None:
+                return await self._local('items_by_profit', min_profit, limit)
+
+            response = await self._execute(self.client.table('tracked_items').select(
                 '*'
-            ).gte('profit_margin', min_profit).order('profit_margin', desc=True).limit(limit).execute()
+            ).gte('profit_margin', min_profit).order('profit_margin', desc=True).limit(limit))
 
             return response.data if response.data else []
 
@@ -94,10 +424,14 @@ class DatabaseManager:
             return []
 
     async def get_items_by_brand(self, brand: str, limit: int = 20) -> List[Dict]:
+        """Items whose brand contains every word of `brand` (FTS5 prefix match on the local mirror)"""
         try:
-            response = self.client.table('tracked_items').select(
+            if self.local is not None:
+                return await self._local('items_by_brand', brand, limit)
+
+            response = await self._execute(self.client.table('tracked_items').select(
                 '*'
-            ).ilike('brand', f'%{brand}%').order('discovered_at', desc=True).limit(limit).execute()
+            ).ilike('brand', f'%{brand}%').order('discovered_at', desc=True).limit(limit))
 
             return response.data if response.data else []
 
@@ -105,6 +439,42 @@ class DatabaseManager:
             logger.error(f"Error getting items by brand: {e}")
             return []
 
+    async def search_items(self, text: str, limit: int = 20) -> List[Dict]:
+        """Full-text search over tracked titles and brands, local mirror only"""
+        if self.local is None:
+            return []
+        try:
+            return await self._local('search', text, limit)
+
+        except Exception as e:
+            logger.error(f"Error searching items: {e}")
+            return []
+
+    async def get_top_brands(self, days: float = 7, limit: int = 10) -> List[Dict]:
+        """Brands by number of tracked items over the last `days`, local mirror only"""
+        if self.local is None:
+            return []
+        try:
+            return await self._local('top_brands', days, limit)
+
+        except Exception as e:
+            logger.error(f"Error getting top brands: {e}")
+            return []
+
+    def get_price_stats(self, dimension: str, key: str) -> Optional[Dict]:
+        """Rolling median/p25/p75/count of prices for a brand or category, None if never seen"""
+        return self.price_stats.get(dimension, key)
+
+    async def get_item_price_history(self, vinted_id: str) -> List[Dict]:
+        if self.local is None:
+            return []
+        try:
+            return await self._local('price_timeline', vinted_id)
+
+        except Exception as e:
+            logger.error(f"Error getting price history: {e}")
+            return []
+
     async def add_broadcast(self, item_id: str, channel_id: int, message_id: int):
         try:
             data = {
@@ -114,7 +484,7 @@ class DatabaseManager:
                 'broadcasted_at': datetime.now().isoformat()
             }
 
-            self.client.table('channel_broadcasts').insert(data).execute()
+            await self._execute(self.client.table('channel_broadcasts').insert(data))
             logger.info(f"Broadcast logged: item {item_id} to channel {channel_id}")
 
         except Exception as e:
@@ -122,9 +492,9 @@ class DatabaseManager:
 
     async def check_item_exists(self, vinted_id: str) -> bool:
         try:
-            response = self.client.table('tracked_items').select(
+            response = await self._execute(self.client.table('tracked_items').select(
                 'id'
-            ).eq('vinted_id', str(vinted_id)).execute()
+            ).eq('vinted_id', str(vinted_id)))
 
             return len(response.data) > 0
 
@@ -132,23 +502,42 @@ class DatabaseManager:
             logger.error(f"Error checking item existence: {e}")
             return False
 
-    async def get_stats(self) -> Dict:
+    async def get_stats(self, top_n: int = 5) -> Dict:
+        """
+        Read totals and per-brand/category/keyword breakdowns from the
+        trigger-maintained item_stats_summary table (see get_item_stats RPC)
+        """
         try:
-            total_items = self.client.table('tracked_items').select('id', count='exact').execute()
-            total_found = self.client.table('found_items_log').select('id', count='exact').execute()
+            response = await self._execute(self.client.rpc('get_item_stats', {'top_n': top_n}))
+            rows = response.data or []
+
+            summary = {'tracked': [], 'found': [], 'brand': [], 'category': [], 'keyword': []}
+            for row in rows:
+                summary.setdefault(row['dimension'], []).append(self._stats_entry(row))
 
-            avg_profit = self.client.table('tracked_items').select('profit_margin').execute()
-            avg_profit_value = 0
-            if avg_profit.data:
-                profits = [item['profit_margin'] for item in avg_profit.data if item['profit_margin']]
-                avg_profit_value = sum(profits) / len(profits) if profits else 0
+            tracked = summary['tracked'][0] if summary['tracked'] else None
+            found = summary['found'][0] if summary['found'] else None
 
             return {
-                'total_tracked': total_items.count if total_items.count else 0,
-                'total_found': total_found.count if total_found.count else 0,
-                'avg_profit': round(avg_profit_value, 2)
+                'total_tracked': tracked['count'] if tracked else 0,
+                'total_found': found['count'] if found else 0,
+                'avg_profit': tracked['avg_profit'] if tracked else 0,
+                'by_brand': summary['brand'],
+                'by_category': summary['category'],
+                'by_keyword': summary['keyword']
             }
 
         except Exception as e:
             logger.error(f"Error getting stats: {e}")
-            return {'total_tracked': 0, 'total_found': 0, 'avg_profit': 0}
+            return {'total_tracked': 0, 'total_found': 0, 'avg_profit': 0,
+                    'by_brand': [], 'by_category': [], 'by_keyword': []}
+
+    @staticmethod
+    def _stats_entry(row: Dict) -> Dict:
+        profit_count = int(row.get('profit_count') or 0)
+        profit_sum = float(row.get('profit_sum') or 0)
+        return {
+            'name': row['key'],
+            'count': int(row.get('item_count') or 0),
+            'avg_profit': round(profit_sum / profit_count, 2) if profit_count else 0
+        }
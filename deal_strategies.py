@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from brand_matcher import KeywordMatcher
+from item import Item
+
+
+class PricingStrategy:
+    """
+    How a listing's market price and resale profit are estimated.
+
+    The market price is the market model's median for the listing's bucket,
+    or until the model has enough data, the asking price times the brand
+    multiplier from `matcher`, with the condition bonus added to the multiplier.
+    Profit is what's left of the market price after fees and shipping.
+    """
+
+    DEFAULT_MULTIPLIER = 2.5
+    RESELL_RATIO = 1.0
+    RESELL_FEES = 0.15
+    SHIPPING_COST = 5
+
+    def __init__(self, matcher: KeywordMatcher):
+        self.matcher = matcher
+
+    def fallback_price(self, match: Dict, price: float) -> float:
+        multiplier = (match['multiplier'] or self.DEFAULT_MULTIPLIER) + (match['condition_bonus'] or 0)
+        return round(price * multiplier, 2)
+
+    def fallback_prices(self, prices: np.ndarray, matches: Dict[str, List]) -> np.ndarray:
+        """fallback_price() over a page, matches as returned by KeywordMatcher.match_many"""
+        multipliers = np.array([m or self.DEFAULT_MULTIPLIER for m in matches['multiplier']], dtype=float)
+        bonuses = np.array([b or 0 for b in matches['condition_bonus']], dtype=float)
+        return np.round(prices * (multipliers + bonuses), 2)
+
+    def market_price(self, match: Dict, price: float, estimate: Optional[Dict] = None) -> float:
+        if estimate is not None:
+            return estimate['median']
+        return self.fallback_price(match, price)
+
+    def discount(self, price: float, market_price: float) -> float:
+        if market_price <= 0:
+            return 0
+        discount = ((market_price - price) / market_price) * 100
+        return round(max(0, discount), 1)
+
+    def profit(self, price: float, market_price: float) -> float:
+        revenue = market_price * self.RESELL_RATIO * (1 - self.RESELL_FEES)
+        return round(max(0, revenue - price - self.SHIPPING_COST), 2)
+
+    def discounts(self, prices: np.ndarray, market_prices: np.ndarray) -> np.ndarray:
+        """discount() over whole arrays"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discounts = np.where(market_prices > 0, (market_prices - prices) / market_prices * 100, 0.0)
+        return np.round(np.maximum(discounts, 0), 1)
+
+    def profits(self, prices: np.ndarray, market_prices: np.ndarray) -> np.ndarray:
+        """profit() over whole arrays"""
+        revenue = market_prices * self.RESELL_RATIO * (1 - self.RESELL_FEES)
+        return np.round(np.maximum(revenue - prices - self.SHIPPING_COST, 0), 2)
+
+
+class ResalePricing(PricingStrategy):
+    """
+    Conservative resale pricing for luxury hunting: the condition bonus is a
+    flat amount on the fallback price, and profit assumes the item resells
+    at 75% of its market price.
+    """
+
+    RESELL_RATIO = 0.75
+    RESELL_FEES = 0.105
+
+    def fallback_price(self, match: Dict, price: float) -> float:
+        multiplier = match['multiplier'] or self.DEFAULT_MULTIPLIER
+        return round(price * multiplier + (match['condition_bonus'] or 0), 2)
+
+    def fallback_prices(self, prices: np.ndarray, matches: Dict[str, List]) -> np.ndarray:
+        multipliers = np.array([m or self.DEFAULT_MULTIPLIER for m in matches['multiplier']], dtype=float)
+        bonuses = np.array([b or 0 for b in matches['condition_bonus']], dtype=float)
+        return np.round(prices * multipliers + bonuses, 2)
+
+
+class DealFilter:
+    """
+    Which priced listings count as deals. With a market model estimate, the
+    asking price must also sit in the cheapest MAX_PERCENTILE of its bucket.
+    """
+
+    MIN_PROFIT = 5
+    MIN_DISCOUNT = 30
+    # Market price must exceed price * MIN_MARKUP; 0 disables the check
+    MIN_MARKUP = 0
+    MAX_PERCENTILE = 25
+
+    def accepts(self, item: Item) -> bool:
+        if item.profit_potential < self.MIN_PROFIT:
+            return False
+
+        if item.discount_percent < self.MIN_DISCOUNT:
+            return False
+
+        if self.MIN_MARKUP and item.market_price <= item.price * self.MIN_MARKUP:
+            return False
+
+        percentile = item.price_percentile
+        if percentile is not None and percentile > self.MAX_PERCENTILE:
+            return False
+
+        return True
+
+    def candidate_mask(self, prices: np.ndarray, market_prices: np.ndarray, discounts: np.ndarray,
+                       profits: np.ndarray, percentiles: np.ndarray, margin: float = 0) -> np.ndarray:
+        """
+        accepts() over whole arrays, loosened by `margin` so rounding
+        differences never drop a listing accepts() would keep.
+        percentiles are NaN where there is no model estimate.
+        """
+        mask = (
+            (profits >= self.MIN_PROFIT - margin)
+            & (discounts >= self.MIN_DISCOUNT - margin)
+            & (np.isnan(percentiles) | (percentiles <= self.MAX_PERCENTILE + margin))
+        )
+        if self.MIN_MARKUP:
+            mask &= market_prices > prices * self.MIN_MARKUP - margin
+        return mask
+
+
+class OpportunityFilter(DealFilter):
+    """Stricter thresholds for resale opportunities"""
+
+    MIN_PROFIT = 10
+    MIN_DISCOUNT = 25
+    MIN_MARKUP = 1.5
@@ -0,0 +1,243 @@
+import os
+import sys
+import math
+import time
+import hashlib
+import sqlite3
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter used as the overflow tier of DedupIndex
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.created_at = time.time()
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def false_positive_rate(self) -> float:
+        """Expected false-positive rate for the number of keys added so far"""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def clear(self):
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+        self.created_at = time.time()
+
+
+class DedupIndex:
+    """
+    Bounded "already sent" index with LRU eviction and time-based expiry.
+
+    Recent keys live in an exact in-memory LRU. Keys evicted for capacity move
+    to an optional Bloom filter. Once that filter is older than the TTL it
+    becomes the previous generation and a fresh one takes over, so an evicted
+    key is remembered for at least one more TTL and at most two.
+    Both tiers can be snapshotted to SQLite and reloaded at startup; a save
+    only writes the keys added since the previous one.
+    """
+
+    def __init__(self, max_entries: int = 50000, ttl_hours: float = 72,
+                 snapshot_path: Optional[str] = None, bloom_capacity: int = 200000,
+                 bloom_error_rate: float = 0.001, autosave_every: int = 100):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_hours * 3600
+        self.snapshot_path = snapshot_path
+        self.autosave_every = autosave_every
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        self.previous_bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        # Keys added since the last save, and whether the Bloom filters changed
+        self._dirty: Dict[str, float] = {}
+        self._bloom_dirty = False
+        self.lookups = 0
+        self.hits = 0
+        self.bloom_hits = 0
+
+    @classmethod
+    def from_env(cls, default_snapshot_path: str) -> 'DedupIndex':
+        return cls(
+            max_entries=int(os.getenv('DEDUP_MAX_ENTRIES', 50000)),
+            ttl_hours=float(os.getenv('DEDUP_TTL_HOURS', 72)),
+            snapshot_path=os.getenv('DEDUP_SNAPSHOT_PATH', default_snapshot_path) or None,
+            bloom_capacity=int(os.getenv('DEDUP_BLOOM_CAPACITY', 200000)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        key = str(key)
+        self.lookups += 1
+        now = time.time()
+
+        seen_at = self._entries.get(key)
+        if seen_at is not None:
+            if now - seen_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            del self._entries[key]
+
+        if self.bloom is not None:
+            self._expire_bloom(now)
+            if key in self.bloom or key in self.previous_bloom:
+                self.hits += 1
+                self.bloom_hits += 1
+                return True
+
+        return False
+
+    def add(self, key):
+        key = str(key)
+        now = time.time()
+        self._entries[key] = now
+        self._entries.move_to_end(key)
+        self._dirty[key] = now
+
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            if self.bloom is not None:
+                self.bloom.add(evicted)
+                self._bloom_dirty = True
+
+        if self.snapshot_path and self.autosave_every and len(self._dirty) >= self.autosave_every:
+            self.save()
+
+    def _expire_bloom(self, now: float):
+        """Rotate the generations: the current filter becomes the previous one and the oldest is reused, cleared"""
+        if now - self.bloom.created_at > self.ttl_seconds:
+            self.previous_bloom, self.bloom = self.bloom, self.previous_bloom
+            self.bloom.clear()
+            self._bloom_dirty = True
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.snapshot_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS dedup_entries (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS dedup_meta (name TEXT PRIMARY KEY, value BLOB)')
+        return conn
+
+    def load(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+
+        try:
+            conn = self._connect()
+            try:
+                cutoff = time.time() - self.ttl_seconds
+                rows = conn.execute(
+                    'SELECT key, seen_at FROM dedup_entries WHERE seen_at >= ? ORDER BY seen_at DESC LIMIT ?',
+                    (cutoff, self.max_entries)
+                ).fetchall()
+
+                self._entries = OrderedDict(reversed(rows))
+
+                if self.bloom is not None:
+                    meta = dict(conn.execute('SELECT name, value FROM dedup_meta').fetchall())
+                    bits = meta.get('bloom_bits')
+                    if bits is not None and len(bits) == len(self.bloom.bits):
+                        self.bloom.bits = bytearray(bits)
+                        self.bloom.count = int(meta.get('bloom_count', 0))
+                        self.bloom.created_at = float(meta.get('bloom_created_at', time.time()))
+                    previous_bits = meta.get('bloom_previous_bits')
+                    if previous_bits is not None and len(previous_bits) == len(self.previous_bloom.bits):
+                        self.previous_bloom.bits = bytearray(previous_bits)
+                        self.previous_bloom.count = int(meta.get('bloom_previous_count', 0))
+            finally:
+                conn.close()
+
+            logger.info(f"Dedup index loaded: {len(self._entries)} entries from {self.snapshot_path}")
+
+        except Exception as e:
+            logger.error(f"Error loading dedup snapshot: {e}")
+
+    def save(self):
+        """
+        Write the keys added since the last save and drop expired rows.
+        Rows evicted for capacity stay until they expire; load() only reads
+        the newest max_entries of them.
+        """
+        if not self.snapshot_path or not (self._dirty or self._bloom_dirty):
+            return
+
+        dirty, self._dirty = self._dirty, {}
+        bloom_dirty, self._bloom_dirty = self._bloom_dirty, False
+
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany('INSERT OR REPLACE INTO dedup_entries (key, seen_at) VALUES (?, ?)',
+                                     dirty.items())
+                    conn.execute('DELETE FROM dedup_entries WHERE seen_at < ?',
+                                 (time.time() - self.ttl_seconds,))
+                    if self.bloom is not None and bloom_dirty:
+                        conn.executemany(
+                            'INSERT OR REPLACE INTO dedup_meta (name, value) VALUES (?, ?)',
+                            [('bloom_bits', bytes(self.bloom.bits)),
+                             ('bloom_count', str(self.bloom.count)),
+                             ('bloom_created_at', str(self.bloom.created_at)),
+                             ('bloom_previous_bits', bytes(self.previous_bloom.bits)),
+                             ('bloom_previous_count', str(self.previous_bloom.count))]
+                        )
+            finally:
+                conn.close()
+
+        except Exception as e:
+            # Keep the unsaved keys for the next attempt
+            dirty.update(self._dirty)
+            self._dirty = dirty
+            self._bloom_dirty = self._bloom_dirty or bloom_dirty
+            logger.error(f"Error saving dedup snapshot: {e}")
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by both tiers"""
+        size = sys.getsizeof(self._entries)
+        for key, seen_at in self._entries.items():
+            size += sys.getsizeof(key) + sys.getsizeof(seen_at)
+        if self.bloom is not None:
+            size += sys.getsizeof(self.bloom.bits) + sys.getsizeof(self.previous_bloom.bits)
+        return size
+
+    def stats(self) -> Dict:
+        bloom = self.bloom is not None
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'bloom_entries': self.bloom.count + self.previous_bloom.count if bloom else 0,
+            'memory_bytes': self.memory_bytes(),
+            # A key is reported seen if either generation matches it
+            'false_positive_rate': 1 - ((1 - self.bloom.false_positive_rate())
+                                        * (1 - self.previous_bloom.false_positive_rate())) if bloom else 0.0,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'bloom_hits': self.bloom_hits,
+        }
@@ -0,0 +1,197 @@
+import time
+import asyncio
+import logging
+import itertools
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_DIRECT = 0
+PRIORITY_ALERT = 5
+PRIORITY_BROADCAST = 10
+
+# Telegram Bot API limits: ~30 messages/s overall, 1/s per private chat,
+# 20/min per group or channel (negative chat ids)
+GLOBAL_RATE = 30
+PRIVATE_CHAT_RATE = 1
+GROUP_CHAT_RATE = 20 / 60
+
+
+class _Delivery:
+    __slots__ = ('chat_id', 'send', 'future', 'enqueued_at', 'attempts')
+
+    def __init__(self, chat_id: int, send: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        self.chat_id = chat_id
+        self.send = send
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class DeliveryQueue:
+    """
+    Outbound Telegram delivery: a priority queue drained by concurrent workers
+    under global and per-chat token buckets.
+
+    Handlers enqueue a zero-argument coroutine factory and get a future for its
+    result back immediately. Lower priority numbers go first; RetryAfter pauses
+    delivery for the time Telegram asks, network errors are retried.
+    """
+
+    def __init__(self, workers: int = 4, max_retries: int = 3):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_RATE)
+        self.chat_buckets: Dict[int, TokenBucket] = {}
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._delayed = 0
+        self._in_flight = 0
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.latencies = deque(maxlen=1000)
+
+    def start(self):
+        if self._tasks:
+            return
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.get_running_loop().create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10):
+        if self._queue is not None and self._tasks:
+            deadline = time.monotonic() + drain_timeout
+            while self.pending() and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            if self.pending():
+                logger.warning(f"Delivery queue stopped with {self.pending()} message(s) pending")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, chat_id: int, send: Callable[[], Awaitable[Any]],
+                priority: int = PRIORITY_DIRECT) -> asyncio.Future:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+
+        future = asyncio.get_running_loop().create_future()
+        self._put(priority, _Delivery(chat_id, send, future))
+        return future
+
+    def _put(self, priority: int, delivery: _Delivery, sequence: Optional[int] = None):
+        if sequence is None:
+            sequence = next(self._sequence)
+        self._queue.put_nowait((priority, sequence, delivery))
+
+    def _put_later(self, delay: float, priority: int, sequence: int, delivery: _Delivery):
+        self._delayed += 1
+
+        def put():
+            self._delayed -= 1
+            self._put(priority, delivery, sequence)
+
+        asyncio.get_running_loop().call_later(delay, put)
+
+    def pending(self) -> int:
+        """Messages queued, waiting for a rate-limit slot or being sent"""
+        if self._queue is None:
+            return 0
+        return self._queue.qsize() + self._delayed + self._in_flight
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = GROUP_CHAT_RATE if chat_id < 0 else PRIVATE_CHAT_RATE
+            bucket = TokenBucket(rate, 1)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _worker(self):
+        while True:
+            priority, sequence, delivery = await self._queue.get()
+            self._in_flight += 1
+            try:
+                await self._deliver(priority, sequence, delivery)
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    async def _deliver(self, priority: int, sequence: int, delivery: _Delivery):
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            self._put_later(pause, priority, sequence, delivery)
+            return
+
+        # A chat without a free slot must not hold a worker that could serve another chat
+        bucket = self._chat_bucket(delivery.chat_id)
+        if not bucket.try_acquire():
+            self._put_later(bucket.time_until_available(), priority, sequence, delivery)
+            return
+
+        await self.global_bucket.acquire()
+        delivery.attempts += 1
+
+        try:
+            result = await delivery.send()
+
+        except RetryAfter as e:
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+            self._paused_until = max(self._paused_until, time.monotonic() + float(retry_after))
+            self.retried += 1
+            logger.warning(f"Telegram flood control, pausing deliveries for {retry_after}s")
+            self._put_later(float(retry_after), priority, sequence, delivery)
+            return
+
+        except BadRequest as e:
+            self._fail(delivery, e)
+            return
+
+        except NetworkError as e:
+            if delivery.attempts <= self.max_retries:
+                self.retried += 1
+                self._put_later(2 ** delivery.attempts, priority, sequence, delivery)
+                return
+            self._fail(delivery, e)
+            return
+
+        except Exception as e:
+            self._fail(delivery, e)
+            return
+
+        self.sent += 1
+        self.latencies.append(time.monotonic() - delivery.enqueued_at)
+        if not delivery.future.done():
+            delivery.future.set_result(result)
+
+    def _fail(self, delivery: _Delivery, error: Exception):
+        self.failed += 1
+        logger.error(f"Error delivering message to {delivery.chat_id}: {error}")
+        if not delivery.future.done():
+            delivery.future.set_exception(error)
+            # Nobody has to await the future of a fire-and-forget message
+            delivery.future.exception()
+
+    def stats(self) -> Dict:
+        latencies = sorted(self.latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+
+        return {
+            'depth': self.pending(),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'avg_latency_s': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            'p95_latency_s': round(p95, 2),
+        }
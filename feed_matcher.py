@@ -0,0 +1,88 @@
+import re
+import logging
+import unicodedata
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from item import Item
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:[&\'-][a-z0-9]+)*')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-free word tokens: 'Sac Hermès Kelly' -> ['sac', 'hermes', 'kelly']"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def parse_feeds(spec: str) -> List[Tuple[int, int]]:
+    """'0-20,20-50,50-200' -> [(0, 20), (20, 50), (50, 200)]"""
+    feeds = []
+    for band in spec.split(','):
+        band = band.strip()
+        if not band:
+            continue
+        low, _, high = band.partition('-')
+        feeds.append((int(low), int(high)))
+    return feeds
+
+
+class SubscriptionMatcher:
+    """
+    Matches catalog items against every subscribed keyword at once.
+
+    A keyword matches when all of its tokens appear in the item's title or
+    brand, in any order, like Vinted's own search. Each keyword is filed under
+    its rarest-looking token (the longest), so an item only verifies the
+    keywords anchored on one of its own tokens: the cost depends on the item's
+    length and the number of distinct keywords sharing its words, not on how
+    many chats subscribe.
+
+    Built from a SubscriptionStore; rebuilt lazily when keywords are added or
+    removed. Price caps are read from the store's index, so /setprice needs no rebuild.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._anchors: Dict[str, List[Tuple[str, FrozenSet[str]]]] = {}
+        self._version: Optional[int] = None
+
+    def _refresh(self):
+        if self._version == self.store.version:
+            return
+
+        anchors = {}
+        for keyword in self.store.index:
+            tokens = frozenset(tokenize(keyword))
+            if not tokens:
+                continue
+            anchor = max(tokens, key=lambda token: (len(token), token))
+            anchors.setdefault(anchor, []).append((keyword, tokens))
+
+        self._anchors = anchors
+        self._version = self.store.version
+        logger.info(f"Subscription matcher built: {len(self.store.index)} keyword(s), {len(anchors)} anchor(s)")
+
+    def match_keywords(self, item: Item) -> List[str]:
+        self._refresh()
+
+        tokens = set(tokenize(f"{item.title} {item.brand}"))
+        matched = []
+        for token in tokens:
+            for keyword, keyword_tokens in self._anchors.get(token, ()):
+                if keyword_tokens <= tokens:
+                    matched.append(keyword)
+        return matched
+
+    def match(self, item: Item) -> Dict[int, List[str]]:
+        """{chat_id: matched keywords} for the subscribers whose price cap the item fits"""
+        recipients: Dict[int, List[str]] = {}
+        price = item.price
+
+        for keyword in self.match_keywords(item):
+            for chat_id, max_price in self.store.index.get(keyword, {}).items():
+                if price <= max_price:
+                    recipients.setdefault(chat_id, []).append(keyword)
+
+        return recipients
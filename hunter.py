@@ -0,0 +1,246 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from item import Item
+
+logger = logging.getLogger(__name__)
+
+STOPPED = 'stopped'
+RUNNING = 'running'
+PAUSED = 'paused'
+
+
+class Sweep:
+    """One keyword polled by the hunter, with its own schedule and yield history"""
+
+    __slots__ = ('keyword', 'group', 'max_price', 'interval', 'next_run', 'hit_rate',
+                 'runs', 'hits', 'found', 'errors', 'last_run', 'durations')
+
+    def __init__(self, keyword: str, group: str, max_price: float, interval: float):
+        self.keyword = keyword
+        self.group = group
+        self.max_price = max_price
+        self.interval = interval
+        self.next_run = 0.0
+        # Exponentially weighted share of recent runs that found something
+        self.hit_rate = 0.5
+        self.runs = 0
+        self.hits = 0
+        self.found = 0
+        self.errors = 0
+        self.last_run = None
+        self.durations = deque(maxlen=50)
+
+    def stats(self) -> Dict:
+        durations = sorted(self.durations)
+        return {
+            'keyword': self.keyword,
+            'group': self.group,
+            'interval_s': round(self.interval),
+            'hit_rate': round(self.hit_rate * 100, 1),
+            'runs': self.runs,
+            'hits': self.hits,
+            'found': self.found,
+            'errors': self.errors,
+            'avg_duration_s': round(sum(durations) / len(durations), 2) if durations else 0.0,
+            'p95_duration_s': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 2)
+            if durations else 0.0,
+        }
+
+
+class BackgroundHunter:
+    """
+    Continuous incremental polling of keyword sweeps in a supervised task.
+
+    Each sweep is scheduled on its own interval, derived from its recent hit
+    rate: a keyword that keeps producing opportunities moves towards
+    min_interval, one that keeps coming back empty drifts to max_interval.
+    When several sweeps are due, the most productive go first, at most
+    batch_size per round. New opportunities are handed to on_results; a crash
+    in the loop is logged and the loop restarted with backoff.
+    """
+
+    def __init__(self, scraper, on_results: Callable[[Sweep, List[Item]], Awaitable[None]],
+                 min_interval: float = 60, max_interval: float = 1800, batch_size: int = 5,
+                 smoothing: float = 0.3):
+        self.scraper = scraper
+        self.on_results = on_results
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.batch_size = max(1, batch_size)
+        self.smoothing = smoothing
+        self.sweeps: Dict[str, Sweep] = {}
+
+        self.rounds = 0
+        self.restarts = 0
+        self.started_at = None
+        self._task: Optional[asyncio.Task] = None
+        self._resumed = asyncio.Event()
+        self._wake = asyncio.Event()
+
+    def add_sweeps(self, group: str, keywords: Iterable[str], max_price: float):
+        """Keywords already scheduled by an earlier group keep their settings"""
+        for keyword in keywords:
+            keyword = ' '.join(keyword.lower().split())
+            if keyword and keyword not in self.sweeps:
+                self.sweeps[keyword] = Sweep(keyword, group, max_price, self._interval_for(0.5))
+
+    @property
+    def state(self) -> str:
+        if self._task is None or self._task.done():
+            return STOPPED
+        return RUNNING if self._resumed.is_set() else PAUSED
+
+    def start(self) -> bool:
+        """Start, or resume when paused. False if it was already running."""
+        if self.state == RUNNING:
+            return False
+
+        self._resumed.set()
+        self._wake.set()
+        if self.state == STOPPED:
+            self.started_at = time.time()
+            self._task = asyncio.get_running_loop().create_task(self._supervise())
+            logger.info(f"Hunter started with {len(self.sweeps)} sweep(s)")
+        else:
+            logger.info("Hunter resumed")
+        return True
+
+    def pause(self) -> bool:
+        """The round in progress finishes; no new one starts until start()"""
+        if self.state != RUNNING:
+            return False
+        self._resumed.clear()
+        logger.info("Hunter paused")
+        return True
+
+    async def stop(self) -> bool:
+        if self._task is None:
+            return False
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._resumed.clear()
+        logger.info("Hunter stopped")
+        return True
+
+    async def _supervise(self):
+        failures = 0
+        rounds = self.rounds
+        while True:
+            try:
+                await self._run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Backoff grows only while crashes come without a completed round in between
+                failures = failures + 1 if self.rounds == rounds else 1
+                rounds = self.rounds
+                self.restarts += 1
+                delay = min(300, 5 * 2 ** (failures - 1))
+                logger.error(f"Hunter loop crashed ({e}), restarting in {delay}s")
+                await asyncio.sleep(delay)
+            else:
+                return
+
+    async def _run(self):
+        while True:
+            await self._resumed.wait()
+
+            due = self._due(time.monotonic())
+            if not due:
+                await self._sleep_until_next()
+                continue
+
+            await self._run_round(due)
+            self.rounds += 1
+
+    def _due(self, now: float) -> List[Sweep]:
+        due = [sweep for sweep in self.sweeps.values() if sweep.next_run <= now]
+        due.sort(key=lambda sweep: (-sweep.hit_rate, sweep.next_run))
+        return due[:self.batch_size]
+
+    async def _sleep_until_next(self):
+        if self.sweeps:
+            delay = max(0.0, min(sweep.next_run for sweep in self.sweeps.values()) - time.monotonic())
+        else:
+            delay = self.max_interval
+
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_round(self, due: List[Sweep]):
+        # One concurrent scraper call per price cap, each keyword reported as soon as it is scored
+        by_price: Dict[float, List[Sweep]] = {}
+        for sweep in due:
+            by_price.setdefault(sweep.max_price, []).append(sweep)
+
+        await asyncio.gather(*(self._run_sweeps(sweeps, max_price) for max_price, sweeps in by_price.items()))
+
+    async def _run_sweeps(self, sweeps: List[Sweep], max_price: float):
+        pending = {sweep.keyword: sweep for sweep in sweeps}
+        started = time.monotonic()
+
+        results = self.scraper.iter_specific_keywords(list(pending), max_price, incremental=True)
+        try:
+            async for keyword, items in results:
+                sweep = pending.pop(keyword, None)
+                if sweep is None:
+                    continue
+                self._record(sweep, len(items), time.monotonic() - started)
+                if items:
+                    await self._deliver(sweep, items)
+        except Exception as e:
+            logger.error(f"Hunter sweep at {max_price}€ failed: {e}")
+        finally:
+            await results.aclose()
+
+        # Searches that raised never yield a result; they wait for their next slot like empty ones
+        for sweep in pending.values():
+            sweep.errors += 1
+            self._record(sweep, 0, time.monotonic() - started)
+
+    def _record(self, sweep: Sweep, found: int, duration: float):
+        now = time.monotonic()
+        sweep.runs += 1
+        sweep.found += found
+        sweep.hits += 1 if found else 0
+        sweep.last_run = time.time()
+        sweep.durations.append(duration)
+        sweep.hit_rate += self.smoothing * ((1.0 if found else 0.0) - sweep.hit_rate)
+        sweep.interval = self._interval_for(sweep.hit_rate)
+        sweep.next_run = now + sweep.interval
+
+    def _interval_for(self, hit_rate: float) -> float:
+        """Geometric interpolation: max_interval at a 0% hit rate, min_interval at 100%"""
+        return self.max_interval * (self.min_interval / self.max_interval) ** hit_rate
+
+    async def _deliver(self, sweep: Sweep, items: List[Item]):
+        try:
+            await self.on_results(sweep, items)
+        except Exception as e:
+            logger.error(f"Error handling hunter results for '{sweep.keyword}': {e}")
+
+    def stats(self, top: int = 5) -> Dict:
+        sweeps = sorted(self.sweeps.values(), key=lambda sweep: (-sweep.hit_rate, -sweep.found))
+        return {
+            'state': self.state,
+            'sweeps': len(self.sweeps),
+            'rounds': self.rounds,
+            'restarts': self.restarts,
+            'runs': sum(sweep.runs for sweep in self.sweeps.values()),
+            'found': sum(sweep.found for sweep in self.sweeps.values()),
+            'uptime_s': round(time.time() - self.started_at) if self.started_at and self.state != STOPPED else 0,
+            'top': [sweep.stats() for sweep in sweeps[:top]],
+        }
+
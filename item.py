@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class Item:
+    """
+    A scored catalog listing, as produced by both scrapers and passed to the
+    analyzers, the database layer and the bots.
+
+    One attribute per field and no per-instance dict, so a large sweep holds a
+    fraction of the memory of dict items, and every module reads the same
+    names. Database column names live in tracked_row/found_row only.
+    """
+
+    __slots__ = ('id', 'title', 'price', 'url', 'brand', 'size', 'condition', 'category', 'seller',
+                 'seller_rating', 'image_url', 'market_price', 'discount_percent', 'profit_potential',
+                 'price_percentile', 'posted_at', 'keywords')
+
+    def __init__(self, id, title: str, price: float, url: str, brand: str = '', size: str = '',
+                 condition: str = '', category: str = 'other', seller: str = 'N/A', seller_rating: float = 0,
+                 image_url: str = '', market_price: float = 0, discount_percent: float = 0,
+                 profit_potential: float = 0, price_percentile: Optional[float] = None,
+                 posted_at: Optional[str] = None, keywords: Optional[List[str]] = None):
+        self.id = id
+        self.title = title
+        self.price = price
+        self.url = url
+        self.brand = brand
+        self.size = size
+        self.condition = condition
+        self.category = category
+        self.seller = seller
+        self.seller_rating = seller_rating
+        self.image_url = image_url
+        self.market_price = market_price
+        self.discount_percent = discount_percent
+        self.profit_potential = profit_potential
+        self.price_percentile = price_percentile
+        self.posted_at = posted_at
+        # Search keywords that returned this listing, filled in by TopKMerger
+        self.keywords = keywords if keywords is not None else []
+
+    def __repr__(self) -> str:
+        return f"Item(id={self.id!r}, title={self.title!r}, price={self.price!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Item):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def tracked_row(self) -> Dict:
+        """Row for the tracked_items table"""
+        return {
+            'vinted_id': str(self.id),
+            'title': self.title,
+            'price': float(self.price),
+            'brand': self.brand,
+            'size': self.size,
+            'condition': self.condition,
+            'url': self.url,
+            'image_url': self.image_url,
+            'estimated_resell_price': float(self.market_price),
+            'profit_margin': float(self.profit_potential),
+            'category': self.category,
+            'seller_rating': float(self.seller_rating or 0),
+            'posted_at': self.posted_at,
+            'is_available': True
+        }
+
+    def found_row(self, keyword: str) -> Dict:
+        """Row for the found_items_log table"""
+        return {
+            'vinted_id': str(self.id),
+            'title': self.title,
+            'price': float(self.price),
+            'brand': self.brand,
+            'market_price': float(self.market_price),
+            'profit_margin': float(self.profit_potential),
+            'search_keyword': keyword,
+            'found_at': datetime.now().isoformat()
+        }
@@ -0,0 +1,416 @@
+import time
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRACKED_COLUMNS = (
+    'vinted_id', 'title', 'price', 'brand', 'size', 'condition', 'url', 'image_url',
+    'estimated_resell_price', 'profit_margin', 'category', 'seller_rating', 'posted_at', 'is_available'
+)
+FOUND_COLUMNS = (
+    'vinted_id', 'title', 'price', 'brand', 'market_price', 'profit_margin', 'search_keyword', 'found_at'
+)
+PRICE_COLUMNS = (
+    'vinted_id', 'brand', 'category', 'price', 'previous_price', 'market_price', 'resell_estimate', 'recorded_at'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracked_items (
+    local_id INTEGER PRIMARY KEY,
+    vinted_id TEXT NOT NULL UNIQUE,
+    remote_id TEXT,
+    title TEXT NOT NULL,
+    price REAL NOT NULL,
+    brand TEXT DEFAULT '',
+    size TEXT DEFAULT '',
+    condition TEXT DEFAULT '',
+    url TEXT,
+    image_url TEXT,
+    estimated_resell_price REAL DEFAULT 0,
+    profit_margin REAL DEFAULT 0,
+    category TEXT DEFAULT 'other',
+    seller_rating REAL DEFAULT 0,
+    posted_at TEXT,
+    is_available INTEGER DEFAULT 1,
+    discovered_at TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_local_tracked_discovered ON tracked_items(discovered_at);
+CREATE INDEX IF NOT EXISTS idx_local_tracked_profit ON tracked_items(profit_margin);
+CREATE INDEX IF NOT EXISTS idx_local_tracked_brand ON tracked_items(brand COLLATE NOCASE, discovered_at);
+CREATE INDEX IF NOT EXISTS idx_local_tracked_unsynced ON tracked_items(synced, updated_at) WHERE synced = 0;
+
+CREATE TABLE IF NOT EXISTS found_items_log (
+    local_id INTEGER PRIMARY KEY,
+    vinted_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    price REAL NOT NULL,
+    brand TEXT,
+    market_price REAL,
+    profit_margin REAL,
+    search_keyword TEXT,
+    found_at TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_local_found_at ON found_items_log(found_at);
+CREATE INDEX IF NOT EXISTS idx_local_found_unsynced ON found_items_log(synced, updated_at) WHERE synced = 0;
+
+CREATE TABLE IF NOT EXISTS price_history (
+    local_id INTEGER PRIMARY KEY,
+    vinted_id TEXT NOT NULL,
+    brand TEXT,
+    category TEXT,
+    price REAL NOT NULL,
+    previous_price REAL,
+    market_price REAL,
+    resell_estimate REAL,
+    recorded_at TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_local_price_history_item ON price_history(vinted_id, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_local_price_history_unsynced ON price_history(synced, updated_at) WHERE synced = 0;
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tracked_items_fts USING fts5(
+    title, brand, content='tracked_items', content_rowid='local_id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS tracked_items_fts_insert AFTER INSERT ON tracked_items BEGIN
+    INSERT INTO tracked_items_fts(rowid, title, brand) VALUES (new.local_id, new.title, new.brand);
+END;
+CREATE TRIGGER IF NOT EXISTS tracked_items_fts_delete AFTER DELETE ON tracked_items BEGIN
+    INSERT INTO tracked_items_fts(tracked_items_fts, rowid, title, brand) VALUES ('delete', old.local_id, old.title, old.brand);
+END;
+CREATE TRIGGER IF NOT EXISTS tracked_items_fts_update AFTER UPDATE OF title, brand ON tracked_items BEGIN
+    INSERT INTO tracked_items_fts(tracked_items_fts, rowid, title, brand) VALUES ('delete', old.local_id, old.title, old.brand);
+    INSERT INTO tracked_items_fts(rowid, title, brand) VALUES (new.local_id, new.title, new.brand);
+END;
+"""
+
+ITEM_FIELDS = (
+    "remote_id AS id, vinted_id, title, price, brand, size, condition, url, image_url, "
+    "estimated_resell_price, profit_margin, category, seller_rating, posted_at, is_available, discovered_at"
+)
+
+
+def fts_query(text: str) -> str:
+    """Every word of text as a quoted prefix term, so user input can't inject FTS5 syntax"""
+    terms = [word.replace('"', '""') for word in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms if term)
+
+
+class LocalItemStore:
+    """
+    Embedded SQLite mirror of tracked_items, found_items_log and price_history.
+
+    Every write lands here first, so the read-heavy bot queries are served from
+    local indexes (and an FTS5 index on title/brand) in milliseconds whatever
+    the remote is doing. Rows carry a synced flag: the Supabase write marks
+    them synced, and the unsynced_* methods hand back whatever still has to be pushed.
+
+    The connection is not thread-safe on its own: DatabaseManager drives the
+    store from a single-worker executor.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite built without FTS5, brand lookups fall back to LIKE: {e}")
+            self.fts = False
+
+    def close(self):
+        self.conn.close()
+
+    def upsert_tracked(self, rows: Iterable[Dict]) -> List[Dict]:
+        """
+        Upsert tracked_items rows. Returns a price observation for every listing
+        seen for the first time or whose price changed, also appended to price_history.
+        First sightings are already in Supabase's tracked_items, so only price
+        changes are left pending for the remote price_history table.
+        """
+        rows = list(rows)
+        now = time.time()
+        discovered_at = datetime.now().isoformat()
+        values = [
+            tuple(row.get(column) for column in TRACKED_COLUMNS) + (discovered_at, now)
+            for row in rows
+        ]
+        updates = ', '.join(f"{column} = excluded.{column}" for column in TRACKED_COLUMNS[1:])
+
+        with self.conn:
+            known = self._known_prices([row['vinted_id'] for row in rows])
+            observations = self._price_changes(rows, known, discovered_at)
+
+            self.conn.executemany(
+                f"INSERT INTO tracked_items ({', '.join(TRACKED_COLUMNS)}, discovered_at, updated_at) "
+                f"VALUES ({', '.join('?' * (len(TRACKED_COLUMNS) + 2))}) "
+                f"ON CONFLICT(vinted_id) DO UPDATE SET {updates}, updated_at = excluded.updated_at, synced = 0",
+                values
+            )
+            self._insert_observations(observations, now)
+
+        return observations
+
+    def record_prices(self, rows: Iterable[Dict]) -> List[Dict]:
+        """
+        Re-sightings of listings: tracked_items rows whose listing is already
+        tracked at a different price get the new price and pricing fields, and a
+        price_history observation pending for the remote. Listings that aren't
+        tracked yet are ignored, they are added by upsert_tracked when recorded.
+        """
+        rows = list(rows)
+        now = time.time()
+        recorded_at = datetime.now().isoformat()
+
+        with self.conn:
+            known = self._known_prices([row['vinted_id'] for row in rows])
+            observations = self._price_changes(
+                [row for row in rows if row['vinted_id'] in known], known, recorded_at
+            )
+            if not observations:
+                return []
+
+            changed = {observation['vinted_id'] for observation in observations}
+            self.conn.executemany(
+                'UPDATE tracked_items SET price = ?, estimated_resell_price = ?, profit_margin = ?, '
+                'is_available = 1, updated_at = ?, synced = 0 WHERE vinted_id = ?',
+                [
+                    (float(row['price']), row.get('estimated_resell_price') or 0,
+                     row.get('profit_margin') or 0, now, row['vinted_id'])
+                    for row in rows if row['vinted_id'] in changed
+                ]
+            )
+            self._insert_observations(observations, now)
+
+        return observations
+
+    @staticmethod
+    def _price_changes(rows: List[Dict], known: Dict[str, float], recorded_at: str) -> List[Dict]:
+        """Price observations for rows first seen or priced differently from `known`, which is updated"""
+        observations = []
+        for row in rows:
+            price = float(row['price'])
+            previous_price = known.get(row['vinted_id'])
+            if previous_price is not None and previous_price == price:
+                continue
+            known[row['vinted_id']] = price
+            observations.append({
+                'vinted_id': row['vinted_id'],
+                'brand': row.get('brand') or '',
+                'category': row.get('category') or 'other',
+                'price': price,
+                'previous_price': previous_price,
+                'market_price': row.get('estimated_resell_price') or 0,
+                'resell_estimate': round(price + (row.get('profit_margin') or 0), 2),
+                'recorded_at': recorded_at,
+            })
+        return observations
+
+    def _insert_observations(self, observations: List[Dict], now: float):
+        self.conn.executemany(
+            f"INSERT INTO price_history ({', '.join(PRICE_COLUMNS)}, updated_at, synced) "
+            f"VALUES ({', '.join('?' * (len(PRICE_COLUMNS) + 2))})",
+            [
+                tuple(observation[column] for column in PRICE_COLUMNS)
+                + (now, 1 if observation['previous_price'] is None else 0)
+                for observation in observations
+            ]
+        )
+
+    def _known_prices(self, vinted_ids: List[str]) -> Dict[str, float]:
+        known = {}
+        for start in range(0, len(vinted_ids), 500):
+            chunk = vinted_ids[start:start + 500]
+            known.update(self.conn.execute(
+                f"SELECT vinted_id, price FROM tracked_items WHERE vinted_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+        return known
+
+    def insert_found(self, rows: Iterable[Dict]) -> List[int]:
+        now = time.time()
+        local_ids = []
+        with self.conn:
+            for row in rows:
+                cursor = self.conn.execute(
+                    f"INSERT INTO found_items_log ({', '.join(FOUND_COLUMNS)}, updated_at) "
+                    f"VALUES ({', '.join('?' * (len(FOUND_COLUMNS) + 1))})",
+                    tuple(row.get(column) for column in FOUND_COLUMNS) + (now,)
+                )
+                local_ids.append(cursor.lastrowid)
+        return local_ids
+
+    def mark_tracked_synced(self, remote_ids: Dict[str, str], synced_before: float):
+        """remote_ids: vinted_id -> tracked_items id in Supabase. Rows changed since synced_before stay pending."""
+        with self.conn:
+            self.conn.executemany(
+                'UPDATE tracked_items SET remote_id = ?, synced = 1 WHERE vinted_id = ? AND updated_at <= ?',
+                [(remote_id, vinted_id, synced_before) for vinted_id, remote_id in remote_ids.items()]
+            )
+
+    def mark_found_synced(self, local_ids: Iterable[int]):
+        with self.conn:
+            self.conn.executemany('UPDATE found_items_log SET synced = 1 WHERE local_id = ?',
+                                  [(local_id,) for local_id in local_ids])
+
+    def unsynced_tracked(self, older_than: float, limit: int) -> List[Dict]:
+        rows = self.conn.execute(
+            f"SELECT {', '.join(TRACKED_COLUMNS)} FROM tracked_items "
+            f"WHERE synced = 0 AND updated_at <= ? ORDER BY updated_at LIMIT ?",
+            (older_than, limit)
+        ).fetchall()
+        return [self._tracked_row(row) for row in rows]
+
+    def unsynced_found(self, older_than: float, limit: int) -> List[Tuple[int, Dict]]:
+        rows = self.conn.execute(
+            f"SELECT local_id, {', '.join(FOUND_COLUMNS)} FROM found_items_log "
+            f"WHERE synced = 0 AND updated_at <= ? ORDER BY updated_at LIMIT ?",
+            (older_than, limit)
+        ).fetchall()
+        return [(row['local_id'], {column: row[column] for column in FOUND_COLUMNS}) for row in rows]
+
+    def unsynced_price_changes(self, older_than: float, limit: int) -> List[Tuple[int, Dict]]:
+        """Price changes not in Supabase yet whose listing already has a remote id"""
+        rows = self.conn.execute(
+            "SELECT p.local_id, t.remote_id, p.vinted_id, p.price, p.previous_price, p.market_price, "
+            "p.resell_estimate, p.recorded_at FROM price_history p "
+            "JOIN tracked_items t ON t.vinted_id = p.vinted_id "
+            "WHERE p.synced = 0 AND p.updated_at <= ? AND t.remote_id IS NOT NULL "
+            "ORDER BY p.updated_at LIMIT ?",
+            (older_than, limit)
+        ).fetchall()
+        return [
+            (row['local_id'], {
+                'item_id': row['remote_id'],
+                'vinted_id': row['vinted_id'],
+                'price': row['price'],
+                'previous_price': row['previous_price'],
+                'market_price': row['market_price'],
+                'resell_estimate': row['resell_estimate'],
+                'recorded_at': row['recorded_at'],
+            })
+            for row in rows
+        ]
+
+    def mark_price_changes_synced(self, local_ids: Iterable[int]):
+        with self.conn:
+            self.conn.executemany('UPDATE price_history SET synced = 1 WHERE local_id = ?',
+                                  [(local_id,) for local_id in local_ids])
+
+    def price_observations(self, limit: int) -> List[Dict]:
+        """The latest `limit` observations, oldest first, to warm up PriceAggregates"""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(PRICE_COLUMNS)} FROM price_history ORDER BY local_id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def price_timeline(self, vinted_id: str) -> List[Dict]:
+        return [dict(row) for row in self.conn.execute(
+            'SELECT price, previous_price, recorded_at FROM price_history WHERE vinted_id = ? ORDER BY recorded_at',
+            (str(vinted_id),)
+        )]
+
+    @staticmethod
+    def _tracked_row(row: sqlite3.Row) -> Dict:
+        data = {column: row[column] for column in TRACKED_COLUMNS}
+        data['is_available'] = bool(data['is_available'])
+        return data
+
+    def _items(self, query: str, params: tuple) -> List[Dict]:
+        items = []
+        for row in self.conn.execute(query, params):
+            item = dict(row)
+            item['is_available'] = bool(item['is_available'])
+            items.append(item)
+        return items
+
+    def recent_items(self, hours: float = 1, limit: int = 50) -> List[Dict]:
+        since = (datetime.now() - timedelta(hours=hours)).isoformat()
+        return self._items(
+            f"SELECT {ITEM_FIELDS} FROM tracked_items WHERE discovered_at >= ? ORDER BY discovered_at DESC LIMIT ?",
+            (since, limit)
+        )
+
+    def items_by_profit(self, min_profit: float = 15, limit: int = 50) -> List[Dict]:
+        return self._items(
+            f"SELECT {ITEM_FIELDS} FROM tracked_items WHERE profit_margin >= ? ORDER BY profit_margin DESC LIMIT ?",
+            (min_profit, limit)
+        )
+
+    def items_by_brand(self, brand: str, limit: int = 20) -> List[Dict]:
+        if self.fts:
+            query = fts_query(brand)
+            if not query:
+                return []
+            return self._items(
+                f"SELECT {ITEM_FIELDS} FROM tracked_items WHERE local_id IN "
+                f"(SELECT rowid FROM tracked_items_fts WHERE tracked_items_fts MATCH ?) "
+                f"ORDER BY discovered_at DESC LIMIT ?",
+                (f"brand : ({query})", limit)
+            )
+
+        return self._items(
+            f"SELECT {ITEM_FIELDS} FROM tracked_items WHERE brand LIKE ? ORDER BY discovered_at DESC LIMIT ?",
+            (f"%{brand}%", limit)
+        )
+
+    def search(self, text: str, limit: int = 20) -> List[Dict]:
+        """Full-text search over title and brand, best match first"""
+        if not self.fts:
+            pattern = f"%{text}%"
+            return self._items(
+                f"SELECT {ITEM_FIELDS} FROM tracked_items WHERE title LIKE ? OR brand LIKE ? "
+                f"ORDER BY discovered_at DESC LIMIT ?",
+                (pattern, pattern, limit)
+            )
+
+        query = fts_query(text)
+        if not query:
+            return []
+        return self._items(
+            f"SELECT {', '.join('t.' + field.strip() for field in ITEM_FIELDS.split(','))} "
+            f"FROM tracked_items_fts f JOIN tracked_items t ON t.local_id = f.rowid "
+            f"WHERE tracked_items_fts MATCH ? ORDER BY f.rank LIMIT ?",
+            (query, limit)
+        )
+
+    def top_brands(self, days: float = 7, limit: int = 10) -> List[Dict]:
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        rows = self.conn.execute(
+            "SELECT brand, COUNT(*) AS count, AVG(profit_margin) AS avg_profit, MAX(profit_margin) AS max_profit "
+            "FROM tracked_items WHERE discovered_at >= ? AND brand != '' "
+            "GROUP BY brand COLLATE NOCASE ORDER BY count DESC, avg_profit DESC LIMIT ?",
+            (since, limit)
+        ).fetchall()
+        return [
+            {
+                'name': row['brand'],
+                'count': row['count'],
+                'avg_profit': round(row['avg_profit'] or 0, 2),
+                'max_profit': round(row['max_profit'] or 0, 2),
+            }
+            for row in rows
+        ]
+
+    def pending_counts(self) -> Dict:
+        tracked = self.conn.execute('SELECT COUNT(*) FROM tracked_items WHERE synced = 0').fetchone()[0]
+        found = self.conn.execute('SELECT COUNT(*) FROM found_items_log WHERE synced = 0').fetchone()[0]
+        prices = self.conn.execute('SELECT COUNT(*) FROM price_history WHERE synced = 0').fetchone()[0]
+        total = self.conn.execute('SELECT COUNT(*) FROM tracked_items').fetchone()[0]
+        return {'items': total, 'pending_tracked': tracked, 'pending_found': found, 'pending_prices': prices}
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a fixed sleep.
+
+    Anything running synchronously on the loop (blocking I/O, heavy CPU work)
+    shows up directly as lag, so this is the signal that the loop stays free.
+    """
+
+    def __init__(self, interval: float = 0.1, warn_threshold: float = 0.25, window: int = 600):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.samples = deque(maxlen=window)
+        self.max_lag = 0.0
+        self.warnings = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+            if lag > self.warn_threshold:
+                self.warnings += 1
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+    def stats(self) -> Dict:
+        if not self.samples:
+            return {'samples': 0, 'avg_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0, 'warnings': 0}
+
+        ordered = sorted(self.samples)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+        return {
+            'samples': len(ordered),
+            'avg_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+            'p99_ms': round(p99 * 1000, 2),
+            'max_ms': round(self.max_lag * 1000, 2),
+            'warnings': self.warnings,
+        }
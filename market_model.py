@@ -0,0 +1,371 @@
+import os
+import math
+import time
+import bisect
+import random
+import sqlite3
+import logging
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Finest bucket first; each level drops the least informative remaining field.
+# There is no coarser level than the brand: a category or the whole market
+# mixes listings from 5€ to 500€, so its median is no estimate of any listing
+# and the pricing strategy's fallback price is used instead
+BUCKET_LEVELS = (
+    ('brand', 'category', 'condition', 'size'),
+    ('brand', 'category', 'condition'),
+    ('brand', 'category'),
+    ('brand',),
+)
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty 2016): a stack of compactors
+    where level h holds items of weight 2**h. A full level is sorted and every
+    other item is promoted, so memory stays O(k) for any stream length while
+    rank errors stay around 1/k.
+    """
+
+    __slots__ = ('k', 'c', 'levels', 'count', 'size', 'max_size', 'rng', '_cdf')
+
+    def __init__(self, k: int = 128, c: float = 2 / 3, rng: Optional[random.Random] = None):
+        self.k = k
+        self.c = c
+        self.levels: List[List[float]] = []
+        self.count = 0
+        self.size = 0
+        self.max_size = 0
+        self.rng = rng or random
+        self._cdf = None
+        self._grow()
+
+    def _grow(self):
+        self.levels.append([])
+        self.max_size = sum(self._capacity(height) for height in range(len(self.levels)))
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.levels) - height - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def update(self, value: float):
+        self.levels[0].append(value)
+        self.size += 1
+        self.count += 1
+        self._cdf = None
+        if self.size >= self.max_size:
+            self._compress()
+
+    def _compress(self):
+        for height in range(len(self.levels)):
+            level = self.levels[height]
+            if len(level) < self._capacity(height):
+                continue
+
+            if height + 1 >= len(self.levels):
+                self._grow()
+
+            level.sort()
+            offset = self.rng.random() < 0.5
+            # An odd item out stays behind at this level
+            keep = [level.pop()] if len(level) % 2 else []
+            self.levels[height + 1].extend(level[offset::2])
+            self.levels[height] = keep
+
+            self.size = sum(len(items) for items in self.levels)
+            if self.size < self.max_size:
+                break
+
+    def _weighted(self) -> Tuple[List[float], List[float]]:
+        """Sorted values and their cumulative weights, cached until the next update"""
+        if self._cdf is None:
+            pairs = sorted((value, 1 << height) for height, items in enumerate(self.levels) for value in items)
+            values = [value for value, _ in pairs]
+            cumulative = list(accumulate(weight for _, weight in pairs))
+            self._cdf = (values, cumulative)
+        return self._cdf
+
+    def quantile(self, q: float) -> Optional[float]:
+        values, cumulative = self._weighted()
+        if not values:
+            return None
+        target = q * cumulative[-1]
+        return values[min(bisect.bisect_left(cumulative, target), len(values) - 1)]
+
+    def rank(self, value: float) -> float:
+        """Fraction of the stream <= value"""
+        values, cumulative = self._weighted()
+        if not values:
+            return 0.0
+        index = bisect.bisect_right(values, value)
+        return cumulative[index - 1] / cumulative[-1] if index else 0.0
+
+    def ranks(self, values: np.ndarray) -> np.ndarray:
+        """rank() of every value, same floats as one call per value"""
+        points, cumulative = self._weighted()
+        if not points:
+            return np.zeros(len(values))
+        cumulative = np.array(cumulative)
+        indices = np.searchsorted(np.array(points), values, side='right')
+        return np.where(indices > 0, cumulative[np.maximum(indices - 1, 0)] / cumulative[-1], 0.0)
+
+    def memory_bytes(self) -> int:
+        return sum(8 * len(items) for items in self.levels) + 8 * len(self.levels) + 32
+
+    def to_bytes(self) -> bytes:
+        header = array('d', [self.k, self.count, len(self.levels)] + [len(items) for items in self.levels])
+        body = array('d', [value for items in self.levels for value in items])
+        return header.tobytes() + body.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, c: float = 2 / 3, rng: Optional[random.Random] = None) -> 'KLLSketch':
+        numbers = array('d')
+        numbers.frombytes(data)
+        k, count, level_count = int(numbers[0]), int(numbers[1]), int(numbers[2])
+
+        sketch = cls(k, c, rng)
+        sketch.levels = []
+        position = 3 + level_count
+        for length in numbers[3:3 + level_count]:
+            sketch.levels.append(list(numbers[position:position + int(length)]))
+            position += int(length)
+
+        sketch.count = count
+        sketch.size = sum(len(items) for items in sketch.levels)
+        sketch.max_size = sum(sketch._capacity(height) for height in range(len(sketch.levels)))
+        return sketch
+
+
+def normalize(value) -> str:
+    return ' '.join(str(value or '').lower().split())
+
+
+class MarketPriceModel:
+    """
+    Market prices learned from the listings the scrapers have seen.
+
+    Every observed listing updates a KLL sketch for each bucket level from
+    (brand, category, condition, size) down to the brand alone.
+    A lookup uses the finest bucket with at least min_count observations;
+    unbranded listings and rare brands get no estimate.
+    Sketches are kept in a SQLite file and reloaded at startup.
+
+    Catalog searches are capped by price_to, so a bucket only reflects the
+    price ranges the bot searches in, not the whole market.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, k: int = 128, min_count: int = 30,
+                 autosave_every: int = 5000, max_seen_ids: int = 100000, seed: Optional[int] = None):
+        self.snapshot_path = snapshot_path
+        self.k = k
+        self.min_count = min_count
+        self.autosave_every = autosave_every
+        self.max_seen_ids = max_seen_ids
+        self.rng = random.Random(seed)
+        self.sketches: Dict[Tuple, KLLSketch] = {}
+        # Repeated searches return the same listings, each one is counted once
+        self._seen_ids: 'OrderedDict[str, None]' = OrderedDict()
+        self._dirty = set()
+        self._pending = 0
+
+        self.observed = 0
+        self.lookups = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, default_snapshot_path: str) -> 'MarketPriceModel':
+        return cls(
+            snapshot_path=os.getenv('MARKET_MODEL_PATH', default_snapshot_path) or None,
+            k=int(os.getenv('MARKET_MODEL_K', 128)),
+            min_count=int(os.getenv('MARKET_MODEL_MIN_COUNT', 30)),
+        )
+
+    @staticmethod
+    def bucket_keys(brand: str = '', category: str = '', condition: str = '', size: str = '') -> List[Tuple]:
+        fields = {
+            'brand': normalize(brand),
+            'category': normalize(category) or 'other',
+            'condition': normalize(condition),
+            'size': normalize(size),
+        }
+        # Unknown fields don't make a bucket, so unbranded items have none
+        return [
+            (level,) + tuple(fields[name] for name in names)
+            for level, names in enumerate(BUCKET_LEVELS)
+            if all(fields[name] for name in names)
+        ]
+
+    def observe(self, price: float, brand: str = '', category: str = '', condition: str = '', size: str = '',
+                item_id=None):
+        if not price or price <= 0:
+            return
+        price = float(price)
+
+        if item_id is not None:
+            item_id = str(item_id)
+            if item_id in self._seen_ids:
+                return
+            self._seen_ids[item_id] = None
+            if len(self._seen_ids) > self.max_seen_ids:
+                self._seen_ids.popitem(last=False)
+
+        for key in self.bucket_keys(brand, category, condition, size):
+            sketch = self.sketches.get(key)
+            if sketch is None:
+                sketch = self.sketches[key] = KLLSketch(self.k, rng=self.rng)
+            sketch.update(price)
+            self._dirty.add(key)
+
+        self.observed += 1
+        self._pending += 1
+        if self.snapshot_path and self.autosave_every and self._pending >= self.autosave_every:
+            self.save()
+
+    def _sketch_for(self, brand: str, category: str, condition: str, size: str) -> Optional[Tuple[Tuple, KLLSketch]]:
+        for key in self.bucket_keys(brand, category, condition, size):
+            sketch = self.sketches.get(key)
+            if sketch is not None and sketch.count >= self.min_count:
+                return key, sketch
+        return None
+
+    def estimate(self, price: float, brand: str = '', category: str = '', condition: str = '',
+                 size: str = '') -> Optional[Dict]:
+        """
+        Median, quartiles and the asking price's percentile in the finest bucket
+        with enough data, or None while the model hasn't seen enough listings
+        """
+        self.lookups += 1
+        found = self._sketch_for(brand, category, condition, size)
+        if found is None:
+            self.misses += 1
+            return None
+
+        key, sketch = found
+        estimate = self._summary(key, sketch)
+        estimate['percentile'] = round(sketch.rank(price) * 100, 1)
+        return estimate
+
+    def estimate_many(self, prices: np.ndarray, buckets: List[Tuple[str, str, str, str]]
+                      ) -> Tuple[List[Optional[Dict]], np.ndarray]:
+        """
+        estimate() for a page of listings, with one bucket lookup and summary
+        per distinct (brand, category, condition, size) and one vectorised
+        rank pass per sketch. Returns each row's shared summary (an estimate
+        without 'percentile', None without enough data) and the unrounded
+        percentiles, NaN where there is no summary.
+        """
+        summaries: List[Optional[Dict]] = [None] * len(buckets)
+        percentiles = np.full(len(buckets), np.nan)
+
+        rows: Dict[Tuple, List[int]] = {}
+        for row, bucket in enumerate(buckets):
+            rows.setdefault(bucket, []).append(row)
+
+        self.lookups += len(buckets)
+        for bucket, indices in rows.items():
+            found = self._sketch_for(*bucket)
+            if found is None:
+                self.misses += len(indices)
+                continue
+
+            summary = self._summary(*found)
+            for row in indices:
+                summaries[row] = summary
+            percentiles[indices] = found[1].ranks(prices[indices]) * 100
+
+        return summaries, percentiles
+
+    @staticmethod
+    def _summary(key: Tuple, sketch: KLLSketch) -> Dict:
+        return {
+            'median': round(sketch.quantile(0.5), 2),
+            'p25': round(sketch.quantile(0.25), 2),
+            'p75': round(sketch.quantile(0.75), 2),
+            'count': sketch.count,
+            'level': len(BUCKET_LEVELS[key[0]]),
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.snapshot_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS market_sketches (bucket TEXT PRIMARY KEY, sketch BLOB NOT NULL, '
+                     'item_count INTEGER NOT NULL, updated_at REAL NOT NULL)')
+        return conn
+
+    def load(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+
+        try:
+            conn = self._connect()
+            try:
+                for bucket, data in conn.execute('SELECT bucket, sketch FROM market_sketches'):
+                    key = tuple(bucket.split('\x1f'))
+                    key = (int(key[0]),) + key[1:]
+                    # Snapshots from before the category and global levels were dropped
+                    if key[0] >= len(BUCKET_LEVELS):
+                        continue
+                    self.sketches[key] = KLLSketch.from_bytes(data, rng=self.rng)
+            finally:
+                conn.close()
+
+            logger.info(f"Market model loaded: {len(self.sketches)} buckets from {self.snapshot_path}")
+
+        except Exception as e:
+            logger.error(f"Error loading market model: {e}")
+
+    def save(self):
+        if not self.snapshot_path or not self._dirty:
+            return
+
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                with conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO market_sketches (bucket, sketch, item_count, updated_at) '
+                        'VALUES (?, ?, ?, ?)',
+                        [
+                            ('\x1f'.join(str(part) for part in key), self.sketches[key].to_bytes(),
+                             self.sketches[key].count, now)
+                            for key in self._dirty
+                        ]
+                    )
+            finally:
+                conn.close()
+            self._dirty.clear()
+            self._pending = 0
+
+        except Exception as e:
+            logger.error(f"Error saving market model: {e}")
+
+    def memory_bytes(self) -> int:
+        return sum(sketch.memory_bytes() for sketch in self.sketches.values())
+
+    def stats(self) -> Dict:
+        return {
+            'buckets': len(self.sketches),
+            'observed': self.observed,
+            'memory_bytes': self.memory_bytes(),
+            'lookups': self.lookups,
+            'misses': self.misses,
+        }
+
+
+_shared_model: Optional[MarketPriceModel] = None
+
+
+def get_shared_model() -> MarketPriceModel:
+    """Model shared by every scraper instance in the process, loaded on first use"""
+    global _shared_model
+    if _shared_model is None:
+        _shared_model = MarketPriceModel.from_env('market_model.sqlite3')
+        _shared_model.load()
+    return _shared_model
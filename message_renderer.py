@@ -0,0 +1,121 @@
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from item import Item
+
+logger = logging.getLogger(__name__)
+
+# Telegram limits, counted in UTF-16 code units
+CAPTION_LIMIT = 1024
+MESSAGE_LIMIT = 4096
+ELLIPSIS = '…'
+
+
+def telegram_length(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _cut(text: str, limit: int) -> str:
+    """Longest prefix of text within limit UTF-16 units, never splitting a surrogate pair"""
+    if telegram_length(text) <= limit:
+        return text
+    prefix = text.encode('utf-16-le')[:limit * 2].decode('utf-16-le', errors='ignore')
+    # Don't leave a dangling zero-width joiner or variation selector of a split emoji
+    return prefix.rstrip('\u200d\ufe0f')
+
+
+def truncate(text: str, limit: int) -> str:
+    """
+    Fit text into a Telegram limit. The body is cut at the first line that
+    overflows, the last line (the listing link) is kept, and an ellipsis marks the cut.
+    """
+    if telegram_length(text) <= limit:
+        return text
+
+    body, separator, last_line = text.rpartition('\n')
+    if separator and telegram_length(last_line) + 2 < limit:
+        budget = limit - telegram_length(last_line) - 2
+        lines = body.split('\n')
+        kept = []
+        used = 0
+        for line in lines:
+            separator_size = 1 if kept else 0
+            size = telegram_length(line) + separator_size
+            if used + size > budget:
+                # Keep the start of the line that overflows, e.g. a very long title
+                partial = _cut(line, max(0, budget - used - separator_size))
+                if partial:
+                    kept.append(partial)
+                break
+            kept.append(line)
+            used += size
+
+        return '\n'.join(kept) + f"{ELLIPSIS}\n" + last_line
+
+    return _cut(text, limit - 1) + ELLIPSIS
+
+
+class Rendered(NamedTuple):
+    text: str
+    caption: str
+    reply_markup: object
+
+
+class MessageRenderer:
+    """
+    Formats each item once per template and reuses the result for every recipient.
+
+    Templates are registered with a text formatter and a keyboard builder. Renders
+    are cached by (template, item id, price) in an LRU bounded by max_entries, so
+    a price change on a listing renders it again.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._templates: Dict[str, Tuple[Callable, Optional[Callable]]] = {}
+        self._cache: 'OrderedDict[Tuple, Rendered]' = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, template: str, format_text: Callable[..., str],
+                 build_keyboard: Optional[Callable[[Item], object]] = None):
+        self._templates[template] = (format_text, build_keyboard)
+
+    def render(self, template: str, item: Item, **fields) -> Rendered:
+        """
+        Rendered text, caption and keyboard for item. Extra fields are passed to
+        the formatter on a cache miss and must be stable for a given item.
+        """
+        key = (template, item.id, item.price)
+
+        rendered = self._cache.get(key)
+        if rendered is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return rendered
+
+        self.misses += 1
+        format_text, build_keyboard = self._templates[template]
+        text = format_text(item, **fields)
+        rendered = Rendered(
+            text=truncate(text, MESSAGE_LIMIT),
+            caption=truncate(text, CAPTION_LIMIT),
+            reply_markup=build_keyboard(item) if build_keyboard else None,
+        )
+
+        self._cache[key] = rendered
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+        return rendered
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0.0,
+        }
@@ -0,0 +1,140 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoCache:
+    """
+    Image URL -> Telegram file_id of the first successful upload, so fan-out
+    sends of the same listing reuse the file Telegram already has instead of
+    making it fetch the Vinted image again. URLs that failed recently are
+    remembered too and skip the photo attempt until failure_ttl has passed.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, failure_ttl: float = 15 * 60, max_entries: int = 10000):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.max_entries = max_entries
+        self._file_ids: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._failures: 'OrderedDict[str, float]' = OrderedDict()
+        self._uploading: Dict[str, asyncio.Event] = {}
+
+        self.hits = 0
+        self.uploads = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def get(self, url: str) -> Optional[str]:
+        entry = self._file_ids.get(url)
+        if entry is None:
+            return None
+
+        file_id, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._file_ids[url]
+            return None
+
+        self._file_ids.move_to_end(url)
+        return file_id
+
+    def failed_recently(self, url: str) -> bool:
+        expires_at = self._failures.get(url)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del self._failures[url]
+            return False
+        return True
+
+    def remember(self, url: str, message) -> None:
+        photos = getattr(message, 'photo', None)
+        if not photos:
+            return
+
+        # Sizes are sorted ascending, the last one is the full resolution
+        self._file_ids[url] = (photos[-1].file_id, time.monotonic() + self.ttl)
+        self._file_ids.move_to_end(url)
+        self._failures.pop(url, None)
+        self._trim(self._file_ids)
+
+    def record_failure(self, url: str) -> None:
+        self._failures[url] = time.monotonic() + self.failure_ttl
+        self._failures.move_to_end(url)
+        self._trim(self._failures)
+
+    def forget(self, url: str) -> None:
+        self._file_ids.pop(url, None)
+
+    def _trim(self, entries: OrderedDict):
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    async def send(self, bot, chat_id, url: str, caption: str, reply_markup=None):
+        """
+        Send url as a photo, through its cached file_id when there is one.
+        Returns the message, or None when the photo can't be sent and the
+        caller should fall back to a text message. RetryAfter is re-raised.
+        """
+        # Concurrent fan-out sends wait for the first upload instead of each
+        # making Telegram fetch the image
+        uploading = self._uploading.get(url)
+        if uploading is not None:
+            await uploading.wait()
+
+        if self.failed_recently(url):
+            self.skipped += 1
+            return None
+
+        file_id = self.get(url)
+        if file_id is not None:
+            try:
+                message = await bot.send_photo(chat_id=chat_id, photo=file_id, caption=caption, reply_markup=reply_markup)
+                self.hits += 1
+                return message
+            except RetryAfter:
+                raise
+            except TelegramError as e:
+                logger.warning(f"Cached file_id rejected for {url}, uploading from URL: {e}")
+                self.forget(url)
+
+        uploading = self._uploading.get(url)
+        if uploading is None:
+            uploading = self._uploading[url] = asyncio.Event()
+        try:
+            message = await bot.send_photo(chat_id=chat_id, photo=url, caption=caption, reply_markup=reply_markup)
+        except RetryAfter:
+            raise
+        except BadRequest as e:
+            # Telegram couldn't fetch or use the image, which won't change for the next chat
+            self.failures += 1
+            self.record_failure(url)
+            logger.warning(f"Photo send failed for {url}: {e}")
+            return None
+        except TelegramError as e:
+            logger.warning(f"Photo send failed for {url}: {e}")
+            return None
+        finally:
+            if self._uploading.get(url) is uploading:
+                del self._uploading[url]
+            uploading.set()
+
+        self.uploads += 1
+        self.remember(url, message)
+        return message
+
+    def stats(self) -> Dict:
+        sends = self.hits + self.uploads
+        return {
+            'cached': len(self._file_ids),
+            'failed_urls': len(self._failures),
+            'hits': self.hits,
+            'uploads': self.uploads,
+            'skipped': self.skipped,
+            'hit_rate': round(self.hits / sends * 100, 1) if sends else 0.0,
+        }
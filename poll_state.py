@@ -0,0 +1,64 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordWatermarks:
+    """
+    Per-keyword high-water marks for newest_first catalog polling.
+
+    Vinted item ids grow over time, so the newest id already processed for a
+    query is enough to tell new listings from ones scored on a previous poll.
+    """
+
+    def __init__(self, max_pages: int = 5):
+        self.max_pages = max(1, max_pages)
+        self._marks: Dict[Tuple[str, int], int] = {}
+
+    @staticmethod
+    def key(keyword: str, max_price: float) -> Tuple[str, int]:
+        return (' '.join(keyword.lower().split()), int(max_price))
+
+    def get(self, key: Tuple[str, int]) -> Optional[int]:
+        return self._marks.get(key)
+
+    def advance(self, key: Tuple[str, int], items: List[Dict]):
+        ids = [self._item_id(item) for item in items]
+        ids = [item_id for item_id in ids if item_id is not None]
+        if not ids:
+            return
+
+        newest = max(ids)
+        if newest > self._marks.get(key, -1):
+            self._marks[key] = newest
+
+    def split_new(self, items: List[Dict], mark: Optional[int]) -> Tuple[List[Dict], bool]:
+        """
+        Return the items newer than mark and whether a known item was reached.
+
+        Promoted listings are pinned above newer ones, so they never end the scan.
+        """
+        if mark is None:
+            return items, False
+
+        new_items = []
+        for item in items:
+            item_id = self._item_id(item)
+            if item_id is not None and item_id <= mark:
+                if item.get('promoted'):
+                    continue
+                return new_items, True
+            new_items.append(item)
+
+        return new_items, False
+
+    def forget(self, key: Tuple[str, int]):
+        self._marks.pop(key, None)
+
+    @staticmethod
+    def _item_id(item: Dict) -> Optional[int]:
+        try:
+            return int(item.get('id'))
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,116 @@
+import bisect
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ('brand', 'category')
+
+
+class RollingQuantiles:
+    """
+    The last `window` prices of one brand or category, kept both in arrival
+    order (to evict the oldest) and sorted (so quantiles are an index lookup)
+    """
+
+    __slots__ = ('window', 'arrivals', 'sorted_prices', 'total', 'first_price', 'first_seen',
+                 'latest_price', 'latest_seen', 'observations')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.arrivals = deque()
+        self.sorted_prices: List[float] = []
+        self.total = 0.0
+        self.first_price = None
+        self.first_seen = None
+        self.latest_price = None
+        self.latest_seen = None
+        self.observations = 0
+
+    def add(self, price: float, timestamp: str):
+        self.arrivals.append(price)
+        bisect.insort(self.sorted_prices, price)
+        self.total += price
+        self.observations += 1
+
+        if len(self.arrivals) > self.window:
+            evicted = self.arrivals.popleft()
+            del self.sorted_prices[bisect.bisect_left(self.sorted_prices, evicted)]
+            self.total -= evicted
+
+        if self.first_seen is None:
+            self.first_price, self.first_seen = price, timestamp
+        self.latest_price, self.latest_seen = price, timestamp
+
+    def quantile(self, q: float) -> float:
+        """Linear interpolation between closest ranks, like numpy's default"""
+        prices = self.sorted_prices
+        position = (len(prices) - 1) * q
+        lower = int(position)
+        upper = min(lower + 1, len(prices) - 1)
+        return prices[lower] + (prices[upper] - prices[lower]) * (position - lower)
+
+    def summary(self) -> Dict:
+        count = len(self.sorted_prices)
+        return {
+            'count': count,
+            'observations': self.observations,
+            'median': round(self.quantile(0.5), 2),
+            'p25': round(self.quantile(0.25), 2),
+            'p75': round(self.quantile(0.75), 2),
+            'average_price': round(self.total / count, 2),
+            'first_seen_price': self.first_price,
+            'first_seen': self.first_seen,
+            'latest_price': self.latest_price,
+            'latest_seen': self.latest_seen,
+            'trend': 'up' if self.latest_price > self.first_price else 'down',
+        }
+
+
+class PriceAggregates:
+    """
+    Rolling price statistics per brand and per category, updated one
+    observation at a time. Reads return a precomputed window, so a brand's
+    median/p25/p75 cost a few index lookups however many items were seen.
+
+    Observations are the dicts LocalItemStore.upsert_tracked and
+    record_prices return: every first sighting of a listing plus every later
+    price change.
+    """
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._stats: Dict[str, Dict[str, RollingQuantiles]] = {dimension: {} for dimension in DIMENSIONS}
+        self._summaries: Dict[str, Dict[str, Dict]] = {dimension: {} for dimension in DIMENSIONS}
+
+    def observe(self, observations: Iterable[Dict]):
+        for observation in observations:
+            price = observation.get('price')
+            if price is None:
+                continue
+
+            for dimension in DIMENSIONS:
+                key = (observation.get(dimension) or 'unknown').lower()
+                stats = self._stats[dimension].get(key)
+                if stats is None:
+                    stats = self._stats[dimension][key] = RollingQuantiles(self.window)
+                stats.add(float(price), observation.get('recorded_at'))
+                # Summaries are rebuilt lazily on the next read
+                self._summaries[dimension].pop(key, None)
+
+    def get(self, dimension: str, key: str) -> Optional[Dict]:
+        key = (key or 'unknown').lower()
+        summary = self._summaries[dimension].get(key)
+        if summary is None:
+            stats = self._stats[dimension].get(key)
+            if stats is None:
+                return None
+            summary = self._summaries[dimension][key] = stats.summary()
+        return summary
+
+    def keys(self, dimension: str) -> List[str]:
+        return list(self._stats[dimension])
+
+    def __len__(self) -> int:
+        return sum(len(stats) for stats in self._stats.values())
@@ -1,9 +1,88 @@
 import logging
-from typing import Dict, List, Tuple
-from datetime import datetime
+import heapq
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from brand_matcher import KeywordMatcher
+from price_history import PriceAggregates
+from item import Item
 
 logger = logging.getLogger(__name__)
 
+
+class PricingMatrix:
+    """
+    Item x platform pricing for a batch of items, as returned by
+    PriceSyncAnalyzer.analyze_batch. Rows follow the input order, columns
+    follow `platforms`.
+    """
+
+    def __init__(self, items: List[Item], platforms: List[str], purchase_prices: np.ndarray,
+                 market_prices: np.ndarray, resell_prices: np.ndarray, net_revenues: np.ndarray,
+                 profits: np.ndarray, shipping_cost: float):
+        self.items = items
+        self.platforms = platforms
+        self.purchase_prices = purchase_prices
+        self.market_prices = market_prices
+        self.resell_prices = resell_prices
+        self.net_revenues = net_revenues
+        self.profits = profits
+        self.shipping_cost = shipping_cost
+
+        # argmax keeps the first platform on ties, like the strict '>' in analyze_item_price
+        self.best_indices = np.argmax(profits, axis=1) if len(items) else np.zeros(0, dtype=int)
+        best = profits[np.arange(len(items)), self.best_indices] if len(items) else np.zeros(0)
+        self.has_best = best > 0
+        self.best_profits = np.where(self.has_best, best, 0.0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.roi = np.where(purchase_prices > 0, self.best_profits / purchase_prices * 100, 0.0)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def best_platform(self, index: int) -> Optional[str]:
+        return self.platforms[self.best_indices[index]] if self.has_best[index] else None
+
+    def rank(self, by: str = 'profit', limit: Optional[int] = None) -> List[int]:
+        """Row indices sorted by best profit or ROI, highest first"""
+        if by not in ('profit', 'roi'):
+            raise ValueError(f"Unknown ranking key: {by}")
+
+        keys = self.best_profits if by == 'profit' else self.roi
+        order = np.argsort(-keys, kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        return order.tolist()
+
+    def ranked_items(self, by: str = 'profit', limit: Optional[int] = None) -> List[Item]:
+        return [self.items[index] for index in self.rank(by, limit)]
+
+    def recommendation(self, index: int) -> Dict:
+        """Same dict as PriceSyncAnalyzer.analyze_item_price for row `index`"""
+        item = self.items[index]
+
+        recommendations = {
+            'item_id': item.id,
+            'item_title': item.title,
+            'current_vinted_price': float(self.purchase_prices[index]),
+            'estimated_market_price': round(float(self.market_prices[index]), 2),
+            'platforms': {},
+            'best_platform': self.best_platform(index),
+            'best_profit': float(self.best_profits[index]),
+            'shipping_cost': self.shipping_cost
+        }
+
+        for column, platform in enumerate(self.platforms):
+            recommendations['platforms'][platform] = {
+                'resell_price': round(float(self.resell_prices[index, column]), 2),
+                'net_revenue': round(float(self.net_revenues[index, column]), 2),
+                'profit': round(max(0, float(self.profits[index, column])), 2),
+                'fee_rate': PriceSyncAnalyzer.PLATFORM_FEES[platform] * 100,
+                'margin_multiplier': PriceSyncAnalyzer.PLATFORM_MARGINS.get(platform, 1.0)
+            }
+
+        return recommendations
+
 class PriceSyncAnalyzer:
     """
     Analyzes market prices and suggests resale prices across multiple platforms
@@ -24,25 +103,26 @@ class PriceSyncAnalyzer:
     }
 
     @staticmethod
-    def analyze_item_price(item: Dict) -> Dict:
+    def analyze_item_price(item: Item) -> Dict:
         """
         Analyze item and provide comprehensive pricing recommendations
         """
-        vinted_price = float(item['price'])
-        market_price = float(item.get('market_price', vinted_price * 2.5))
-        brand = item.get('brand', '').lower()
-        condition = item.get('condition', 'bon').lower()
-        category = item.get('category', 'other')
-
-        condition_factor = PriceSyncAnalyzer._get_condition_factor(condition)
+        vinted_price = float(item.price)
+        market_price = float(item.market_price or vinted_price * 2.5)
+        brand = item.brand.lower()
+        condition = (item.condition or 'bon').lower()
+        category = item.category
+
+        match = PriceSyncAnalyzer.MATCHER.match(title=condition, brand=brand)
+        condition_factor = match['condition_factor'] if match['condition_factor'] is not None else 0.65
         category_multiplier = PriceSyncAnalyzer._get_category_multiplier(category)
-        brand_multiplier = PriceSyncAnalyzer._get_brand_multiplier(brand)
+        brand_multiplier = match['brand_multiplier'] if match['brand_multiplier'] is not None else 1.0
 
         adjusted_market_price = market_price * condition_factor * category_multiplier
 
         recommendations = {
-            'item_id': item['id'],
-            'item_title': item['title'],
+            'item_id': item.id,
+            'item_title': item.title,
             'current_vinted_price': vinted_price,
             'estimated_market_price': round(adjusted_market_price, 2),
             'platforms': {},
@@ -73,24 +153,92 @@ class PriceSyncAnalyzer:
 
         return recommendations
 
+    CONDITION_FACTORS = {
+        'neuf': 1.0,
+        'new': 1.0,
+        'excellent': 0.85,
+        'tres bon': 0.75,
+        'bon': 0.65,
+        'acceptable': 0.5,
+        'used': 0.55,
+    }
+
+    ULTRA_LUXURY_MULTIPLIERS = {
+        'louis vuitton': 1.3,
+        'gucci': 1.25,
+        'prada': 1.25,
+        'chanel': 1.3,
+        'dior': 1.2,
+        'hermes': 1.4,
+        'fendi': 1.15,
+        'balenciaga': 1.15,
+        'yves saint laurent': 1.1,
+        'valentino': 1.1,
+        'givenchy': 1.05
+    }
+
+    LUXURY_MULTIPLIERS = {
+        'burberry': 1.05,
+        'coach': 0.95,
+        'michael kors': 0.9,
+        'versace': 1.05,
+        'dolce gabbana': 1.0
+    }
+
+    PREMIUM_MULTIPLIERS = {
+        'nike': 1.0,
+        'adidas': 0.95,
+        'jordan': 1.05,
+        'supreme': 1.2,
+        'off-white': 1.15
+    }
+
+    MATCHER = KeywordMatcher(
+        {
+            'condition_factor': list(CONDITION_FACTORS.items()),
+            'brand_multiplier': (list(ULTRA_LUXURY_MULTIPLIERS.items())
+                                 + list(LUXURY_MULTIPLIERS.items())
+                                 + list(PREMIUM_MULTIPLIERS.items())),
+        },
+        scopes={'condition_factor': 'title', 'brand_multiplier': 'brand'}
+    )
+
     @staticmethod
-    def _get_condition_factor(condition: str) -> float:
-        """Get price multiplier based on condition"""
-        condition_map = {
-            'neuf': 1.0,
-            'new': 1.0,
-            'excellent': 0.85,
-            'tres bon': 0.75,
-            'bon': 0.65,
-            'acceptable': 0.5,
-            'used': 0.55,
-        }
+    def analyze_batch(items: List[Item]) -> PricingMatrix:
+        """
+        Price many items on every platform at once, see PricingMatrix
+        """
+        platforms = list(PriceSyncAnalyzer.PLATFORM_FEES)
+        shipping_cost = 5
+
+        purchase_prices = np.empty(len(items))
+        market_prices = np.empty(len(items))
+        for row, item in enumerate(items):
+            vinted_price = float(item.price)
+            market_price = float(item.market_price or vinted_price * 2.5)
+            condition = (item.condition or 'bon').lower()
+
+            condition_factor = PriceSyncAnalyzer._get_condition_factor(condition)
+            category_multiplier = PriceSyncAnalyzer._get_category_multiplier(item.category)
+
+            purchase_prices[row] = vinted_price
+            market_prices[row] = market_price * condition_factor * category_multiplier
 
-        for key, factor in condition_map.items():
-            if key in condition.lower():
-                return factor
+        margins = np.array([PriceSyncAnalyzer.PLATFORM_MARGINS.get(p, 1.0) for p in platforms])
+        fees = np.array([PriceSyncAnalyzer.PLATFORM_FEES[p] for p in platforms])
 
-        return 0.65
+        resell_prices = market_prices[:, None] * margins[None, :]
+        net_revenues = resell_prices * (1 - fees)[None, :]
+        profits = net_revenues - purchase_prices[:, None] - shipping_cost
+
+        return PricingMatrix(items, platforms, purchase_prices, market_prices, resell_prices,
+                             net_revenues, profits, shipping_cost)
+
+    @staticmethod
+    def _get_condition_factor(condition: str) -> float:
+        """Get price multiplier based on condition"""
+        factor = PriceSyncAnalyzer.MATCHER.match(title=condition)['condition_factor']
+        return factor if factor is not None else 0.65
 
     @staticmethod
     def _get_category_multiplier(category: str) -> float:
@@ -111,84 +259,21 @@ class PriceSyncAnalyzer:
     @staticmethod
     def _get_brand_multiplier(brand: str) -> float:
         """Get multiplier based on brand prestige"""
-        ultra_luxury = {
-            'louis vuitton': 1.3,
-            'gucci': 1.25,
-            'prada': 1.25,
-            'chanel': 1.3,
-            'dior': 1.2,
-            'hermes': 1.4,
-            'fendi': 1.15,
-            'balenciaga': 1.15,
-            'yves saint laurent': 1.1,
-            'valentino': 1.1,
-            'givenchy': 1.05
-        }
-
-        luxury = {
-            'burberry': 1.05,
-            'coach': 0.95,
-            'michael kors': 0.9,
-            'versace': 1.05,
-            'dolce gabbana': 1.0
-        }
-
-        premium = {
-            'nike': 1.0,
-            'adidas': 0.95,
-            'jordan': 1.05,
-            'supreme': 1.2,
-            'off-white': 1.15
-        }
-
-        brand_lower = brand.lower()
-
-        for brand_name, multiplier in ultra_luxury.items():
-            if brand_name in brand_lower:
-                return multiplier
-
-        for brand_name, multiplier in luxury.items():
-            if brand_name in brand_lower:
-                return multiplier
-
-        for brand_name, multiplier in premium.items():
-            if brand_name in brand_lower:
-                return multiplier
-
-        return 1.0
+        multiplier = PriceSyncAnalyzer.MATCHER.match(brand=brand)['brand_multiplier']
+        return multiplier if multiplier is not None else 1.0
 
     @staticmethod
-    def get_price_timeline(items: List[Dict]) -> Dict:
+    def get_price_timeline(aggregates: PriceAggregates, brands: Optional[List[str]] = None) -> Dict:
         """
-        Analyze price trends for items with same brand/category
+        Price trends per brand from the rolling aggregates (see DatabaseManager.price_stats).
+        Each brand is a lookup of its precomputed window, nothing is re-sorted.
         """
-        by_brand = {}
-
-        for item in items:
-            brand = item.get('brand', 'unknown')
-            if brand not in by_brand:
-                by_brand[brand] = []
-
-            by_brand[brand].append({
-                'price': item['price'],
-                'timestamp': item.get('discovered_at', datetime.now().isoformat())
-            })
-
         timeline = {}
-        for brand, prices in by_brand.items():
-            sorted_prices = sorted(prices, key=lambda x: x['timestamp'])
-            if len(sorted_prices) > 1:
-                first_price = sorted_prices[0]['price']
-                last_price = sorted_prices[-1]['price']
-                avg_price = sum(p['price'] for p in sorted_prices) / len(sorted_prices)
-
-                timeline[brand] = {
-                    'first_seen_price': first_price,
-                    'latest_price': last_price,
-                    'average_price': round(avg_price, 2),
-                    'trend': 'up' if last_price > first_price else 'down',
-                    'count': len(sorted_prices)
-                }
+
+        for brand in (brands if brands is not None else aggregates.keys('brand')):
+            summary = aggregates.get('brand', brand)
+            if summary and summary['observations'] > 1:
+                timeline[brand] = summary
 
         return timeline
 
@@ -203,13 +288,13 @@ class PriceSyncAnalyzer:
             f"🎯 MEILLEURES PLATEFORMES DE REVENTE:\n\n"
         )
 
-        sorted_platforms = sorted(
+        top_platforms = heapq.nlargest(
+            3,
             recommendation['platforms'].items(),
-            key=lambda x: x[1]['profit'],
-            reverse=True
+            key=lambda x: x[1]['profit']
         )
 
-        for platform, data in sorted_platforms[:3]:
+        for platform, data in top_platforms:
             emoji = "🥇" if platform == recommendation['best_platform'] else "•"
             text += (
                 f"{emoji} {platform.upper()}\n"
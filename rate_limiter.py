@@ -0,0 +1,177 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second, holding at most `capacity`
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def time_until_available(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def set_rate(self, rate: float):
+        self._refill()
+        self.rate = rate
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket plus AIMD concurrency control for Vinted catalog requests.
+
+    Each success nudges the request rate and concurrency up (additive increase).
+    A 429/403 halves both (multiplicative decrease) and blocks every caller until
+    the server's Retry-After has passed.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: float = 4, min_rate: float = 0.2, max_rate: float = 10.0,
+                 concurrency: int = 4, min_concurrency: int = 1, max_concurrency: int = 16,
+                 increase_every: int = 20):
+        self.bucket = TokenBucket(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase_every = increase_every
+
+        self.blocked_until = 0.0
+        self._active = 0
+        self._successes_since_change = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._active < self.concurrency)
+            self._active += 1
+
+        try:
+            wait = self.blocked_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.bucket.acquire()
+        except BaseException:
+            await self.release()
+            raise
+
+        self.requests += 1
+
+    async def release(self):
+        condition = self._get_condition()
+        async with condition:
+            self._active -= 1
+            condition.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+    def record_success(self):
+        self._successes_since_change += 1
+        if self._successes_since_change < self.increase_every:
+            return
+
+        self._successes_since_change = 0
+        self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.min_rate))
+        if self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self._notify_waiters()
+
+    def record_throttle(self, retry_after: Optional[float] = None):
+        self.throttled += 1
+        self._successes_since_change = 0
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+        self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+        logger.warning(
+            f"Vinted throttled us, rate now {self.bucket.rate:.2f}/s, "
+            f"concurrency {self.concurrency}, retry after {retry_after or 0}s"
+        )
+
+    def _notify_waiters(self):
+        condition = self._condition
+        if condition is None:
+            return
+
+        async def notify():
+            async with condition:
+                condition.notify_all()
+
+        try:
+            asyncio.get_running_loop().create_task(notify())
+        except RuntimeError:
+            pass
+
+    def stats(self) -> Dict:
+        return {
+            'rate': round(self.bucket.rate, 2),
+            'concurrency': self.concurrency,
+            'active': self._active,
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'retries': self.retries,
+        }
+
+
+_shared_limiter: Optional[AdaptiveRateLimiter] = None
+
+
+def get_shared_limiter() -> AdaptiveRateLimiter:
+    """Limiter shared by every scraper instance in the process"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = AdaptiveRateLimiter(
+            rate=float(os.getenv('VINTED_RATE_PER_SECOND', 2)),
+            max_rate=float(os.getenv('VINTED_MAX_RATE_PER_SECOND', 10)),
+            concurrency=int(os.getenv('VINTED_CONCURRENCY', 4)),
+            max_concurrency=int(os.getenv('VINTED_MAX_CONCURRENCY', 16)),
+        )
+    return _shared_limiter
@@ -0,0 +1,95 @@
+import heapq
+import itertools
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from item import Item
+
+logger = logging.getLogger(__name__)
+
+RANK_KEYS = ('profit', 'roi')
+
+
+def item_score(item: Item, rank_by: str = 'profit') -> float:
+    profit = item.profit_potential or 0
+    if rank_by == 'roi':
+        price = item.price or 0
+        return profit / price * 100 if price > 0 else 0.0
+    return profit
+
+
+class TopKMerger:
+    """
+    Merges per-keyword result lists: deduplicates listings by id, records every
+    keyword that matched them in item.keywords and keeps only the best k by
+    profit or ROI in a min-heap, so memory stays O(k) however many keywords run.
+
+    With k=None every unique item is kept.
+    """
+
+    def __init__(self, k: Optional[int] = None, rank_by: str = 'profit'):
+        if rank_by not in RANK_KEYS:
+            raise ValueError(f"Unknown ranking key: {rank_by}")
+
+        self.k = k
+        self.rank_by = rank_by
+        self._heap = []
+        self._entries: Dict[object, Item] = {}
+        self._sequence = itertools.count()
+
+        self.seen = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._entries
+
+    def add(self, items: Iterable[Item], keyword: Optional[str] = None) -> List[Item]:
+        """Merge one keyword's items, returning the ones not seen before that made the top k"""
+        added = []
+
+        for item in items:
+            self.seen += 1
+            item_id = item.id
+
+            existing = self._entries.get(item_id)
+            if existing is not None:
+                self.duplicates += 1
+                if keyword and keyword not in existing.keywords:
+                    existing.keywords.append(keyword)
+                continue
+
+            score = item_score(item, self.rank_by)
+            # Later arrivals lose ties, so the negated sequence sorts them first in the min-heap
+            entry = (score, -next(self._sequence), item_id)
+
+            if self.k is not None and len(self._heap) >= self.k:
+                if entry <= self._heap[0]:
+                    self.dropped += 1
+                    continue
+                evicted = heapq.heapreplace(self._heap, entry)
+                del self._entries[evicted[2]]
+                self.dropped += 1
+            else:
+                heapq.heappush(self._heap, entry)
+
+            item.keywords = [keyword] if keyword else []
+            self._entries[item_id] = item
+            added.append(item)
+
+        return added
+
+    def results(self) -> List[Item]:
+        """Kept items, best first"""
+        return [self._entries[item_id] for _, _, item_id in sorted(self._heap, reverse=True)]
+
+    def stats(self) -> Dict:
+        return {
+            'seen': self.seen,
+            'kept': len(self._entries),
+            'duplicates': self.duplicates,
+            'dropped': self.dropped,
+        }
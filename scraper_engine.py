@@ -0,0 +1,337 @@
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from batch_scoring import BatchScorer
+from catalog_decoder import decode_catalog_page, decode_item
+from deal_strategies import DealFilter, PricingStrategy
+from item import Item
+from market_model import MarketPriceModel, get_shared_model
+from poll_state import KeywordWatermarks
+from rate_limiter import AdaptiveRateLimiter, get_shared_limiter
+from result_merger import TopKMerger
+from vinted_http import TransferStats, ValidatorCache, create_session, fetch_json
+
+logger = logging.getLogger(__name__)
+
+BASE_HEADERS = {
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7',
+}
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X)',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
+]
+
+
+class ScraperEngine:
+    """
+    Catalog search pipeline shared by both bots.
+
+    One pooled session (connection limit, DNS cache, compression, ETag
+    revalidation), incremental newest-first polling, batch scoring and market
+    model learning all live here; what counts as a deal is decided by the
+    PricingStrategy and DealFilter it is built with. Every search goes
+    through the shared rate limiter and is counted in stats().
+    """
+
+    # Broad feeds get far more new listings per poll than a keyword, so they
+    # are read in the largest pages the API serves and followed deeper
+    FEED_PER_PAGE = 96
+    FEED_MAX_PAGES = 20
+
+    def __init__(self, pricing: PricingStrategy, deal_filter: DealFilter, per_page: int = 50,
+                 max_connections: int = 10, rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 market_model: Optional[MarketPriceModel] = None):
+        self.base_url = "https://www.vinted.fr"
+        self.pricing = pricing
+        self.deal_filter = deal_filter
+        self.per_page = per_page
+        self.feed_per_page = self.FEED_PER_PAGE
+        self.feed_max_pages = self.FEED_MAX_PAGES
+        self.max_connections = max_connections
+        self.session = None
+        self.watermarks = KeywordWatermarks()
+        self.rate_limiter = rate_limiter or get_shared_limiter()
+        self.market_model = market_model or get_shared_model()
+        self.validators = ValidatorCache()
+        self.transfer = TransferStats()
+        self.batch_scorer = BatchScorer(self)
+        # Awaited with every listing priced by a search or revisit, deal or not,
+        # so the caller can follow price changes independently of the DealFilter
+        self.on_scored: Optional[Callable[[List[Item]], Awaitable[None]]] = None
+
+        self.searches = 0
+        self.errors = 0
+        self.listings = 0
+        self.opportunities = 0
+        self.search_time = 0.0
+        # Incremental scans that hit their page limit with unseen listings left
+        self.truncated_scans = 0
+
+    async def get_session(self):
+        if self.session is None:
+            self.session = create_session(BASE_HEADERS, limit_per_host=self.max_connections)
+        return self.session
+
+    async def search_items(self, keyword: str, max_price: float, incremental: bool = False,
+                           price_from: Optional[float] = None, per_page: Optional[int] = None,
+                           max_pages: Optional[int] = None) -> List[Item]:
+        """
+        Deals for one catalog query, best-effort: errors are logged and give [].
+
+        With incremental=True only listings newer than the previous poll of the
+        same query are scored, paging deeper while every item is new, up to
+        max_pages (the watermarks' limit by default).
+        """
+        label = keyword or f"feed {int(price_from or 0)}-{int(max_price)}€"
+        started = time.perf_counter()
+        self.searches += 1
+
+        try:
+            session = await self.get_session()
+
+            if incremental:
+                raw_items = await self._fetch_new_items(session, keyword, max_price, price_from, per_page, max_pages)
+            else:
+                raw_items = await self._fetch_page(session, keyword, max_price, price_from=price_from,
+                                                   per_page=per_page)
+
+            if not raw_items:
+                return []
+
+            if self.on_scored is not None:
+                # Priced before _observe, so the deals come from the same market estimates
+                scored = self.batch_scorer.price(raw_items)
+                items = [item for item in scored if self.deal_filter.accepts(item)]
+                await self._notify_scored(scored, label)
+            else:
+                items = self.batch_scorer.score(raw_items)
+            # Learn from the page after scoring it, so no listing is compared against itself
+            self._observe(raw_items)
+
+            self.listings += len(raw_items)
+            self.opportunities += len(items)
+            logger.info(f"Found {len(items)} deal(s) among {len(raw_items)} listing(s) for '{label}'")
+            return items
+
+        except asyncio.TimeoutError:
+            self.errors += 1
+            logger.warning(f"Timeout searching for '{label}'")
+            return []
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error searching '{label}': {e}")
+            return []
+        finally:
+            self.search_time += time.perf_counter() - started
+
+    async def revisit(self, item_ids: List) -> List[Item]:
+        """
+        Current state of known listings, fetched one by one from the item endpoint.
+
+        Incremental polls never return a listing below their watermark again,
+        so this is the only way a listing seen once is priced a second time.
+        Every listing found is passed to on_scored; sold or removed ones are skipped.
+        """
+        session = await self.get_session()
+
+        async def fetch(item_id) -> Optional[Dict]:
+            data = await fetch_json(session, f"{self.base_url}/api/v2/items/{item_id}", {}, self.rate_limiter,
+                                    headers={'User-Agent': random.choice(USER_AGENTS)}, timeout=10,
+                                    label='revisit', transfer=self.transfer, decode=decode_item)
+            return data.get('item') if data else None
+
+        raw_items = [raw for raw in await asyncio.gather(*(fetch(item_id) for item_id in item_ids)) if raw]
+        items = self.batch_scorer.price(raw_items)
+        if self.on_scored is not None:
+            await self._notify_scored(items, 'revisit')
+        return items
+
+    async def _notify_scored(self, items: List[Item], label: str):
+        if not items:
+            return
+        try:
+            await self.on_scored(items)
+        except Exception as e:
+            logger.error(f"Error in scored items callback for '{label}': {e}")
+
+    async def scan_feed(self, price_from: float, price_to: float) -> List[Item]:
+        """
+        Deals among the listings posted since the previous scan of the
+        unfiltered newest_first feed for one price band
+        """
+        return await self.search_items('', price_to, incremental=True, price_from=price_from,
+                                       per_page=self.feed_per_page, max_pages=self.feed_max_pages)
+
+    async def iter_specific_keywords(self, keywords: List[str], max_price: float = 100,
+                                     incremental: bool = False) -> AsyncIterator[Tuple[str, List[Item]]]:
+        """
+        Search all keywords concurrently and yield (keyword, deals) as soon as
+        each keyword's response has been scored
+        """
+        async def search(keyword: str):
+            return keyword, await self.search_items(keyword, max_price, incremental)
+
+        tasks = [asyncio.ensure_future(search(kw)) for kw in keywords]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    keyword, items = await next_done
+                except Exception as e:
+                    logger.error(f"Error in keyword search: {e}")
+                    continue
+                yield keyword, items
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def search_specific_keywords(self, keywords: List[str], max_price: float = 100, incremental: bool = False,
+                                       limit: Optional[int] = None, rank_by: str = 'profit') -> List[Item]:
+        """
+        Deduplicated results across keywords, best first by profit or ROI.
+        With a limit only the top `limit` items are ever held in memory.
+        """
+        return await self._collect(self.iter_specific_keywords(keywords, max_price, incremental), limit, rank_by)
+
+    async def _collect(self, results: AsyncIterator[Tuple[str, List[Item]]],
+                       limit: Optional[int] = None, rank_by: str = 'profit') -> List[Item]:
+        merger = TopKMerger(limit, rank_by)
+
+        async for keyword, items in results:
+            merger.add(items, keyword)
+
+        return merger.results()
+
+    async def _fetch_page(self, session, keyword: str, max_price: float, page: int = 1,
+                          price_from: Optional[float] = None, per_page: Optional[int] = None) -> Optional[List[Dict]]:
+        search_url = f"{self.base_url}/api/v2/catalog/items"
+        params = {
+            'search_text': keyword,
+            'price_to': int(max_price),
+            'order': 'newest_first',
+            'per_page': per_page or self.per_page,
+            'page': page
+        }
+        if price_from:
+            params['price_from'] = int(price_from)
+
+        headers = {'User-Agent': random.choice(USER_AGENTS)}
+        label = keyword or f"feed {int(price_from or 0)}-{int(max_price)}"
+
+        data = await fetch_json(session, search_url, params, self.rate_limiter,
+                                headers=headers, timeout=10, label=label,
+                                validators=self.validators, transfer=self.transfer,
+                                decode=decode_catalog_page)
+        if data is None:
+            return None
+
+        return data.get('items', [])
+
+    async def _fetch_new_items(self, session, keyword: str, max_price: float, price_from: Optional[float] = None,
+                               per_page: Optional[int] = None, max_pages: Optional[int] = None) -> List[Dict]:
+        key = self.watermarks.key(f"{keyword}@{int(price_from)}" if price_from else keyword, max_price)
+        mark = self.watermarks.get(key)
+        per_page = per_page or self.per_page
+        max_pages = max_pages or self.watermarks.max_pages
+        new_items = []
+
+        for page in range(1, max_pages + 1):
+            items = await self._fetch_page(session, keyword, max_price, page, price_from, per_page)
+            if items is None and page > 1:
+                # The failed page may hold listings between these and the old mark:
+                # keep the mark so the next poll scans them again
+                logger.warning(f"'{keyword}' page {page} failed, keeping the previous watermark")
+                return new_items
+            if not items:
+                break
+
+            page_new, reached_known = self.watermarks.split_new(items, mark)
+            new_items.extend(page_new)
+
+            if mark is None or reached_known or len(items) < per_page:
+                break
+        else:
+            self.truncated_scans += 1
+            label = keyword or f"feed {int(price_from or 0)}-{int(max_price)}"
+            logger.warning(f"'{label}' still had unseen items after {max_pages} pages of {per_page}")
+
+        self.watermarks.advance(key, new_items)
+        return new_items
+
+    def _process_item(self, raw: Dict) -> Optional[Item]:
+        """Price one raw listing; the batch scorer does the same for whole pages"""
+        try:
+            price = float(raw.get('price', 0))
+            match = self.pricing.matcher.match(raw.get('title', ''), raw.get('brand_title', ''))
+            return self._build_item(raw, price, match, self._market_estimate(raw, price, match))
+
+        except Exception as e:
+            logger.error(f"Error processing item: {e}")
+            return None
+
+    def _build_item(self, raw: Dict, price: float, match: Dict, estimate: Optional[Dict] = None) -> Item:
+        item_id = raw.get('id', '')
+        photo = raw.get('photo')
+        user = raw.get('user') or {}
+
+        market_price = self.pricing.market_price(match, price, estimate)
+
+        return Item(
+            id=item_id,
+            title=raw.get('title', ''),
+            price=price,
+            url=f"{self.base_url}/items/{item_id}",
+            brand=raw.get('brand_title', ''),
+            size=raw.get('size_title', ''),
+            condition=raw.get('status', ''),
+            category=match['category'] or 'other',
+            seller=user.get('login', 'N/A'),
+            seller_rating=user.get('average_positive_feedback', 0),
+            image_url=photo.get('full_size_url', '') if photo else '',
+            market_price=market_price,
+            discount_percent=self.pricing.discount(price, market_price),
+            profit_potential=self.pricing.profit(price, market_price),
+            price_percentile=estimate['percentile'] if estimate else None,
+            posted_at=datetime.now().isoformat()
+        )
+
+    def _market_estimate(self, raw: Dict, price: float, match: Dict) -> Optional[Dict]:
+        return self.market_model.estimate(
+            price, raw.get('brand_title', ''), match['category'] or 'other',
+            raw.get('status', ''), raw.get('size_title', '')
+        )
+
+    def _observe(self, raw_items: List[Dict]):
+        categories = self.pricing.matcher.match_many([raw.get('title', '') for raw in raw_items],
+                                                     [''] * len(raw_items))['category']
+        for raw, category in zip(raw_items, categories):
+            try:
+                self.market_model.observe(
+                    float(raw.get('price', 0)), raw.get('brand_title', ''), category or 'other',
+                    raw.get('status', ''), raw.get('size_title', ''), item_id=raw.get('id')
+                )
+            except (TypeError, ValueError):
+                continue
+
+    def stats(self) -> Dict:
+        return {
+            'searches': self.searches,
+            'errors': self.errors,
+            'listings': self.listings,
+            'opportunities': self.opportunities,
+            'avg_search_ms': round(self.search_time / self.searches * 1000, 1) if self.searches else 0.0,
+            'truncated_scans': self.truncated_scans,
+            'cached_validators': len(self.validators),
+        }
+
+    async def close(self):
+        self.market_model.save()
+        if self.session:
+            await self.session.close()
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from item import Item
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_keyword(keyword: str) -> str:
+    return ' '.join(keyword.lower().split())
+
+
+class SubscriptionScheduler:
+    """
+    Fetches each distinct subscribed keyword once per cycle and fans the
+    results out to every subscriber of that keyword
+    """
+
+    def __init__(self, scraper, max_concurrency: int = 4, fetch_delay: float = 1.0):
+        self.scraper = scraper
+        self.max_concurrency = max(1, max_concurrency)
+        self.fetch_delay = fetch_delay
+        self.last_cycle_stats = {}
+
+    async def run_cycle(self, index: Dict[str, Dict[int, float]],
+                        deliver: Callable[[int, Item], Awaitable[None]]) -> Dict:
+        """
+        Run one polling cycle over a {keyword: {chat_id: max_price}} index (see
+        SubscriptionStore): one catalog query per keyword, using the highest
+        max_price of its subscribers, then each subscriber's own cap in memory
+        """
+        started = time.monotonic()
+        # Commands may edit the index while the cycle awaits
+        groups = {keyword: dict(subscribers) for keyword, subscribers in index.items() if subscribers}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        stats = {
+            'subscribers': len({chat_id for subscribers in groups.values() for chat_id in subscribers}),
+            'keywords': len(groups),
+            'fetched_items': 0,
+            'deliveries': 0,
+            'errors': 0,
+        }
+
+        async def fetch(keyword: str, subscribers: Dict[int, float]) -> List[Item]:
+            async with semaphore:
+                try:
+                    return await self.scraper.search_items(
+                        keyword, max(subscribers.values()), incremental=True
+                    )
+                finally:
+                    if self.fetch_delay:
+                        await asyncio.sleep(self.fetch_delay)
+
+        async def process(keyword: str, subscribers: Dict[int, float]):
+            try:
+                items = await fetch(keyword, subscribers)
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error fetching subscription keyword '{keyword}': {e}")
+                return
+
+            stats['fetched_items'] += len(items)
+
+            for chat_id, max_price in subscribers.items():
+                for item in items:
+                    if item.price > max_price:
+                        continue
+                    try:
+                        await deliver(chat_id, item)
+                        stats['deliveries'] += 1
+                    except Exception as e:
+                        stats['errors'] += 1
+                        logger.error(f"Error delivering item {item.id} to {chat_id}: {e}")
+
+        await asyncio.gather(*(process(kw, subs) for kw, subs in groups.items()))
+
+        stats['duration'] = round(time.monotonic() - started, 2)
+        self.last_cycle_stats = stats
+        logger.info(
+            f"Subscription cycle: {stats['keywords']} keyword(s) for {stats['subscribers']} chat(s), "
+            f"{stats['deliveries']} deliveries in {stats['duration']}s"
+        )
+
+        return stats
+
+    async def run_feed_cycle(self, feeds: List[Tuple[int, int]], matcher,
+                             deliver: Callable[[int, Item], Awaitable[None]]) -> Dict:
+        """
+        Run one polling cycle over broad newest-first price bands instead of
+        per-keyword searches: each new deal is matched once against every
+        subscription (see SubscriptionMatcher), so the number of catalog
+        queries depends on len(feeds), not on how many keywords are followed
+        """
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        stats = {
+            'subscribers': sum(1 for keywords in matcher.store.keywords.values() if keywords),
+            'keywords': len(matcher.store.index),
+            'feeds': len(feeds),
+            'fetched_items': 0,
+            'matched_items': 0,
+            'deliveries': 0,
+            'errors': 0,
+        }
+        # Feeds whose new listings outran the scan's page limit: the rest were skipped
+        truncated_before = self.scraper.truncated_scans
+
+        async def fetch(price_from: int, price_to: int) -> List[Item]:
+            async with semaphore:
+                try:
+                    return await self.scraper.scan_feed(price_from, price_to)
+                finally:
+                    if self.fetch_delay:
+                        await asyncio.sleep(self.fetch_delay)
+
+        async def process(price_from: int, price_to: int):
+            try:
+                items = await fetch(price_from, price_to)
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error scanning feed {price_from}-{price_to}: {e}")
+                return
+
+            stats['fetched_items'] += len(items)
+
+            for item in items:
+                recipients = matcher.match(item)
+                if recipients:
+                    stats['matched_items'] += 1
+
+                for chat_id in recipients:
+                    try:
+                        await deliver(chat_id, item)
+                        stats['deliveries'] += 1
+                    except Exception as e:
+                        stats['errors'] += 1
+                        logger.error(f"Error delivering item {item.id} to {chat_id}: {e}")
+
+        await asyncio.gather(*(process(low, high) for low, high in feeds))
+
+        stats['truncated_feeds'] = self.scraper.truncated_scans - truncated_before
+        stats['duration'] = round(time.monotonic() - started, 2)
+        self.last_cycle_stats = stats
+        logger.info(
+            f"Feed cycle: {stats['feeds']} feed(s) against {stats['keywords']} keyword(s), "
+            f"{stats['matched_items']} matched item(s), {stats['deliveries']} deliveries in {stats['duration']}s"
+        )
+        if stats['truncated_feeds']:
+            logger.warning(
+                f"{stats['truncated_feeds']} feed(s) had more new listings than one scan reads, "
+                f"shorten SUBSCRIPTION_FEED_INTERVAL_SECONDS or split the price bands"
+            )
+
+        return stats
@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+
+from subscription_scheduler import normalize_keyword
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionStore:
+    """
+    Keyword subscriptions persisted in SQLite and indexed in memory.
+
+    `index` maps each normalized keyword to {chat_id: max_price} for its
+    subscribers, so a fetched keyword page reaches everyone interested in one
+    lookup. /subscribe, /unsubscribe and /setprice update the index and the
+    database in place; nothing is rebuilt after startup.
+    """
+
+    def __init__(self, path: Optional[str] = None, default_max_price: float = 50):
+        self.path = path
+        self.default_max_price = default_max_price
+        self.index: Dict[str, Dict[int, float]] = {}
+        self.max_prices: Dict[int, float] = {}
+        # chat_id -> {normalized keyword: keyword as typed}, in subscription order
+        self.keywords: Dict[int, Dict[str, str]] = {}
+        self.conn: Optional[sqlite3.Connection] = None
+        # Bumped whenever a keyword gains or loses its place in the index
+        self.version = 0
+
+    @classmethod
+    def from_env(cls, default_path: str) -> 'SubscriptionStore':
+        return cls(
+            path=os.getenv('SUBSCRIPTIONS_DB_PATH', default_path) or None,
+            default_max_price=float(os.getenv('MAX_PRICE', 50)),
+        )
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for subscribers in self.index.values())
+
+    def _connect(self):
+        if self.conn is None and self.path:
+            self.conn = sqlite3.connect(self.path)
+            self.conn.execute('CREATE TABLE IF NOT EXISTS subscription_chats '
+                              '(chat_id INTEGER PRIMARY KEY, max_price REAL NOT NULL)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS subscriptions ('
+                              'chat_id INTEGER NOT NULL, keyword TEXT NOT NULL, display_keyword TEXT NOT NULL, '
+                              'created_at REAL NOT NULL, PRIMARY KEY (chat_id, keyword))')
+        return self.conn
+
+    def _write(self, query: str, params: tuple):
+        conn = self._connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.execute(query, params)
+        except Exception as e:
+            logger.error(f"Error saving subscriptions: {e}")
+
+    def load(self):
+        conn = self._connect()
+        if conn is None:
+            return
+
+        try:
+            self.max_prices = dict(conn.execute('SELECT chat_id, max_price FROM subscription_chats'))
+            rows = conn.execute('SELECT chat_id, keyword, display_keyword FROM subscriptions ORDER BY created_at')
+
+            for chat_id, keyword, display_keyword in rows:
+                self.keywords.setdefault(chat_id, {})[keyword] = display_keyword
+                self.index.setdefault(keyword, {})[chat_id] = self.max_price(chat_id)
+
+            self.version += 1
+            logger.info(f"Loaded {len(self)} subscription(s) for {len(self.keywords)} chat(s)")
+
+        except Exception as e:
+            logger.error(f"Error loading subscriptions: {e}")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def max_price(self, chat_id: int) -> float:
+        return self.max_prices.get(chat_id, self.default_max_price)
+
+    def chat_keywords(self, chat_id: int) -> List[str]:
+        return list(self.keywords.get(chat_id, {}).values())
+
+    def subscribers(self, keyword: str) -> Dict[int, float]:
+        return self.index.get(normalize_keyword(keyword), {})
+
+    def subscribe(self, chat_id: int, keyword: str) -> bool:
+        """False if the chat already follows this keyword"""
+        normalized = normalize_keyword(keyword)
+        chat_keywords = self.keywords.setdefault(chat_id, {})
+        if not normalized or normalized in chat_keywords:
+            return False
+
+        chat_keywords[normalized] = keyword.strip()
+        self.index.setdefault(normalized, {})[chat_id] = self.max_price(chat_id)
+        self.version += 1
+        self._write('INSERT OR IGNORE INTO subscriptions (chat_id, keyword, display_keyword, created_at) '
+                    'VALUES (?, ?, ?, ?)', (chat_id, normalized, keyword.strip(), time.time()))
+        return True
+
+    def unsubscribe(self, chat_id: int, keyword: str) -> bool:
+        """False if the chat didn't follow this keyword"""
+        normalized = normalize_keyword(keyword)
+        chat_keywords = self.keywords.get(chat_id, {})
+        if normalized not in chat_keywords:
+            return False
+
+        del chat_keywords[normalized]
+        subscribers = self.index.get(normalized, {})
+        subscribers.pop(chat_id, None)
+        if not subscribers:
+            self.index.pop(normalized, None)
+        self.version += 1
+
+        self._write('DELETE FROM subscriptions WHERE chat_id = ? AND keyword = ?', (chat_id, normalized))
+        return True
+
+    def set_max_price(self, chat_id: int, max_price: float):
+        self.max_prices[chat_id] = max_price
+        for keyword in self.keywords.get(chat_id, {}):
+            self.index[keyword][chat_id] = max_price
+
+        self._write('INSERT OR REPLACE INTO subscription_chats (chat_id, max_price) VALUES (?, ?)',
+                    (chat_id, max_price))
+
+    def stats(self) -> Dict:
+        return {
+            'chats': sum(1 for keywords in self.keywords.values() if keywords),
+            'keywords': len(self.index),
+            'subscriptions': len(self),
+        }
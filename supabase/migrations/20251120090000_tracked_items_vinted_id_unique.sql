@@ -0,0 +1,45 @@
+/*
+  # Unique vinted_id on tracked_items
+
+  1. Remove duplicate rows left by repeated inserts, keeping the earliest one
+     (rows without discovered_at count as earliest, ties go to the lowest id)
+  2. Point the price history and broadcasts of removed duplicates at the
+     kept row first, so the ON DELETE CASCADE foreign keys don't drop them
+  3. Add a unique index on vinted_id so bulk writes can upsert on it
+
+  Changes:
+  - tracked_items: one row per Vinted listing
+  - price_history, channel_broadcasts: item_id of duplicates moved to the kept row
+*/
+
+CREATE TEMP TABLE tracked_items_duplicates AS
+SELECT id, survivor_id
+FROM (
+  SELECT
+    id,
+    first_value(id) OVER (
+      PARTITION BY vinted_id
+      ORDER BY COALESCE(discovered_at, '-infinity'), id
+    ) AS survivor_id
+  FROM tracked_items
+  WHERE vinted_id IS NOT NULL
+) ranked
+WHERE id <> survivor_id;
+
+UPDATE price_history p
+SET item_id = d.survivor_id
+FROM tracked_items_duplicates d
+WHERE p.item_id = d.id;
+
+UPDATE channel_broadcasts b
+SET item_id = d.survivor_id
+FROM tracked_items_duplicates d
+WHERE b.item_id = d.id;
+
+DELETE FROM tracked_items t
+USING tracked_items_duplicates d
+WHERE t.id = d.id;
+
+DROP TABLE tracked_items_duplicates;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tracked_items_vinted_id_unique ON tracked_items(vinted_id);
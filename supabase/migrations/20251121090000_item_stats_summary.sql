@@ -0,0 +1,155 @@
+/*
+  # Incrementally maintained statistics
+
+  1. Add item_stats_summary, one row per (dimension, key) with running counts
+  2. Keep it up to date with triggers on tracked_items and found_items_log
+  3. Backfill it from the existing rows
+  4. Add get_item_stats() so /stats reads a handful of summary rows in one call
+
+  Changes:
+  - item_stats_summary: dimensions 'tracked', 'found', 'brand', 'category', 'keyword'
+  - profit_sum/profit_count only include non-null, non-zero profit margins
+*/
+
+CREATE TABLE IF NOT EXISTS item_stats_summary (
+  dimension text NOT NULL,
+  key text NOT NULL,
+  item_count bigint NOT NULL DEFAULT 0,
+  profit_sum numeric NOT NULL DEFAULT 0,
+  profit_count bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz DEFAULT now(),
+  PRIMARY KEY (dimension, key)
+);
+
+ALTER TABLE item_stats_summary ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Item stats are readable"
+  ON item_stats_summary FOR SELECT
+  USING (true);
+
+CREATE INDEX IF NOT EXISTS idx_item_stats_summary_count ON item_stats_summary(dimension, item_count DESC);
+
+CREATE OR REPLACE FUNCTION bump_item_stat(p_dimension text, p_key text, p_count bigint, p_profit numeric)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  has_profit boolean := p_profit IS NOT NULL AND p_profit <> 0;
+BEGIN
+  INSERT INTO item_stats_summary AS s (dimension, key, item_count, profit_sum, profit_count, updated_at)
+  VALUES (
+    p_dimension,
+    coalesce(p_key, ''),
+    p_count,
+    CASE WHEN has_profit THEN p_count * p_profit ELSE 0 END,
+    CASE WHEN has_profit THEN p_count ELSE 0 END,
+    now()
+  )
+  ON CONFLICT (dimension, key) DO UPDATE SET
+    item_count = s.item_count + EXCLUDED.item_count,
+    profit_sum = s.profit_sum + EXCLUDED.profit_sum,
+    profit_count = s.profit_count + EXCLUDED.profit_count,
+    updated_at = now();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION tracked_items_stats_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM bump_item_stat('tracked', 'all', -1, OLD.profit_margin);
+    PERFORM bump_item_stat('brand', lower(OLD.brand), -1, OLD.profit_margin);
+    PERFORM bump_item_stat('category', coalesce(OLD.category, 'other'), -1, OLD.profit_margin);
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM bump_item_stat('tracked', 'all', 1, NEW.profit_margin);
+    PERFORM bump_item_stat('brand', lower(NEW.brand), 1, NEW.profit_margin);
+    PERFORM bump_item_stat('category', coalesce(NEW.category, 'other'), 1, NEW.profit_margin);
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_tracked_items_stats ON tracked_items;
+CREATE TRIGGER trg_tracked_items_stats
+  AFTER INSERT OR UPDATE OF brand, category, profit_margin OR DELETE ON tracked_items
+  FOR EACH ROW EXECUTE FUNCTION tracked_items_stats_trigger();
+
+CREATE OR REPLACE FUNCTION found_items_log_stats_trigger()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM bump_item_stat('found', 'all', -1, OLD.profit_margin);
+    PERFORM bump_item_stat('keyword', OLD.search_keyword, -1, OLD.profit_margin);
+  ELSE
+    PERFORM bump_item_stat('found', 'all', 1, NEW.profit_margin);
+    PERFORM bump_item_stat('keyword', NEW.search_keyword, 1, NEW.profit_margin);
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_found_items_log_stats ON found_items_log;
+CREATE TRIGGER trg_found_items_log_stats
+  AFTER INSERT OR DELETE ON found_items_log
+  FOR EACH ROW EXECUTE FUNCTION found_items_log_stats_trigger();
+
+TRUNCATE item_stats_summary;
+
+INSERT INTO item_stats_summary (dimension, key, item_count, profit_sum, profit_count)
+SELECT 'tracked', 'all', count(*),
+       coalesce(sum(profit_margin) FILTER (WHERE profit_margin <> 0), 0),
+       count(*) FILTER (WHERE profit_margin <> 0)
+FROM tracked_items
+UNION ALL
+SELECT 'brand', coalesce(lower(brand), ''), count(*),
+       coalesce(sum(profit_margin) FILTER (WHERE profit_margin <> 0), 0),
+       count(*) FILTER (WHERE profit_margin <> 0)
+FROM tracked_items GROUP BY coalesce(lower(brand), '')
+UNION ALL
+SELECT 'category', coalesce(category, 'other'), count(*),
+       coalesce(sum(profit_margin) FILTER (WHERE profit_margin <> 0), 0),
+       count(*) FILTER (WHERE profit_margin <> 0)
+FROM tracked_items GROUP BY coalesce(category, 'other')
+UNION ALL
+SELECT 'found', 'all', count(*),
+       coalesce(sum(profit_margin) FILTER (WHERE profit_margin <> 0), 0),
+       count(*) FILTER (WHERE profit_margin <> 0)
+FROM found_items_log
+UNION ALL
+SELECT 'keyword', coalesce(search_keyword, ''), count(*),
+       coalesce(sum(profit_margin) FILTER (WHERE profit_margin <> 0), 0),
+       count(*) FILTER (WHERE profit_margin <> 0)
+FROM found_items_log GROUP BY coalesce(search_keyword, '');
+
+CREATE OR REPLACE FUNCTION get_item_stats(top_n int DEFAULT 5)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+  WITH ranked AS (
+    SELECT dimension, key, item_count, profit_sum, profit_count,
+           row_number() OVER (PARTITION BY dimension ORDER BY item_count DESC) AS rank
+    FROM item_stats_summary
+    WHERE item_count > 0
+  )
+  SELECT coalesce(jsonb_agg(jsonb_build_object(
+    'dimension', dimension,
+    'key', key,
+    'item_count', item_count,
+    'profit_sum', profit_sum,
+    'profit_count', profit_count
+  ) ORDER BY dimension, rank), '[]'::jsonb)
+  FROM ranked
+  WHERE dimension IN ('tracked', 'found') OR rank <= top_n;
+$$;
@@ -0,0 +1,17 @@
+/*
+  # Price change observations
+
+  1. Record the asking price in price_history, next to the market estimates
+  2. Keep the Vinted id and the previous price so a listing's timeline reads
+     without joining tracked_items
+
+  Changes:
+  - price_history: price, previous_price, vinted_id columns
+  - Index on (vinted_id, recorded_at) for per-listing timelines
+*/
+
+ALTER TABLE price_history ADD COLUMN IF NOT EXISTS vinted_id text;
+ALTER TABLE price_history ADD COLUMN IF NOT EXISTS price numeric;
+ALTER TABLE price_history ADD COLUMN IF NOT EXISTS previous_price numeric;
+
+CREATE INDEX IF NOT EXISTS idx_price_history_vinted_recorded ON price_history(vinted_id, recorded_at);
@@ -1,12 +1,22 @@
 import os
 import asyncio
 import logging
+from typing import Dict, List, Tuple
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Chat
+from telegram.error import BadRequest, Forbidden
 from telegram.ext import Application, CommandHandler, ContextTypes, ConversationHandler, MessageHandler, filters
-from telegram.error import TelegramError
-from advanced_scraper import AdvancedVintedScraper
+from advanced_scraper import AdvancedVintedScraper, LUXURY_SEARCH_KEYWORDS, MISPRICED_SEARCH_KEYWORDS
 from database_manager import DatabaseManager
+from dedup_index import DedupIndex
+from delivery_queue import DeliveryQueue, PRIORITY_BROADCAST, PRIORITY_DIRECT
+from price_sync_analyzer import PriceSyncAnalyzer
+from result_merger import TopKMerger
+from photo_cache import PhotoCache
+from message_renderer import MESSAGE_LIMIT, MessageRenderer, Rendered, truncate
+from loop_monitor import EventLoopLagMonitor
+from hunter import BackgroundHunter, Sweep
+from item import Item
 from datetime import datetime
 import json
 
@@ -19,7 +29,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 CHANNEL_ID = None
-SEARCH_RUNNING = False
 
 class AdvancedVintedBot:
     def __init__(self):
@@ -27,11 +36,41 @@ class AdvancedVintedBot:
         if not self.token:
             raise ValueError("TELEGRAM_BOT_TOKEN not set in .env")
 
-        self.scraper = AdvancedVintedScraper()
+        self.scraper = AdvancedVintedScraper(max_connections=int(os.getenv('SCRAPER_MAX_CONNECTIONS', 10)))
         self.db = DatabaseManager()
+        # Every priced listing, deal or not, updates the price of listings already
+        # tracked, independently of what is sent or recorded as found
+        self.scraper.on_scored = self.db.record_price_changes
         self.channel_id = int(os.getenv('TELEGRAM_CHANNEL_ID', 0)) if os.getenv('TELEGRAM_CHANNEL_ID') else None
-        self.sent_items = set()
-        self.search_task = None
+        self.sent_items = DedupIndex.from_env('advanced_bot_sent_items.sqlite3')
+        self.sent_items.load()
+        # Hunt and channel keys queued for delivery but not sent yet
+        self.sending = set()
+        # Hunt and channel messages whose delivery failed, queued again with the
+        # next results until one of DELIVERY_RETRY_CYCLES attempts succeeds:
+        # {sent_key: (chat_id, item, failures)}
+        self.failed_alerts = {}
+        self.retry_cycles = int(os.getenv('DELIVERY_RETRY_CYCLES', 3))
+        self.hunter = BackgroundHunter(
+            self.scraper, self._on_hunt_results,
+            min_interval=float(os.getenv('HUNTER_MIN_INTERVAL', 60)),
+            max_interval=float(os.getenv('HUNTER_MAX_INTERVAL', 1800)),
+            batch_size=int(os.getenv('HUNTER_BATCH_SIZE', 5))
+        )
+        # Most profitable new deals sent to the hunt chat per sweep, like send_limit for searches
+        self.hunt_send_limit = int(os.getenv('HUNTER_MAX_PER_SWEEP', 5))
+        self.hunter.add_sweeps('luxury', LUXURY_SEARCH_KEYWORDS, 150)
+        self.hunter.add_sweeps('mispriced', MISPRICED_SEARCH_KEYWORDS, 100)
+        self.hunter.add_sweeps('custom', os.getenv('HUNTER_KEYWORDS', '').split(','), 120)
+        # Chat that started the hunter, and the context its results are sent with
+        self.hunt_chat_id = None
+        self.hunt_context = None
+        self.loop_monitor = EventLoopLagMonitor()
+        self.delivery = DeliveryQueue(workers=int(os.getenv('DELIVERY_WORKERS', 4)))
+        self.photos = PhotoCache(ttl=float(os.getenv('PHOTO_CACHE_TTL_HOURS', 24)) * 3600)
+        self.renderer = MessageRenderer(max_entries=int(os.getenv('RENDER_CACHE_SIZE', 2048)))
+        self.renderer.register('opportunity', self._format_item_text, self._item_keyboard)
+        self.renderer.register('channel', self._format_channel_text, self._channel_keyboard)
 
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         welcome_text = (
@@ -43,7 +82,11 @@ class AdvancedVintedBot:
             "/search <keyword> - Chercher par mot-clé\n"
             "/set_channel - Définir canal de diffusion\n"
             "/stats - Voir statistiques\n"
-            "/stop - Arrêter les recherches\n"
+            "/recent - Dernières affaires\n"
+            "/top_brands - Marques les plus trouvées\n"
+            "/hunt - Lancer la chasse en continu\n"
+            "/pause - Mettre la chasse en pause\n"
+            "/stop - Arrêter la chasse\n"
             "/help - Aide complète"
         )
         await update.message.reply_text(welcome_text)
@@ -59,10 +102,16 @@ class AdvancedVintedBot:
             "/set_channel - Envoie tous les articles trouvés au canal\n\n"
             "📊 ANALYSE:\n"
             "/stats - Affiche les trouvailles totales\n"
-            "/top_brands - Marques les plus trouvées\n"
-            "/recent - Dernières 10 affaires\n\n"
+            "/top_brands [jours] - Marques les plus trouvées\n"
+            "/recent [heures] - Dernières 10 affaires\n"
+            "/brand gucci - Articles enregistrés d'une marque\n"
+            "/trends [gucci,prada] - Tendances de prix par marque\n"
+            "/history <id> - Historique de prix d'un article\n\n"
             "⚙️ GESTION:\n"
-            "/stop - Arrête les recherches\n"
+            "/hunt - Chasse 24/7 en arrière-plan\n"
+            "/pause - Suspend la chasse\n"
+            "/hunt_stats - Rendement par mot-clé\n"
+            "/stop - Arrête la chasse\n"
             "/help - Affiche cette aide\n\n"
             "💡 ASTUCES:\n"
             "• Le bot recherche 24/7 si configuré\n"
@@ -96,20 +145,21 @@ class AdvancedVintedBot:
         await update.message.reply_text("🔍 Recherche marques de luxe en cours...")
 
         try:
-            items = await self.scraper.search_luxury_brands(max_price=150)
+            items, total = await self._stream_results(
+                update, context,
+                self.scraper.iter_luxury_brands(max_price=150),
+                keyword_count=len(LUXURY_SEARCH_KEYWORDS),
+                send_limit=10
+            )
 
             if not items:
                 await update.message.reply_text("Aucune affaire trouvée pour le moment")
                 return
 
-            await update.message.reply_text(f"✅ {len(items)} article(s) de luxe détecté(s)!")
-
-            for item in items[:10]:
-                await self._send_item_message(update.effective_chat.id, item, context)
-                await asyncio.sleep(0.5)
+            self._queue_reply(update, f"✅ {total} article(s) de luxe détecté(s)!")
 
             if self.channel_id:
-                await self._broadcast_to_channel(items[:20], context)
+                await self._broadcast_to_channel(items, context)
 
         except Exception as e:
             logger.error(f"Error in search_luxury: {e}")
@@ -119,20 +169,21 @@ class AdvancedVintedBot:
         await update.message.reply_text("🔍 Recherche articles mal tarifés...")
 
         try:
-            items = await self.scraper.search_mispriced_items(max_price=100)
+            items, total = await self._stream_results(
+                update, context,
+                self.scraper.iter_mispriced_items(max_price=100),
+                keyword_count=len(MISPRICED_SEARCH_KEYWORDS),
+                send_limit=10
+            )
 
             if not items:
                 await update.message.reply_text("Aucun article mal tarifé trouvé")
                 return
 
-            await update.message.reply_text(f"✅ {len(items)} article(s) sous-évalué(s) trouvé(s)!")
-
-            for item in items[:10]:
-                await self._send_item_message(update.effective_chat.id, item, context)
-                await asyncio.sleep(0.5)
+            self._queue_reply(update, f"✅ {total} article(s) sous-évalué(s) trouvé(s)!")
 
             if self.channel_id:
-                await self._broadcast_to_channel(items[:20], context)
+                await self._broadcast_to_channel(items, context)
 
         except Exception as e:
             logger.error(f"Error in search_mispriced: {e}")
@@ -152,17 +203,18 @@ class AdvancedVintedBot:
         await update.message.reply_text(f"🔍 Recherche {len(keywords)} mots-clés...")
 
         try:
-            items = await self.scraper.search_specific_keywords(keywords, max_price=120)
+            items, total = await self._stream_results(
+                update, context,
+                self.scraper.iter_specific_keywords(keywords, max_price=120),
+                keyword_count=len(keywords),
+                send_limit=15
+            )
 
             if not items:
                 await update.message.reply_text("Aucun article trouvé")
                 return
 
-            await update.message.reply_text(f"✅ {len(items)} article(s) trouvé(s)!")
-
-            for item in items[:15]:
-                await self._send_item_message(update.effective_chat.id, item, context)
-                await asyncio.sleep(0.5)
+            self._queue_reply(update, f"✅ {total} article(s) trouvé(s)!")
 
             if self.channel_id:
                 await self._broadcast_to_channel(items, context)
@@ -171,15 +223,89 @@ class AdvancedVintedBot:
             logger.error(f"Error in search_keyword: {e}")
             await update.message.reply_text(f"❌ Erreur: {e}")
 
+    def _queue_reply(self, update: Update, text: str):
+        """Reply through the delivery queue so the text lands after the items queued before it"""
+        self.delivery.enqueue(update.effective_chat.id, lambda: update.message.reply_text(text),
+                              priority=PRIORITY_DIRECT)
+
+    async def _stream_results(self, update: Update, context, results, keyword_count: int,
+                              send_limit: int, keep: int = 20) -> Tuple[List[Item], int]:
+        """
+        Send each keyword's best new items as soon as its search finishes,
+        sharing send_limit across keywords. Returns the best `keep` items
+        across all keywords (deduplicated, best first) and the unique item count.
+        """
+        chat_id = update.effective_chat.id
+        per_keyword = max(1, -(-send_limit // max(1, keyword_count)))
+        merger = TopKMerger(max(keep, send_limit))
+        unique_ids = set()
+        sent = 0
+
+        async for keyword, items in results:
+            unique_ids.update(item.id for item in items)
+            added = merger.add(items, keyword)
+            if sent >= send_limit or not added:
+                continue
+
+            best = sorted(added, key=lambda item: item.profit_potential, reverse=True)
+            best = best[:min(per_keyword, send_limit - sent)]
+            await self._send_items(chat_id, best, context)
+            sent += len(best)
+
+        return merger.results()[:keep], len(unique_ids)
+
     async def stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
             stats = await self.db.get_stats()
+            dedup = self.sent_items.stats()
+            loop_lag = self.loop_monitor.stats()
+            db_calls = self.db.get_call_stats()
+            delivery = self.delivery.stats()
+            rendering = self.renderer.stats()
+            photos = self.photos.stats()
+            local = await self.db.get_local_stats()
+            transfer = self.scraper.transfer.stats()
+            searches = self.scraper.stats()
 
             stats_text = (
                 "📊 STATISTIQUES\n\n"
                 f"📦 Articles trouvés: {stats['total_found']}\n"
                 f"💾 En base de données: {stats['total_tracked']}\n"
-                f"💰 Profit moyen: {stats['avg_profit']}€\n\n"
+                f"💰 Profit moyen: {stats['avg_profit']}€\n"
+            )
+
+            for title, entries in (("🏷️ Top marques", stats['by_brand']),
+                                   ("📂 Top catégories", stats['by_category']),
+                                   ("🔑 Top mots-clés", stats['by_keyword'])):
+                if entries:
+                    stats_text += f"\n{title}:\n"
+                    for entry in entries[:3]:
+                        stats_text += f"• {entry['name'] or 'N/A'}: {entry['count']} (moy. +{entry['avg_profit']}€)\n"
+
+            stats_text += (
+                f"\n🧠 Anti-doublons: {dedup['entries']} entrées, "
+                f"{dedup['memory_bytes'] // 1024} Ko, "
+                f"faux positifs {dedup['false_positive_rate']:.4%}\n"
+                f"⏱️ Boucle: p99 {loop_lag['p99_ms']}ms, max {loop_lag['max_ms']}ms\n"
+                f"🗄️ Base: {db_calls['calls']} requêtes, moy. {db_calls['avg_ms']}ms, "
+                f"{db_calls['timeouts']} timeout(s)\n"
+            )
+            if local is not None:
+                stats_text += (
+                    f"💽 Miroir local: {local['items']} articles, "
+                    f"{local['pending_tracked'] + local['pending_found'] + local['pending_prices']} "
+                    f"en attente de synchro\n"
+                )
+            stats_text += (
+                f"📬 Envois: {delivery['sent']} envoyés, {delivery['depth']} en attente, "
+                f"p95 {delivery['p95_latency_s']}s\n"
+                f"🖼️ Rendus: {rendering['entries']} en cache, {rendering['hit_rate']}% réutilisés\n"
+                f"📷 Photos: {photos['cached']} file_id en cache, {photos['hit_rate']}% réutilisées, "
+                f"{photos['skipped']} envoi(s) évité(s)\n"
+                f"🌐 Réseau: {transfer['wire_bytes'] // 1024} Ko reçus pour {transfer['decoded_bytes'] // 1024} Ko "
+                f"de JSON (-{transfer['saved_percent']}%), {transfer['not_modified']} réponse(s) 304\n"
+                f"🔎 Recherches: {searches['searches']} ({searches['errors']} erreur(s)), moy. {searches['avg_search_ms']}ms, "
+                f"{searches['opportunities']} opportunité(s) sur {searches['listings']} annonces\n\n"
                 "Continuez à faire des recherches!"
             )
 
@@ -189,96 +315,419 @@ class AdvancedVintedBot:
             logger.error(f"Error getting stats: {e}")
             await update.message.reply_text(f"❌ Erreur: {e}")
 
-    async def _send_item_message(self, chat_id, item: Dict, context):
+    async def recent(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         try:
-            text = (
-                f"🔥 OPPORTUNITÉ DÉTECTÉE\n\n"
-                f"📦 {item['title']}\n"
-                f"👨‍💼 Marque: {item['brand']}\n"
-                f"💰 Prix Vinted: {item['price']}€\n"
-                f"📈 Prix marché estimé: {item['market_price']}€\n"
-                f"📉 Réduction: {item['discount_percent']}%\n"
-                f"💵 Profit potentiel: +{item['profit_potential']}€\n"
-                f"📏 Taille: {item['size']}\n"
-                f"⭐ État: {item['condition']}\n"
-                f"👤 Vendeur: {item['seller']}\n"
-                f"⭐ Note: {item['seller_rating']}%\n"
-                f"📂 Catégorie: {item['category']}\n\n"
-                f"🔗 {item['url']}"
+            hours = float(context.args[0]) if context.args else 24
+            items = await self.db.get_recent_items(hours=hours, limit=10)
+
+            if not items:
+                await update.message.reply_text(f"Aucune affaire sur les dernières {hours:g}h")
+                return
+
+            text = f"🕒 DERNIÈRES AFFAIRES ({hours:g}h)\n\n" + "\n".join(
+                self._format_item_line(item) for item in items
             )
+            await update.message.reply_text(truncate(text, MESSAGE_LIMIT), disable_web_page_preview=True)
 
-            keyboard = [
-                [InlineKeyboardButton("Voir l'annonce", url=item['url'])],
-                [InlineKeyboardButton("Copier le prix", callback_data=f"copy_{item['price']}")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            if item.get('image_url'):
-                try:
-                    await context.bot.send_photo(
-                        chat_id=chat_id,
-                        photo=item['image_url'],
-                        caption=text[:1024],
-                        reply_markup=reply_markup
-                    )
-                except:
-                    await context.bot.send_message(chat_id, text, reply_markup=reply_markup)
-            else:
-                await context.bot.send_message(chat_id, text, reply_markup=reply_markup)
+        except ValueError:
+            await update.message.reply_text("Usage: /recent [heures]")
+        except Exception as e:
+            logger.error(f"Error getting recent items: {e}")
+            await update.message.reply_text(f"❌ Erreur: {e}")
+
+    async def top_brands(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        try:
+            days = float(context.args[0]) if context.args else 7
+            brands = await self.db.get_top_brands(days=days, limit=10)
+
+            if not brands:
+                await update.message.reply_text(f"Aucune marque trouvée sur les {days:g} derniers jours")
+                return
 
-            item_id = item['id']
-            if item_id not in self.sent_items:
-                await self.db.add_tracked_item(item)
-                await self.db.log_found_item(item, 'manual_search')
-                self.sent_items.add(item_id)
+            text = f"🏷️ TOP MARQUES ({days:g} jours)\n\n" + "\n".join(
+                f"{rank}. {brand['name']}: {brand['count']} article(s), "
+                f"moy. +{brand['avg_profit']}€, max +{brand['max_profit']}€"
+                for rank, brand in enumerate(brands, 1)
+            )
+            await update.message.reply_text(text)
 
+        except ValueError:
+            await update.message.reply_text("Usage: /top_brands [jours]")
         except Exception as e:
-            logger.error(f"Error sending item message: {e}")
+            logger.error(f"Error getting top brands: {e}")
+            await update.message.reply_text(f"❌ Erreur: {e}")
 
-    async def _broadcast_to_channel(self, items: List[Dict], context):
-        if not self.channel_id:
+    async def brand(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not context.args:
+            await update.message.reply_text("Usage: /brand <marque>\nExemple: /brand louis vuitton")
             return
 
+        name = ' '.join(context.args)
         try:
-            for item in items[:10]:
-                if item['id'] in self.sent_items:
-                    continue
+            items = await self.db.get_items_by_brand(name, limit=10)
+
+            if not items:
+                await update.message.reply_text(f"Aucun article {name} enregistré")
+                return
 
-                text = (
-                    f"🔥 AFFAIRE DÉTECTÉE!\n\n"
-                    f"📦 {item['title']}\n"
-                    f"💰 Prix: {item['price']}€ → {item['market_price']}€\n"
-                    f"💵 Profit: +{item['profit_potential']}€\n"
-                    f"📉 -{item['discount_percent']}%"
+            text = f"🔎 {name.upper()}\n"
+            prices = self.db.get_price_stats('brand', items[0].get('brand') or name)
+            if prices:
+                text += (
+                    f"💶 Prix médian {prices['median']}€ (p25 {prices['p25']}€ – p75 {prices['p75']}€), "
+                    f"{prices['count']} prix observés\n"
                 )
+            text += "\n" + "\n".join(self._format_item_line(item) for item in items)
+            await update.message.reply_text(truncate(text, MESSAGE_LIMIT), disable_web_page_preview=True)
 
-                keyboard = [[InlineKeyboardButton("Voir", url=item['url'])]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
+        except Exception as e:
+            logger.error(f"Error getting items by brand: {e}")
+            await update.message.reply_text(f"❌ Erreur: {e}")
 
-                try:
-                    await context.bot.send_message(
-                        chat_id=self.channel_id,
-                        text=text,
-                        reply_markup=reply_markup
-                    )
+    async def trends(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        brands = [brand.strip().lower() for brand in ' '.join(context.args).split(',') if brand.strip()] or None
+        try:
+            timeline = PriceSyncAnalyzer.get_price_timeline(self.db.price_stats, brands)
 
-                    await self.db.add_broadcast(item['id'], self.channel_id, 0)
-                    self.sent_items.add(item['id'])
-                    await asyncio.sleep(0.3)
+            if not timeline:
+                await update.message.reply_text("Pas encore assez de prix observés")
+                return
 
-                except Exception as e:
-                    logger.error(f"Error broadcasting item: {e}")
+            top = sorted(timeline.items(), key=lambda entry: entry[1]['observations'], reverse=True)[:15]
+            text = "📈 TENDANCES DE PRIX\n\n" + "\n".join(
+                f"{'📈' if summary['trend'] == 'up' else '📉'} {brand}: médiane {summary['median']}€ "
+                f"(p25 {summary['p25']}€ – p75 {summary['p75']}€), "
+                f"{summary['first_seen_price']}€ → {summary['latest_price']}€, "
+                f"{summary['observations']} prix observés"
+                for brand, summary in top
+            )
+            await update.message.reply_text(truncate(text, MESSAGE_LIMIT))
+
+        except Exception as e:
+            logger.error(f"Error getting price trends: {e}")
+            await update.message.reply_text(f"❌ Erreur: {e}")
+
+    async def history(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not context.args:
+            await update.message.reply_text("Usage: /history <id Vinted>\nExemple: /history 3456789012")
+            return
+
+        vinted_id = context.args[0].rstrip('/').rsplit('/', 1)[-1].split('-', 1)[0]
+        try:
+            timeline = await self.db.get_item_price_history(vinted_id)
+
+            if not timeline:
+                await update.message.reply_text(f"Aucun prix enregistré pour l'article {vinted_id}")
+                return
+
+            text = f"🕒 HISTORIQUE DE PRIX {vinted_id}\n\n" + "\n".join(
+                f"• {entry['recorded_at'][:16].replace('T', ' ')}: {entry['price']}€"
+                + (f" (avant {entry['previous_price']}€)" if entry['previous_price'] is not None else "")
+                for entry in timeline
+            )
+            await update.message.reply_text(truncate(text, MESSAGE_LIMIT))
+
+        except Exception as e:
+            logger.error(f"Error getting price history: {e}")
+            await update.message.reply_text(f"❌ Erreur: {e}")
+
+    @staticmethod
+    def _format_item_line(item: Dict) -> str:
+        """One line per tracked_items row, as returned by the DatabaseManager queries"""
+        return (
+            f"• {item['title']} ({item.get('brand') or 'N/A'})\n"
+            f"  {item['price']}€ → +{item.get('profit_margin', 0)}€ {item.get('url') or ''}"
+        )
+
+    @staticmethod
+    def _format_item_text(item: Item) -> str:
+        return (
+            f"🔥 OPPORTUNITÉ DÉTECTÉE\n\n"
+            f"📦 {item.title}\n"
+            f"👨‍💼 Marque: {item.brand}\n"
+            f"💰 Prix Vinted: {item.price}€\n"
+            f"📈 Prix marché estimé: {item.market_price}€\n"
+            f"📉 Réduction: {item.discount_percent}%\n"
+            f"💵 Profit potentiel: +{item.profit_potential}€\n"
+            f"📏 Taille: {item.size}\n"
+            f"⭐ État: {item.condition}\n"
+            f"👤 Vendeur: {item.seller}\n"
+            f"⭐ Note: {item.seller_rating}%\n"
+            f"📂 Catégorie: {item.category}\n\n"
+            f"🔗 {item.url}"
+        )
+
+    @staticmethod
+    def _item_keyboard(item: Item) -> InlineKeyboardMarkup:
+        return InlineKeyboardMarkup([
+            [InlineKeyboardButton("Voir l'annonce", url=item.url)],
+            [InlineKeyboardButton("Copier le prix", callback_data=f"copy_{item.price}")]
+        ])
+
+    async def _send_item_message(self, chat_id, item: Item, context):
+        rendered = self.renderer.render('opportunity', item)
+
+        if item.image_url:
+            message = await self.photos.send(
+                context.bot, chat_id, item.image_url, rendered.caption, rendered.reply_markup
+            )
+            if message is not None:
+                return message
+
+        return await context.bot.send_message(chat_id, rendered.text, reply_markup=rendered.reply_markup)
+
+    async def _send_items(self, chat_id, items: List[Item], context, keyword: str = 'manual_search'):
+        """Queue the items for delivery and record them in the background; returns one future per item"""
+        futures = [
+            self.delivery.enqueue(
+                chat_id,
+                lambda item=item: self._send_item_message(chat_id, item, context),
+                priority=PRIORITY_DIRECT
+            )
+            for item in items
+        ]
+
+        context.application.create_task(self._record_items(items, keyword))
+        return futures
+
+    async def _record_items(self, items: List[Item], keyword: str):
+        new_items = [item for item in items if f"tracked:{item.id}" not in self.sent_items]
+        if not new_items:
+            return
+
+        for item in new_items:
+            self.sent_items.add(f"tracked:{item.id}")
+
+        await asyncio.gather(
+            self.db.add_tracked_items_bulk(new_items),
+            self.db.log_found_items_bulk(new_items, keyword)
+        )
+
+    @staticmethod
+    def _format_channel_text(item: Item, best_platform: str = None, best_profit: float = 0) -> str:
+        text = (
+            f"🔥 AFFAIRE DÉTECTÉE!\n\n"
+            f"📦 {item.title}\n"
+            f"💰 Prix: {item.price}€ → {item.market_price}€\n"
+            f"💵 Profit: +{item.profit_potential}€\n"
+            f"📉 -{item.discount_percent}%"
+        )
+        if best_platform:
+            text += f"\n🎯 Revente: {best_platform.upper()} (+{best_profit}€)"
+        return text
+
+    @staticmethod
+    def _channel_keyboard(item: Item) -> InlineKeyboardMarkup:
+        return InlineKeyboardMarkup([[InlineKeyboardButton("Voir", url=item.url)]])
+
+    async def _send_channel_message(self, rendered: Rendered, context):
+        return await context.bot.send_message(
+            chat_id=self.channel_id,
+            text=rendered.text,
+            reply_markup=rendered.reply_markup
+        )
+
+    async def _broadcast_to_channel(self, items: List[Item], context):
+        if not self.channel_id:
+            return
+
+        queued = []
+        items = self._with_retries(f"channel:{self.channel_id}:", items)
+
+        try:
+            pricing = PriceSyncAnalyzer.analyze_batch(items)
+
+            for index in pricing.rank('profit', limit=10):
+                item = items[index]
+                broadcast_key = f"channel:{self.channel_id}:{item.id}"
+                if broadcast_key in self.sending or broadcast_key in self.sent_items:
+                    continue
+
+                rendered = self.renderer.render(
+                    'channel', item,
+                    best_platform=pricing.best_platform(index),
+                    best_profit=round(float(pricing.best_profits[index]), 2)
+                )
+
+                future = self.delivery.enqueue(
+                    self.channel_id,
+                    lambda rendered=rendered: self._send_channel_message(rendered, context),
+                    priority=PRIORITY_BROADCAST
+                )
+                queued.append((item, future))
+                self._mark_sent_on_delivery(broadcast_key, future, self.channel_id, item)
+
+            if queued:
+                context.application.create_task(self._record_broadcasts(queued))
 
         except Exception as e:
             logger.error(f"Error in broadcast: {e}")
 
+    def _with_retries(self, key_prefix: str, items: List[Item]) -> List[Item]:
+        """Failed messages under key_prefix that are still unsent, ahead of the items not among them"""
+        retries = []
+        for sent_key, (_, item, _) in list(self.failed_alerts.items()):
+            if not sent_key.startswith(key_prefix):
+                continue
+            if sent_key in self.sent_items:
+                del self.failed_alerts[sent_key]
+            else:
+                retries.append(item)
+
+        retried = {item.id for item in retries}
+        return retries + [item for item in items if item.id not in retried]
+
+    def _mark_sent_on_delivery(self, sent_key: str, future: asyncio.Future, chat_id, item: Item):
+        """
+        Record sent_key once its message is delivered. A failed message is kept
+        in failed_alerts for the next results, unless Telegram rejected it for
+        good or it already failed retry_cycles times.
+        """
+        failures = self.failed_alerts.pop(sent_key, (None, None, 0))[2]
+        self.sending.add(sent_key)
+
+        def done(future: asyncio.Future):
+            self.sending.discard(sent_key)
+            error = future.exception() if not future.cancelled() else asyncio.CancelledError()
+            if error is None:
+                self.sent_items.add(sent_key)
+            elif isinstance(error, (BadRequest, Forbidden)):
+                logger.warning(f"Message {sent_key} rejected by Telegram, not retrying: {error}")
+            elif failures + 1 < self.retry_cycles:
+                self.failed_alerts[sent_key] = (chat_id, item, failures + 1)
+            else:
+                logger.warning(f"Giving up on message {sent_key} after {failures + 1} failed attempt(s)")
+
+        future.add_done_callback(done)
+
+    async def _record_broadcasts(self, queued):
+        results = await asyncio.gather(*(future for _, future in queued), return_exceptions=True)
+        broadcasted = [
+            (item, message.message_id)
+            for (item, _), message in zip(queued, results)
+            if not isinstance(message, BaseException)
+        ]
+        if not broadcasted:
+            return
+
+        tracked_ids = await self.db.add_tracked_items_bulk([item for item, _ in broadcasted])
+        await self.db.add_broadcasts_bulk([
+            {'item_id': tracked_id, 'channel_id': self.channel_id, 'message_id': message_id}
+            for (item, message_id), tracked_id in zip(broadcasted, tracked_ids)
+            if tracked_id
+        ])
+
+    async def hunt(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        self.hunt_chat_id = update.effective_chat.id
+        self.hunt_context = context
+
+        if self.hunter.start():
+            await update.message.reply_text(
+                f"🎯 Chasse lancée: {len(self.hunter.sweeps)} mots-clés surveillés en continu"
+            )
+        else:
+            await update.message.reply_text("🎯 La chasse est déjà en cours, les résultats arrivent ici")
+
+    async def pause_hunt(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if self.hunter.pause():
+            await update.message.reply_text("⏸️ Chasse en pause, /hunt pour reprendre")
+        else:
+            await update.message.reply_text("La chasse n'est pas en cours")
+
     async def stop_search(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        global SEARCH_RUNNING
-        SEARCH_RUNNING = False
+        await self.hunter.stop()
+        self.hunt_chat_id = None
         await update.message.reply_text("⏹️ Recherches arrêtées")
 
+    async def hunt_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        stats = self.hunter.stats()
+        states = {'running': 'en cours', 'paused': 'en pause', 'stopped': 'arrêtée'}
+
+        text = (
+            f"🎯 CHASSE: {states[stats['state']]}\n\n"
+            f"🔁 {stats['rounds']} tours, {stats['runs']} recherches, {stats['found']} affaires\n"
+            f"🔑 {stats['sweeps']} mots-clés, {stats['restarts']} redémarrage(s)\n"
+        )
+        if stats['top']:
+            text += "\n📈 Plus productifs:\n"
+            for sweep in stats['top']:
+                text += (
+                    f"• {sweep['keyword']}: {sweep['hit_rate']}% de succès, {sweep['found']} trouvé(s), "
+                    f"toutes les {sweep['interval_s'] // 60} min, {sweep['avg_duration_s']}s/recherche\n"
+                )
+
+        await update.message.reply_text(text)
+
+    async def _on_hunt_results(self, sweep: Sweep, items: List[Item]):
+        context = self.hunt_context
+        if context is None:
+            return
+
+        if self.hunt_chat_id:
+            hunt_items = self._with_retries(f"hunt:{self.hunt_chat_id}:", items)
+            keys = {item.id: f"hunt:{self.hunt_chat_id}:{item.id}" for item in hunt_items}
+            merger = TopKMerger(self.hunt_send_limit)
+            merger.add((item for item in hunt_items
+                        if keys[item.id] not in self.sending and keys[item.id] not in self.sent_items),
+                       keyword=sweep.keyword)
+            new_items = merger.results()
+            if merger.dropped:
+                logger.info(f"Hunt '{sweep.keyword}': sending the best {len(new_items)} deal(s), "
+                            f"{merger.dropped} over the per-sweep limit")
+            if new_items:
+                futures = await self._send_items(self.hunt_chat_id, new_items, context, keyword=sweep.keyword)
+                for item, future in zip(new_items, futures):
+                    self._mark_sent_on_delivery(keys[item.id], future, self.hunt_chat_id, item)
+
+        if self.channel_id:
+            await self._broadcast_to_channel(items, context)
+
+    async def revisit_tracked(self, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Re-price recently tracked listings: hunter sweeps poll incrementally and
+        never return a listing twice, so without this price changes after the
+        first sighting would only show up in manual searches
+        """
+        tracked = await self.db.get_recent_items(
+            hours=float(os.getenv('PRICE_REVISIT_HOURS', 72)),
+            limit=int(os.getenv('PRICE_REVISIT_BATCH', 50))
+        )
+        item_ids = [row['vinted_id'] for row in tracked if row.get('vinted_id')]
+        if item_ids:
+            items = await self.scraper.revisit(item_ids)
+            logger.info(f"Revisited {len(items)}/{len(item_ids)} tracked listing(s)")
+
+    async def _on_startup(self, app: Application):
+        self.loop_monitor.start()
+        self.delivery.start()
+        self.db.start_sync(float(os.getenv('LOCAL_SYNC_INTERVAL', 60)))
+
+        # Without a chat to report to, an autostarted hunter only feeds the channel
+        if self.channel_id and os.getenv('HUNTER_AUTOSTART', '').lower() in ('1', 'true', 'yes'):
+            self.hunt_context = app.context_types.context(app)
+            self.hunter.start()
+
+    async def _on_stop(self, app: Application):
+        # Stop producing and drain while the bot can still send: post_shutdown
+        # runs after its HTTP client is closed
+        await self.hunter.stop()
+        await self.delivery.stop()
+
+    async def _on_shutdown(self, app: Application):
+        await self.loop_monitor.stop()
+        await self.db.close()
+        self.sent_items.save()
+        await self.scraper.close()
+
     def run(self):
-        app = Application.builder().token(self.token).build()
+        app = (
+            Application.builder()
+            .token(self.token)
+            .post_init(self._on_startup)
+            .post_stop(self._on_stop)
+            .post_shutdown(self._on_shutdown)
+            .build()
+        )
 
         app.add_handler(CommandHandler("start", self.start))
         app.add_handler(CommandHandler("help", self.help_command))
@@ -287,8 +736,20 @@ class AdvancedVintedBot:
         app.add_handler(CommandHandler("search", self.search_keyword))
         app.add_handler(CommandHandler("set_channel", self.set_channel))
         app.add_handler(CommandHandler("stats", self.stats))
+        app.add_handler(CommandHandler("recent", self.recent))
+        app.add_handler(CommandHandler("top_brands", self.top_brands))
+        app.add_handler(CommandHandler("brand", self.brand))
+        app.add_handler(CommandHandler("trends", self.trends))
+        app.add_handler(CommandHandler("history", self.history))
+        app.add_handler(CommandHandler("hunt", self.hunt))
+        app.add_handler(CommandHandler("pause", self.pause_hunt))
+        app.add_handler(CommandHandler("hunt_stats", self.hunt_stats))
         app.add_handler(CommandHandler("stop", self.stop_search))
 
+        revisit_interval = float(os.getenv('PRICE_REVISIT_MINUTES', 60)) * 60
+        if revisit_interval > 0:
+            app.job_queue.run_repeating(self.revisit_tracked, interval=revisit_interval, first=revisit_interval)
+
         logger.info("Advanced Bot started!")
         app.run_polling(allowed_updates=Update.ALL_TYPES)
 
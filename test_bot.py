@@ -28,11 +28,11 @@ async def test_scraper():
         if items:
             print("\n3. Exemple d'article détecté:")
             item = items[0]
-            print(f"   📦 Titre: {item['title']}")
-            print(f"   💰 Prix: {item['price']}€")
-            print(f"   📉 Réduction: {item['discount_percent']}%")
-            print(f"   💵 Profit potentiel: +{item['profit_potential']}€")
-            print(f"   🔗 {item['url']}")
+            print(f"   📦 Titre: {item.title}")
+            print(f"   💰 Prix: {item.price}€")
+            print(f"   📉 Réduction: {item.discount_percent}%")
+            print(f"   💵 Profit potentiel: +{item.profit_potential}€")
+            print(f"   🔗 {item.url}")
 
         print("\n4. Dépendances Python...")
         try:
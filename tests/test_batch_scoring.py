@@ -0,0 +1,31 @@
+import pytest
+
+from advanced_scraper import AdvancedVintedScraper
+from benchmark import make_catalog_items
+from market_model import MarketPriceModel
+from vinted_scraper import VintedScraper
+
+
+def comparable(items):
+    return [{k: v for k, v in item.to_dict().items() if k != 'posted_at'} for item in items]
+
+
+@pytest.mark.parametrize('scraper_class', [VintedScraper, AdvancedVintedScraper])
+@pytest.mark.parametrize('history', [0, 5000])
+def test_batch_matches_per_item_path(scraper_class, history):
+    scraper = scraper_class(market_model=MarketPriceModel(seed=1))
+    scraper._observe(make_catalog_items(history, seed=3))
+    raw_items = make_catalog_items(2000) + [{'id': 1, 'price': 'n/a'}, {'id': 2, 'price': None}]
+
+    per_item = [scraper._process_item(raw) for raw in raw_items]
+    per_item = [item for item in per_item if item is not None]
+
+    assert comparable(scraper.batch_scorer.price(raw_items)) == comparable(per_item)
+    assert comparable(scraper.batch_scorer.score(raw_items)) == comparable(
+        [item for item in per_item if scraper.deal_filter.accepts(item)])
+
+
+def test_empty_page():
+    scraper = VintedScraper(market_model=MarketPriceModel())
+    assert scraper.batch_scorer.score([]) == []
+    assert scraper.batch_scorer.price([]) == []
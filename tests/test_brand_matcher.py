@@ -0,0 +1,123 @@
+import re
+import random
+
+import pytest
+
+import advanced_scraper
+import config
+from advanced_scraper import OPPORTUNITY_MATCHER
+from brand_matcher import CATEGORY_KEYWORDS, KeywordMatcher, tiered_table, trie_pattern
+from price_sync_analyzer import PriceSyncAnalyzer
+from vinted_scraper import DEAL_MATCHER
+
+CATEGORIES = tiered_table([(words, category) for category, words in CATEGORY_KEYWORDS])
+
+# Each production matcher with the tables it was built from
+MATCHERS = [
+    (DEAL_MATCHER, {
+        'multiplier': tiered_table([(config.PREMIUM_BRANDS, 3.0), (config.MID_TIER_BRANDS, 2.0)]),
+        'condition_bonus': tiered_table([(['neuf', 'jamais porté'], 0.5)]),
+        'category': CATEGORIES,
+    }),
+    (OPPORTUNITY_MATCHER, {
+        'multiplier': tiered_table([
+            (advanced_scraper.ULTRA_LUXURY_BRANDS, 4.0),
+            (advanced_scraper.LUXURY_BRANDS, 3.5),
+            (advanced_scraper.PREMIUM_BRANDS, 3.0),
+            (advanced_scraper.MID_TIER_BRANDS, 2.0),
+        ]),
+        'condition_bonus': tiered_table([(['neuf', 'jamais porté', 'new'], 0.8), (['excellent', 'comme neuf'], 0.5)]),
+        'category': CATEGORIES,
+    }),
+    (PriceSyncAnalyzer.MATCHER, {
+        'condition_factor': list(PriceSyncAnalyzer.CONDITION_FACTORS.items()),
+        'brand_multiplier': (list(PriceSyncAnalyzer.ULTRA_LUXURY_MULTIPLIERS.items())
+                             + list(PriceSyncAnalyzer.LUXURY_MULTIPLIERS.items())
+                             + list(PriceSyncAnalyzer.PREMIUM_MULTIPLIERS.items())),
+    }),
+]
+
+WORDS = [
+    'gucci', 'louis vuitton', 'nike', 'air', 'neuf', 'comme neuf', 'jamais porté', 'excellent', 'new',
+    'sac', 'sneaker', 'sneakers', 'baskets', 'hoodie', 't-shirt', 'tee', 'jeans', 'montre', 'h&m',
+    'off-white', 'vintage', 'zara', 'prada', 'bag', 'backpack', 'noir', 'taille m', 'NEUF', 'Sac',
+    'très bon état', 'bon état', 'satisfaisant', 'neuf avec étiquette',
+]
+BRANDS = ['', 'Gucci', 'Nike', 'Zara', 'H&M', 'Louis Vuitton', 'Off-White', 'Sans marque', 'Prada neuf', 'Chanel']
+
+
+def expected(matcher: KeywordMatcher, tables, title: str, brand: str):
+    """The chain of any(pattern in text ...) checks the matcher replaces"""
+    fields = {'title': (title or '').lower(), 'brand': (brand or '').lower()}
+    fields['any'] = f"{fields['brand']}\n{fields['title']}"
+    return {
+        name: next((value for pattern, value in table if pattern.lower() in fields[matcher.scopes[name]]), None)
+        for name, table in tables.items()
+    }
+
+
+def random_listings(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [(' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 6))), rng.choice(BRANDS))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize('matcher, tables', MATCHERS)
+def test_match_equals_any_chain(matcher, tables):
+    assert matcher.tables == list(tables)
+    for title, brand in random_listings(3000):
+        assert matcher.match(title, brand) == expected(matcher, tables, title, brand), (title, brand)
+
+
+@pytest.mark.parametrize('matcher', [matcher for matcher, _ in MATCHERS])
+def test_match_many_equals_match(matcher):
+    listings = random_listings(2000, seed=2)
+    titles = [title for title, _ in listings]
+    brands = [brand for _, brand in listings]
+
+    columns = matcher.match_many(titles, brands)
+
+    for row, (title, brand) in enumerate(listings):
+        assert {name: values[row] for name, values in columns.items()} == matcher.match(title, brand)
+
+
+def test_match_many_empty_and_missing_fields():
+    assert DEAL_MATCHER.match_many([], []) == {name: [] for name in DEAL_MATCHER.tables}
+
+    columns = DEAL_MATCHER.match_many([None, ''], [None, 'Gucci'])
+    assert columns['multiplier'] == [None, 3.0]
+
+
+def test_earlier_entry_wins_over_longer_match():
+    # 'neuf' is listed before 'comme neuf', so a title with both still gets the 'neuf' bonus
+    assert OPPORTUNITY_MATCHER.match('sac comme neuf')['condition_bonus'] == 0.8
+    assert OPPORTUNITY_MATCHER.match('excellent état')['condition_bonus'] == 0.5
+
+
+def test_scopes_restrict_fields():
+    matcher = KeywordMatcher(
+        {'brand': [('nike', 'nike')], 'title': [('nike', 'title')], 'any': [('nike', 'any')]},
+        scopes={'brand': 'brand', 'title': 'title'}
+    )
+    assert matcher.match('air max', 'Nike') == {'brand': 'nike', 'title': None, 'any': 'any'}
+    assert matcher.match('nike air', '') == {'brand': None, 'title': 'title', 'any': 'any'}
+
+
+def test_overlapping_patterns_all_reported():
+    matcher = KeywordMatcher({
+        'short': [('tee', 'short')],
+        'long': [('t-shirt', 'long'), ('shirt', 'shirt')],
+    })
+    assert matcher.match('t-shirt') == {'short': None, 'long': 'long'}
+    assert matcher.match('teeshirt') == {'short': 'short', 'long': 'shirt'}
+
+
+def test_trie_pattern_prefers_longest_word():
+    regex = re.compile(trie_pattern(['sac', 'sac à dos', 'sa']))
+    assert regex.match('sac à dos').group(0) == 'sac à dos'
+    assert regex.match('sac').group(0) == 'sac'
+    assert regex.match('sa').group(0) == 'sa'
+
+
+def test_tiered_table_keeps_order():
+    assert tiered_table([(['a', 'b'], 1), (['c'], 2)]) == [('a', 1), ('b', 1), ('c', 2)]
@@ -0,0 +1,115 @@
+import sqlite3
+import types
+
+import pytest
+
+import dedup_index
+from dedup_index import BloomFilter, DedupIndex
+
+HOUR = 3600
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the time module seen by dedup_index; advance with clock.now += seconds"""
+    fake = types.SimpleNamespace(now=1_000_000.0)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(dedup_index, 'time', fake)
+    return fake
+
+
+def test_keys_expire_after_ttl(clock):
+    index = DedupIndex(ttl_hours=1, bloom_capacity=0)
+    index.add('a')
+
+    clock.now += HOUR - 1
+    assert 'a' in index
+
+    clock.now += 2
+    assert 'a' not in index
+    assert len(index) == 0
+
+
+def test_lru_eviction_keeps_recently_used_keys(clock):
+    index = DedupIndex(max_entries=2, bloom_capacity=0)
+    index.add('a')
+    index.add('b')
+    assert 'a' in index  # now the most recently used
+    index.add('c')
+
+    assert len(index) == 2
+    assert 'a' in index and 'c' in index
+    assert 'b' not in index
+
+
+def test_evicted_keys_move_to_bloom_filter(clock):
+    index = DedupIndex(max_entries=2, bloom_capacity=1000)
+    for key in 'abc':
+        index.add(key)
+
+    assert len(index) == 2
+    assert 'a' in index
+    assert index.bloom_hits == 1
+    assert index.stats()['bloom_entries'] == 1
+
+
+def test_bloom_generations_rotate_at_ttl(clock):
+    index = DedupIndex(max_entries=1, ttl_hours=1, bloom_capacity=1000)
+    index.add('old')
+    index.add('recent')  # evicts 'old' into the current generation
+
+    # Past the TTL the current generation becomes the previous one: still remembered
+    clock.now += HOUR + 1
+    assert 'old' in index
+
+    index.add('newer')  # evicts 'recent' into the fresh generation
+    clock.now += HOUR + 1
+    assert 'old' not in index
+    assert 'recent' in index
+
+
+def test_snapshot_round_trip(clock, tmp_path):
+    path = str(tmp_path / 'sent.sqlite3')
+    index = DedupIndex(max_entries=2, ttl_hours=1, snapshot_path=path, bloom_capacity=1000, autosave_every=0)
+    for key in ('a', 'b', 'c'):
+        index.add(key)
+        clock.now += 1
+    index.save()
+
+    loaded = DedupIndex(max_entries=2, ttl_hours=1, snapshot_path=path, bloom_capacity=1000)
+    loaded.load()
+    assert len(loaded) == 2
+    assert all(key in loaded for key in ('a', 'b', 'c'))
+
+    # Expired rows are neither loaded nor kept by the next save
+    clock.now += HOUR + 1
+    loaded.add('d')
+    loaded.save()
+    conn = sqlite3.connect(path)
+    assert [key for key, in conn.execute('SELECT key FROM dedup_entries')] == ['d']
+    conn.close()
+
+
+def test_save_only_writes_changes(clock, tmp_path):
+    path = str(tmp_path / 'sent.sqlite3')
+    index = DedupIndex(snapshot_path=path, autosave_every=0)
+    index.add('a')
+    index.save()
+
+    conn = sqlite3.connect(path)
+    conn.execute('DELETE FROM dedup_entries')
+    conn.commit()
+    index.save()  # nothing changed since the last save
+    assert conn.execute('SELECT COUNT(*) FROM dedup_entries').fetchone() == (0,)
+    conn.close()
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"key{i}")
+
+    assert all(f"key{i}" in bloom for i in range(10000))
+    false_positives = sum(f"other{i}" in bloom for i in range(10000))
+    assert false_positives < 200
+    assert bloom.false_positive_rate() == pytest.approx(0.01, rel=0.2)
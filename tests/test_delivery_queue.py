@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from telegram.error import BadRequest
+
+from delivery_queue import PRIORITY_ALERT, PRIORITY_DIRECT, DeliveryQueue
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_futures_resolve_with_the_send_result():
+    async def scenario():
+        queue = DeliveryQueue(workers=2)
+        queue.start()
+
+        async def send(value):
+            return value
+
+        futures = [queue.enqueue(-100 - i, lambda i=i: send(i)) for i in range(5)]
+        results = await asyncio.gather(*futures)
+        await queue.stop()
+        return results, queue.stats()
+
+    results, stats = run(scenario())
+    assert results == [0, 1, 2, 3, 4]
+    assert stats['sent'] == 5 and stats['failed'] == 0 and stats['depth'] == 0
+
+
+def test_bad_request_fails_the_future_without_retry():
+    async def scenario():
+        queue = DeliveryQueue(workers=1)
+        queue.start()
+        attempts = []
+
+        async def send():
+            attempts.append(1)
+            raise BadRequest("Message is too long")
+
+        future = queue.enqueue(1, send)
+        with pytest.raises(BadRequest):
+            await future
+        await queue.stop()
+        return len(attempts), queue.stats()['failed']
+
+    assert run(scenario()) == (1, 1)
+
+
+def test_lower_priority_number_goes_first():
+    async def scenario():
+        queue = DeliveryQueue(workers=1)
+        order = []
+
+        async def send(label):
+            order.append(label)
+
+        # Queued before the worker starts, so the queue decides the order
+        futures = [
+            queue.enqueue(-1, lambda: send('alert'), priority=PRIORITY_ALERT),
+            queue.enqueue(-2, lambda: send('direct'), priority=PRIORITY_DIRECT),
+        ]
+        queue.start()
+        await asyncio.gather(*futures)
+        await queue.stop()
+        return order
+
+    assert run(scenario()) == ['direct', 'alert']
+
+
+def test_stop_drains_pending_messages():
+    async def scenario():
+        queue = DeliveryQueue(workers=1)
+        queue.start()
+        sent = []
+
+        async def send(i):
+            await asyncio.sleep(0.001)
+            sent.append(i)
+
+        for i in range(3):
+            queue.enqueue(-100 - i, lambda i=i: send(i))
+        await queue.stop(drain_timeout=5)
+        return sent
+
+    assert run(scenario()) == [0, 1, 2]
@@ -0,0 +1,107 @@
+import random
+
+import numpy as np
+import pytest
+
+from market_model import KLLSketch, MarketPriceModel
+
+
+def test_kll_quantiles_within_rank_error():
+    rng = random.Random(1)
+    values = [rng.uniform(0, 1000) for _ in range(50000)]
+    sketch = KLLSketch(k=128, rng=random.Random(2))
+    for value in values:
+        sketch.update(value)
+
+    values.sort()
+    assert sketch.count == len(values)
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        true_rank = np.searchsorted(values, sketch.quantile(q)) / len(values)
+        assert true_rank == pytest.approx(q, abs=0.02)
+    assert sketch.memory_bytes() < 8 * 1000
+
+
+def test_kll_ranks_match_rank():
+    sketch = KLLSketch(k=64, rng=random.Random(3))
+    for value in range(1, 5001):
+        sketch.update(float(value))
+
+    probes = np.array([-1.0, 0.0, 1.0, 100.5, 2500.0, 4999.0, 5000.0, 1e9])
+    assert sketch.ranks(probes).tolist() == [sketch.rank(value) for value in probes]
+    assert KLLSketch().ranks(probes).tolist() == [0.0] * len(probes)
+
+
+def test_kll_serialization_round_trip():
+    sketch = KLLSketch(k=32, rng=random.Random(4))
+    for value in range(1000):
+        sketch.update(float(value))
+
+    restored = KLLSketch.from_bytes(sketch.to_bytes())
+    assert restored.count == sketch.count
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+
+def trained_model(min_count=30):
+    model = MarketPriceModel(min_count=min_count, seed=5)
+    rng = random.Random(6)
+    for i in range(3000):
+        brand = rng.choice(['Gucci', 'Nike', 'Zara'])
+        model.observe(rng.uniform(10, 100), brand, rng.choice(['bags', 'shoes']),
+                      rng.choice(['Neuf', 'Bon état']), rng.choice(['S', 'M']), item_id=i)
+    return model
+
+
+def test_estimate_uses_finest_bucket_with_enough_data():
+    model = trained_model()
+
+    estimate = model.estimate(50, 'gucci', 'bags', 'neuf', 's')
+    assert estimate['level'] == 4
+    assert estimate['p25'] <= estimate['median'] <= estimate['p75']
+    assert 0 <= estimate['percentile'] <= 100
+
+    # An unseen size falls back to the (brand, category, condition) bucket
+    assert model.estimate(50, 'gucci', 'bags', 'neuf', 'xxl')['level'] == 3
+
+
+def test_no_estimate_without_a_brand_bucket():
+    model = trained_model()
+
+    # Category-only and market-wide distributions are never used
+    assert model.estimate(50, '', 'bags', 'neuf', 's') is None
+    assert model.estimate(50, 'Chanel', 'bags', 'neuf', 's') is None
+
+
+def test_repeated_listings_are_counted_once():
+    model = MarketPriceModel()
+    for _ in range(3):
+        model.observe(10, 'Nike', 'shoes', 'neuf', '42', item_id=1)
+    assert model.observed == 1
+
+
+def test_estimate_many_matches_estimate():
+    model = trained_model()
+    rng = random.Random(7)
+    buckets = [(rng.choice(['Gucci', 'nike', '', 'Chanel']), rng.choice(['bags', 'shoes']),
+                rng.choice(['Neuf', 'Bon état']), rng.choice(['S', 'M', 'XL'])) for _ in range(500)]
+    prices = np.array([rng.uniform(5, 120) for _ in buckets])
+
+    summaries, percentiles = model.estimate_many(prices, buckets)
+
+    for price, bucket, summary, percentile in zip(prices, buckets, summaries, percentiles):
+        estimate = model.estimate(float(price), *bucket)
+        if estimate is None:
+            assert summary is None and np.isnan(percentile)
+        else:
+            assert dict(summary, percentile=round(float(percentile), 1)) == estimate
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'market.sqlite3')
+    model = trained_model()
+    model.snapshot_path = path
+    model.save()
+
+    loaded = MarketPriceModel(snapshot_path=path)
+    loaded.load()
+    assert set(loaded.sketches) == set(model.sketches)
+    assert loaded.estimate(50, 'nike', 'shoes', 'neuf', 'm') == model.estimate(50, 'nike', 'shoes', 'neuf', 'm')
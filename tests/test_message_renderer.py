@@ -0,0 +1,67 @@
+from message_renderer import CAPTION_LIMIT, ELLIPSIS, MessageRenderer, telegram_length, truncate
+from item import Item
+
+
+def test_telegram_length_counts_utf16_units():
+    assert telegram_length('abc') == 3
+    assert telegram_length('é') == 1
+    # Emoji outside the BMP take a surrogate pair
+    assert telegram_length('🔥') == 2
+    assert telegram_length('👍🏽') == 4
+
+
+def test_short_text_unchanged():
+    text = "📦 Sac\n🔗 https://www.vinted.fr/items/1"
+    assert truncate(text, CAPTION_LIMIT) is text
+
+
+def test_keeps_link_line_and_fits_limit():
+    link = "🔗 https://www.vinted.fr/items/4000000000"
+    text = "🔥 AFFAIRE\n\n📦 " + "🔥" * 600 + "\n💰 Prix: 10€\n" + link
+
+    result = truncate(text, CAPTION_LIMIT)
+
+    assert telegram_length(result) <= CAPTION_LIMIT
+    assert result.endswith(ELLIPSIS + "\n" + link)
+    assert result.startswith("🔥 AFFAIRE\n\n📦 🔥")
+
+
+def test_never_splits_surrogate_pairs():
+    link = "https://www.vinted.fr/items/1"
+    for limit in range(len(link) + 4, len(link) + 40):
+        result = truncate("🔥" * 50 + "\n" + link, limit)
+        assert telegram_length(result) <= limit
+        assert result.endswith("\n" + link)
+        # A lone surrogate from a split pair can't be encoded
+        assert result.encode('utf-16-le').decode('utf-16-le') == result
+
+
+def test_drops_dangling_joiner_of_a_cut_emoji():
+    family = "👨‍👩‍👧"
+    result = truncate(family * 10, 5)
+    assert not result[:-1].endswith(('‍', '️'))
+    assert telegram_length(result) <= 5
+
+
+def test_single_line_is_cut_with_ellipsis():
+    result = truncate("x" * 100, 10)
+    assert result == "x" * 9 + ELLIPSIS
+
+
+def test_renders_once_per_item_and_price():
+    renderer = MessageRenderer(max_entries=2)
+    calls = []
+
+    def text(item):
+        calls.append(item.id)
+        return f"{item.title} {item.price}€"
+
+    renderer.register('deal', text)
+    item = Item(id=1, title='Sac', price=10.0, url='https://www.vinted.fr/items/1')
+
+    first = renderer.render('deal', item)
+    assert renderer.render('deal', item) is first
+
+    item.price = 8.0
+    assert renderer.render('deal', item).text == "Sac 8.0€"
+    assert calls == [1, 1]
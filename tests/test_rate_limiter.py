@@ -0,0 +1,63 @@
+import asyncio
+import types
+
+import pytest
+
+import rate_limiter
+from rate_limiter import AdaptiveRateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = types.SimpleNamespace(now=100.0)
+    fake.monotonic = lambda: fake.now
+    monkeypatch.setattr(rate_limiter, 'time', fake)
+    return fake
+
+
+def test_token_bucket_burst_then_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.time_until_available() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    # Idle time never fills the bucket past its capacity
+    clock.now += 60
+    assert sum(bucket.try_acquire() for _ in range(10)) == 3
+
+
+def test_aimd_adjusts_rate_and_concurrency(clock):
+    limiter = AdaptiveRateLimiter(rate=4, concurrency=8, increase_every=2)
+
+    limiter.record_throttle(retry_after=30)
+    assert limiter.bucket.rate == 2
+    assert limiter.concurrency == 4
+    assert limiter.blocked_until == clock.now + 30
+
+    limiter.record_success()
+    limiter.record_success()
+    assert limiter.bucket.rate == pytest.approx(2 + limiter.min_rate)
+    assert limiter.concurrency == 5
+
+
+def test_concurrency_limit_is_respected():
+    async def run():
+        limiter = AdaptiveRateLimiter(rate=1000, burst=1000, concurrency=2)
+        active = peak = 0
+
+        async def request():
+            nonlocal active, peak
+            async with limiter:
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(request() for _ in range(10)))
+        return peak, limiter.requests
+
+    assert asyncio.run(run()) == (2, 10)
@@ -0,0 +1,45 @@
+import pytest
+
+from item import Item
+from result_merger import TopKMerger
+
+
+def item(item_id, profit, price=10.0):
+    return Item(id=item_id, title=f"item {item_id}", price=price, url=f"https://www.vinted.fr/items/{item_id}",
+                profit_potential=profit)
+
+
+def test_keeps_the_best_k_by_profit():
+    merger = TopKMerger(3)
+    merger.add([item(i, profit) for i, profit in enumerate([5, 50, 1, 30, 20, 40])], keyword='sac')
+
+    assert [entry.id for entry in merger.results()] == [1, 5, 3]
+    assert merger.dropped == 3
+
+
+def test_duplicates_record_every_keyword():
+    merger = TopKMerger()
+    merger.add([item(1, 10)], keyword='gucci')
+    added = merger.add([item(1, 10), item(2, 5)], keyword='sac')
+
+    assert [entry.id for entry in added] == [2]
+    assert merger.results()[0].keywords == ['gucci', 'sac']
+    assert merger.duplicates == 1
+    assert 1 in merger and len(merger) == 2
+
+
+def test_ties_keep_the_earlier_item():
+    merger = TopKMerger(1)
+    merger.add([item(1, 10), item(2, 10)])
+    assert [entry.id for entry in merger.results()] == [1]
+
+
+def test_rank_by_roi():
+    merger = TopKMerger(1, rank_by='roi')
+    merger.add([item(1, 20, price=100), item(2, 10, price=10)])
+    assert merger.results()[0].id == 2
+
+
+def test_unknown_ranking_key():
+    with pytest.raises(ValueError):
+        TopKMerger(rank_by='price')
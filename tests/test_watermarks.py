@@ -0,0 +1,103 @@
+import asyncio
+
+from market_model import MarketPriceModel
+from poll_state import KeywordWatermarks
+from vinted_scraper import VintedScraper
+
+
+def listing(item_id: int, promoted: bool = False):
+    return {'id': item_id, 'title': 'sac', 'price': '10.0', 'promoted': promoted}
+
+
+class FakeCatalog:
+    """Serves newest-first pages of a fixed listing set to ScraperEngine._fetch_page"""
+
+    def __init__(self, ids, failing_pages=()):
+        self.ids = sorted(ids, reverse=True)
+        self.failing_pages = set(failing_pages)
+        self.requested = []
+
+    async def fetch_page(self, session, keyword, max_price, page=1, price_from=None, per_page=None):
+        self.requested.append(page)
+        if page in self.failing_pages:
+            return None
+        start = (page - 1) * per_page
+        return [listing(item_id) for item_id in self.ids[start:start + per_page]]
+
+
+def poll(scraper, catalog, per_page=2, max_pages=None):
+    scraper._fetch_page = catalog.fetch_page
+    catalog.requested = []
+    items = asyncio.run(scraper._fetch_new_items(None, 'sac', 50, per_page=per_page, max_pages=max_pages))
+    return [item['id'] for item in items]
+
+
+def make_scraper():
+    return VintedScraper(market_model=MarketPriceModel())
+
+
+def test_first_poll_reads_one_page_and_sets_the_mark():
+    scraper = make_scraper()
+    catalog = FakeCatalog(range(1, 11))
+
+    assert poll(scraper, catalog) == [10, 9]
+    assert catalog.requested == [1]
+    assert scraper.watermarks.get(KeywordWatermarks.key('sac', 50)) == 10
+
+
+def test_next_poll_pages_until_a_known_listing():
+    scraper = make_scraper()
+    poll(scraper, FakeCatalog(range(1, 11)))
+
+    catalog = FakeCatalog(range(1, 16))
+    assert poll(scraper, catalog) == [15, 14, 13, 12, 11]
+    assert catalog.requested == [1, 2, 3]
+    assert scraper.watermarks.get(KeywordWatermarks.key('sac', 50)) == 15
+
+    # Nothing new: the first page already reaches the mark
+    assert poll(scraper, catalog) == []
+    assert scraper.watermarks.get(KeywordWatermarks.key('sac', 50)) == 15
+
+
+def test_failed_page_keeps_the_previous_mark():
+    scraper = make_scraper()
+    poll(scraper, FakeCatalog(range(1, 11)))
+
+    # Page 2 fails: 12 and 11 were not seen, so the mark must not move past them
+    failing = FakeCatalog(range(1, 16), failing_pages={2})
+    assert poll(scraper, failing) == [15, 14]
+    assert scraper.watermarks.get(KeywordWatermarks.key('sac', 50)) == 10
+
+    # The next poll scans them again
+    assert poll(scraper, FakeCatalog(range(1, 16))) == [15, 14, 13, 12, 11]
+    assert scraper.watermarks.get(KeywordWatermarks.key('sac', 50)) == 15
+
+
+def test_scan_stops_at_max_pages_and_counts_the_overflow():
+    scraper = make_scraper()
+    poll(scraper, FakeCatalog(range(1, 3)))
+
+    catalog = FakeCatalog(range(1, 20))
+    assert poll(scraper, catalog, max_pages=3) == [19, 18, 17, 16, 15, 14]
+    assert catalog.requested == [1, 2, 3]
+    assert scraper.truncated_scans == 1
+
+
+def test_promoted_listings_dont_end_the_scan():
+    watermarks = KeywordWatermarks()
+    items = [listing(20), listing(3, promoted=True), listing(19), listing(5), listing(4)]
+
+    new_items, reached_known = watermarks.split_new(items, mark=5)
+
+    assert [item['id'] for item in new_items] == [20, 19]
+    assert reached_known
+
+
+def test_advance_never_moves_the_mark_back():
+    watermarks = KeywordWatermarks()
+    key = watermarks.key('  Sac  Gucci ', 50.9)
+    assert key == ('sac gucci', 50)
+
+    watermarks.advance(key, [listing(10), {'id': 'not a number'}])
+    watermarks.advance(key, [listing(7)])
+    assert watermarks.get(key) == 10
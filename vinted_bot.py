@@ -4,8 +4,17 @@ import logging
 from datetime import datetime
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
 from vinted_scraper import VintedScraper
+from subscription_scheduler import SubscriptionScheduler
+from subscription_store import SubscriptionStore
+from feed_matcher import SubscriptionMatcher, parse_feeds
+from item import Item
+from dedup_index import DedupIndex
+from delivery_queue import DeliveryQueue, PRIORITY_ALERT, PRIORITY_DIRECT
+from photo_cache import PhotoCache
+from message_renderer import MessageRenderer
 
 load_dotenv()
 
@@ -18,9 +27,31 @@ logger = logging.getLogger(__name__)
 class VintedBot:
     def __init__(self):
         self.token = os.getenv('TELEGRAM_BOT_TOKEN')
-        self.scraper = VintedScraper()
-        self.user_subscriptions = {}
-        self.sent_items = set()
+        self.scraper = VintedScraper(max_connections=int(os.getenv('SCRAPER_MAX_CONNECTIONS', 10)))
+        self.subscriptions = SubscriptionStore.from_env('subscriptions.sqlite3')
+        self.subscriptions.load()
+        self.sent_items = DedupIndex.from_env('vinted_bot_sent_items.sqlite3')
+        self.sent_items.load()
+        # Alert keys queued for delivery but not sent yet
+        self.sending = set()
+        # Alerts whose delivery failed, queued again on each cycle until one of
+        # DELIVERY_RETRY_CYCLES attempts succeeds: {sent_key: (chat_id, item, failures)}
+        self.failed_alerts = {}
+        self.retry_cycles = int(os.getenv('DELIVERY_RETRY_CYCLES', 3))
+        self.delivery = DeliveryQueue(workers=int(os.getenv('DELIVERY_WORKERS', 4)))
+        self.photos = PhotoCache(ttl=float(os.getenv('PHOTO_CACHE_TTL_HOURS', 24)) * 3600)
+        self.renderer = MessageRenderer(max_entries=int(os.getenv('RENDER_CACHE_SIZE', 2048)))
+        self.renderer.register('deal', self._format_item_text, self._item_keyboard)
+        self.scheduler = SubscriptionScheduler(
+            self.scraper,
+            max_concurrency=int(os.getenv('SUBSCRIPTION_FETCH_CONCURRENCY', 4)),
+            fetch_delay=float(os.getenv('SUBSCRIPTION_FETCH_DELAY', 0))
+        )
+        # e.g. "0-20,20-50,50-200": poll these newest-first price bands and match
+        # every subscription locally instead of searching each keyword
+        self.feeds = parse_feeds(os.getenv('SUBSCRIPTION_FEEDS', ''))
+        self.matcher = SubscriptionMatcher(self.subscriptions) if self.feeds else None
+        self.scraper.feed_max_pages = int(os.getenv('SUBSCRIPTION_FEED_MAX_PAGES', self.scraper.FEED_MAX_PAGES))
 
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         welcome_text = (
@@ -57,8 +88,7 @@ class VintedBot:
 
         await update.message.reply_text(f"🔍 Recherche en cours pour '{keyword}'...")
 
-        max_price = self.user_subscriptions.get(chat_id, {}).get('max_price',
-                                                                  float(os.getenv('MAX_PRICE', 50)))
+        max_price = self.subscriptions.max_price(chat_id)
 
         items = await self.scraper.search_items(keyword, max_price)
 
@@ -69,7 +99,11 @@ class VintedBot:
         await update.message.reply_text(f"✅ {len(items)} bonne(s) affaire(s) trouvée(s)!")
 
         for item in items[:5]:
-            await self.send_item(chat_id, item, context)
+            self.delivery.enqueue(
+                chat_id,
+                lambda item=item: self.send_item(chat_id, item, context),
+                priority=PRIORITY_DIRECT
+            )
 
     async def subscribe(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not context.args:
@@ -79,11 +113,7 @@ class VintedBot:
         keyword = ' '.join(context.args)
         chat_id = update.effective_chat.id
 
-        if chat_id not in self.user_subscriptions:
-            self.user_subscriptions[chat_id] = {'keywords': [], 'max_price': float(os.getenv('MAX_PRICE', 50))}
-
-        if keyword not in self.user_subscriptions[chat_id]['keywords']:
-            self.user_subscriptions[chat_id]['keywords'].append(keyword)
+        if self.subscriptions.subscribe(chat_id, keyword):
             await update.message.reply_text(f"✅ Abonnement activé pour '{keyword}'")
         else:
             await update.message.reply_text(f"Vous êtes déjà abonné à '{keyword}'")
@@ -96,8 +126,7 @@ class VintedBot:
         keyword = ' '.join(context.args)
         chat_id = update.effective_chat.id
 
-        if chat_id in self.user_subscriptions and keyword in self.user_subscriptions[chat_id]['keywords']:
-            self.user_subscriptions[chat_id]['keywords'].remove(keyword)
+        if self.subscriptions.unsubscribe(chat_id, keyword):
             await update.message.reply_text(f"❌ Désabonné de '{keyword}'")
         else:
             await update.message.reply_text(f"Vous n'êtes pas abonné à '{keyword}'")
@@ -105,12 +134,12 @@ class VintedBot:
     async def my_subscriptions(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.effective_chat.id
 
-        if chat_id not in self.user_subscriptions or not self.user_subscriptions[chat_id]['keywords']:
+        keywords = self.subscriptions.chat_keywords(chat_id)
+        if not keywords:
             await update.message.reply_text("Vous n'avez aucun abonnement actif.")
             return
 
-        keywords = self.user_subscriptions[chat_id]['keywords']
-        max_price = self.user_subscriptions[chat_id]['max_price']
+        max_price = self.subscriptions.max_price(chat_id)
 
         text = f"📋 Vos abonnements:\n\n"
         for kw in keywords:
@@ -127,76 +156,118 @@ class VintedBot:
         max_price = float(context.args[0])
         chat_id = update.effective_chat.id
 
-        if chat_id not in self.user_subscriptions:
-            self.user_subscriptions[chat_id] = {'keywords': [], 'max_price': max_price}
-        else:
-            self.user_subscriptions[chat_id]['max_price'] = max_price
+        self.subscriptions.set_max_price(chat_id, max_price)
 
         await update.message.reply_text(f"✅ Prix maximum défini à {max_price}€")
 
-    async def send_item(self, chat_id, item, context):
-        discount = item.get('discount_percent', 0)
-        profit_potential = item.get('profit_potential', 0)
-
-        text = (
+    @staticmethod
+    def _format_item_text(item: Item) -> str:
+        return (
             f"🔥 BONNE AFFAIRE DÉTECTÉE\n\n"
-            f"📦 {item['title']}\n"
-            f"💰 Prix: {item['price']}€\n"
-            f"📉 Réduction estimée: {discount}%\n"
-            f"💵 Potentiel de profit: +{profit_potential}€\n"
-            f"👤 Vendeur: {item.get('seller', 'N/A')}\n"
-            f"📍 Taille: {item.get('size', 'N/A')}\n"
-            f"⭐ État: {item.get('condition', 'N/A')}\n\n"
-            f"🔗 {item['url']}"
+            f"📦 {item.title}\n"
+            f"💰 Prix: {item.price}€\n"
+            f"📉 Réduction estimée: {item.discount_percent}%\n"
+            f"💵 Potentiel de profit: +{item.profit_potential}€\n"
+            f"👤 Vendeur: {item.seller}\n"
+            f"📍 Taille: {item.size or 'N/A'}\n"
+            f"⭐ État: {item.condition or 'N/A'}\n\n"
+            f"🔗 {item.url}"
         )
 
-        keyboard = [
-            [InlineKeyboardButton("Voir l'annonce", url=item['url'])]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        try:
-            if item.get('image_url'):
-                await context.bot.send_photo(
-                    chat_id=chat_id,
-                    photo=item['image_url'],
-                    caption=text,
-                    reply_markup=reply_markup
-                )
-            else:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=text,
-                    reply_markup=reply_markup
-                )
-        except Exception as e:
-            logger.error(f"Error sending item: {e}")
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=text,
-                reply_markup=reply_markup
+    @staticmethod
+    def _item_keyboard(item: Item) -> InlineKeyboardMarkup:
+        return InlineKeyboardMarkup([
+            [InlineKeyboardButton("Voir l'annonce", url=item.url)]
+        ])
+
+    async def send_item(self, chat_id, item: Item, context):
+        rendered = self.renderer.render('deal', item)
+
+        if item.image_url:
+            message = await self.photos.send(
+                context.bot, chat_id, item.image_url, rendered.caption, rendered.reply_markup
             )
+            if message is not None:
+                return message
+
+        return await context.bot.send_message(
+            chat_id=chat_id,
+            text=rendered.text,
+            reply_markup=rendered.reply_markup
+        )
 
     async def check_subscriptions(self, context: ContextTypes.DEFAULT_TYPE):
-        for chat_id, data in self.user_subscriptions.items():
-            for keyword in data['keywords']:
-                try:
-                    items = await self.scraper.search_items(keyword, data['max_price'])
+        async def deliver(chat_id, item):
+            self._enqueue_alert(chat_id, item, context)
 
-                    for item in items:
-                        item_id = item['id']
-                        if item_id not in self.sent_items:
-                            await self.send_item(chat_id, item, context)
-                            self.sent_items.add(item_id)
-                            await asyncio.sleep(1)
+        # The watermarks have moved past these listings, so they are only sent again from here
+        for chat_id, item, _ in list(self.failed_alerts.values()):
+            self._enqueue_alert(chat_id, item, context)
 
-                except Exception as e:
-                    logger.error(f"Error checking subscription for {chat_id}: {e}")
+        if self.matcher:
+            await self.scheduler.run_feed_cycle(self.feeds, self.matcher, deliver)
+        else:
+            await self.scheduler.run_cycle(self.subscriptions.index, deliver)
+        self.sent_items.save()
 
-                await asyncio.sleep(2)
+    def _enqueue_alert(self, chat_id, item: Item, context):
+        sent_key = f"{chat_id}:{item.id}"
+        if sent_key in self.sent_items:
+            self.failed_alerts.pop(sent_key, None)
+            return
+        if sent_key in self.sending:
+            return
+        future = self.delivery.enqueue(
+            chat_id,
+            lambda: self.send_item(chat_id, item, context),
+            priority=PRIORITY_ALERT
+        )
+        self._mark_sent_on_delivery(sent_key, future, chat_id, item)
+
+    def _mark_sent_on_delivery(self, sent_key: str, future: asyncio.Future, chat_id, item: Item):
+        """
+        Record sent_key once its alert is delivered. A failed alert is kept in
+        failed_alerts for the next cycle, unless Telegram rejected it for good
+        or it already failed retry_cycles times.
+        """
+        failures = self.failed_alerts.pop(sent_key, (None, None, 0))[2]
+        self.sending.add(sent_key)
+
+        def done(future: asyncio.Future):
+            self.sending.discard(sent_key)
+            error = future.exception() if not future.cancelled() else asyncio.CancelledError()
+            if error is None:
+                self.sent_items.add(sent_key)
+            elif isinstance(error, (BadRequest, Forbidden)):
+                logger.warning(f"Alert {sent_key} rejected by Telegram, not retrying: {error}")
+            elif failures + 1 < self.retry_cycles:
+                self.failed_alerts[sent_key] = (chat_id, item, failures + 1)
+            else:
+                logger.warning(f"Giving up on alert {sent_key} after {failures + 1} failed cycle(s)")
+
+        future.add_done_callback(done)
+
+    async def _on_startup(self, app: Application):
+        self.delivery.start()
+
+    async def _on_stop(self, app: Application):
+        # Drain while the bot can still send: post_shutdown runs after its HTTP client is closed
+        await self.delivery.stop()
+
+    async def _on_shutdown(self, app: Application):
+        self.sent_items.save()
+        self.subscriptions.close()
+        await self.scraper.close()
 
     def run(self):
-        app = Application.builder().token(self.token).build()
+        app = (
+            Application.builder()
+            .token(self.token)
+            .post_init(self._on_startup)
+            .post_stop(self._on_stop)
+            .post_shutdown(self._on_shutdown)
+            .build()
+        )
 
         app.add_handler(CommandHandler("start", self.start))
         app.add_handler(CommandHandler("help", self.help_command))
@@ -207,7 +278,11 @@ class VintedBot:
         app.add_handler(CommandHandler("setprice", self.set_price))
 
         job_queue = app.job_queue
-        check_interval = int(os.getenv('CHECK_INTERVAL_MINUTES', 15)) * 60
+        if self.matcher:
+            # Broad feeds fill up fast: poll them on their own, much shorter interval
+            check_interval = float(os.getenv('SUBSCRIPTION_FEED_INTERVAL_SECONDS', 60))
+        else:
+            check_interval = int(os.getenv('CHECK_INTERVAL_MINUTES', 15)) * 60
         job_queue.run_repeating(self.check_subscriptions, interval=check_interval, first=10)
 
         logger.info("Bot started!")
@@ -0,0 +1,224 @@
+import zlib
+import asyncio
+import logging
+import random
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+from rate_limiter import AdaptiveRateLimiter
+from catalog_decoder import loads
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = {403, 429}
+RETRY_STATUSES = THROTTLE_STATUSES | {500, 502, 503, 504}
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+
+
+def create_session(headers: Optional[Dict] = None, limit: int = 100, limit_per_host: int = 10,
+                   dns_ttl: int = 300, keepalive_timeout: float = 60) -> aiohttp.ClientSession:
+    """
+    Session for the catalog API: cached DNS, long-lived keep-alive connections
+    and compressed responses. Bodies are decompressed by fetch_json rather
+    than aiohttp, so their size on the wire can be counted.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_ttl,
+        keepalive_timeout=keepalive_timeout,
+        enable_cleanup_closed=True,
+    )
+    headers = dict(headers or {})
+    headers['Accept-Encoding'] = ACCEPT_ENCODING
+    return aiohttp.ClientSession(connector=connector, headers=headers, auto_decompress=False)
+
+
+def decode_body(body: bytes, encoding: str) -> bytes:
+    encoding = (encoding or '').strip().lower()
+    if encoding == 'gzip':
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == 'br' and brotli is not None:
+        return brotli.decompress(body)
+    if encoding in ('', 'identity'):
+        return body
+    raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+
+class TransferStats:
+    """Response body bytes as received and once decoded, per search label"""
+
+    def __init__(self):
+        self.labels: Dict[str, Dict[str, int]] = {}
+
+    def record(self, label: str, wire_bytes: int, decoded_bytes: int, not_modified: bool = False):
+        entry = self.labels.get(label)
+        if entry is None:
+            entry = self.labels[label] = {'requests': 0, 'wire_bytes': 0, 'decoded_bytes': 0, 'not_modified': 0}
+        entry['requests'] += 1
+        entry['wire_bytes'] += wire_bytes
+        entry['decoded_bytes'] += decoded_bytes
+        entry['not_modified'] += not_modified
+
+    def stats(self, top: int = 5) -> Dict:
+        wire = sum(entry['wire_bytes'] for entry in self.labels.values())
+        decoded = sum(entry['decoded_bytes'] for entry in self.labels.values())
+        heaviest = sorted(self.labels.items(), key=lambda pair: pair[1]['wire_bytes'], reverse=True)
+        return {
+            'requests': sum(entry['requests'] for entry in self.labels.values()),
+            'not_modified': sum(entry['not_modified'] for entry in self.labels.values()),
+            'wire_bytes': wire,
+            'decoded_bytes': decoded,
+            'saved_percent': round((1 - wire / decoded) * 100, 1) if decoded else 0.0,
+            'top': [dict(entry, label=label) for label, entry in heaviest[:top]],
+        }
+
+
+class ValidatorCache:
+    """
+    ETag / Last-Modified validators and the decoded body they belong to, per
+    URL and query, so a repeated poll can be answered with 304 Not Modified.
+    Endpoints that send neither header are simply never cached.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple, Tuple[Optional[str], Optional[str], Dict]]' = OrderedDict()
+
+    @staticmethod
+    def key(url: str, params: Dict) -> Tuple:
+        return (url,) + tuple(sorted((name, str(value)) for name, value in params.items()))
+
+    def headers(self, key: Tuple) -> Dict[str, str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return {}
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def cached(self, key: Tuple) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def store(self, key: Tuple, response_headers, data: Dict):
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (etag, last_modified, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+async def fetch_json(session: aiohttp.ClientSession, url: str, params: Dict,
+                     limiter: AdaptiveRateLimiter, headers: Optional[Dict] = None,
+                     timeout: float = 10, max_retries: int = 3, label: str = '',
+                     validators: Optional[ValidatorCache] = None,
+                     transfer: Optional[TransferStats] = None,
+                     decode: Callable[[bytes], Any] = loads) -> Optional[Dict]:
+    """
+    GET a JSON endpoint through the rate limiter, retrying throttled, failed and
+    timed out requests with jittered exponential backoff. Returns None on failure.
+
+    With a ValidatorCache the request is conditional and a 304 returns the
+    cached body; with TransferStats body sizes are recorded under `label`.
+    `decode` turns the decompressed body into the returned value.
+    The session must come from create_session (bodies arrive still encoded).
+    """
+    cache_key = validators.key(url, params) if validators is not None else None
+    if cache_key is not None:
+        conditional = validators.headers(cache_key)
+        if conditional:
+            headers = dict(headers or {}, **conditional)
+
+    for attempt in range(max_retries + 1):
+        retry_after = None
+
+        async with limiter:
+            try:
+                async with session.get(url, params=params, headers=headers,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status == 304 and cache_key is not None:
+                        data = validators.cached(cache_key)
+                        if data is not None:
+                            limiter.record_success()
+                            if transfer is not None:
+                                transfer.record(label, 0, 0, not_modified=True)
+                            return data
+
+                    if response.status == 200:
+                        body = await response.read()
+                        decoded = decode_body(body, response.headers.get('Content-Encoding'))
+                        data = decode(decoded)
+                        limiter.record_success()
+
+                        if transfer is not None:
+                            transfer.record(label, len(body), len(decoded))
+                        if cache_key is not None:
+                            validators.store(cache_key, response.headers, data)
+                        return data
+
+                    if response.status in THROTTLE_STATUSES:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        limiter.record_throttle(retry_after)
+                    elif response.status not in RETRY_STATUSES:
+                        logger.warning(f"Search failed for '{label}': {response.status}")
+                        return None
+
+                    logger.warning(f"Search for '{label}' got {response.status} (attempt {attempt + 1})")
+
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout searching for '{label}' (attempt {attempt + 1})")
+            except (aiohttp.ClientError, ValueError, zlib.error) as e:
+                logger.warning(f"Request error for '{label}': {e} (attempt {attempt + 1})")
+
+        if attempt == max_retries:
+            break
+
+        limiter.retries += 1
+        await asyncio.sleep(max(backoff_delay(attempt), retry_after or 0))
+
+    logger.error(f"Giving up on '{label}' after {max_retries + 1} attempts")
+    return None